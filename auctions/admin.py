@@ -1,15 +1,66 @@
+from django import forms
 from django.contrib import admin
-from auctions.models import Listing, Comment, Bid, User
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from auctions.models import (
+    ArchivedListing,
+    Bid,
+    Category,
+    Comment,
+    FlaggedAccount,
+    Job,
+    LedgerEvent,
+    Listing,
+    ListingCard,
+    OutboxEvent,
+    ProxyBid,
+    RankingEvent,
+    SavedSearch,
+    User,
+    dispatch_notifications_soon,
+    listing_page_changed,
+    update_rankings_soon,
+)
+from auctions.paginators import EstimatedCountPaginator
+
+
+class MoveToCategoryForm(forms.Form):
+    category = forms.ModelChoiceField(Category.objects.all())
+
+
+def listings_changed(ids):
+    # What Listing.save does for each listing, for the bulk updates here
+    for pk in ids:
+        listing_page_changed(pk)
+    cache.delete(Category.objects.CACHE_KEY)
+
+
+class ScaleModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N total"
+    show_full_result_count = False
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScaleModelAdmin):
     list_display = ("username",)
+    search_fields = ("username",)
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("name", "parent", "active_count", "closed_count")
+    readonly_fields = ("active_count", "closed_count")
+    search_fields = ("name",)
 
 
 @admin.register(Listing)
-class ListingAdmin(admin.ModelAdmin):
-    filter_horizontal = ("watchers",)
+class ListingAdmin(ScaleModelAdmin):
+    autocomplete_fields = ("watchers", "listed_by", "category")
     list_display = (
         "title",
         "description",
@@ -18,13 +69,157 @@ class ListingAdmin(admin.ModelAdmin):
         "listed_by",
         "closed",
     )
+    list_filter = ("closed", "category")
+    list_select_related = ("listed_by", "category")
+    search_fields = ("title",)
+    actions = ["close_listings", "move_to_category"]
+
+    @admin.action(description="Close selected listings")
+    def close_listings(self, request, queryset):
+        with transaction.atomic():
+            to_close = queryset.filter(closed=False)
+            counts = list(
+                to_close.order_by().values("category_id").annotate(n=Count("pk"))
+            )
+            listings = list(to_close)
+            ids = [listing.pk for listing in listings]
+            OutboxEvent.objects.bulk_create(
+                OutboxEvent(
+                    kind=OutboxEvent.LISTING_CLOSED, listing_id=pk, actor=request.user
+                )
+                for pk in ids
+            )
+            RankingEvent.objects.bulk_create(RankingEvent(listing_id=pk) for pk in ids)
+            updated = to_close.update(closed=True, closed_at=timezone.now())
+            # One at a time so that each close is snapshotted like any other
+            for listing in listings:
+                LedgerEvent.objects.append(listing, LedgerEvent.LISTING_CLOSED)
+            ListingCard.objects.filter(pk__in=ids).update(closed=True)
+            transaction.on_commit(dispatch_notifications_soon)
+            transaction.on_commit(update_rankings_soon)
+            for row in counts:
+                Category.objects.bump(
+                    row["category_id"], active=-row["n"], closed=row["n"]
+                )
+            listings_changed(ids)
+        self.message_user(request, f"Closed {updated} listings.")
+
+    @admin.action(description="Move selected listings to a category")
+    def move_to_category(self, request, queryset):
+        # The changelist posts the action first; the form below posts it
+        # again with "apply" once a category has been picked
+        form = MoveToCategoryForm(request.POST if "apply" in request.POST else None)
+        if not form.is_valid():
+            context = {
+                **self.admin_site.each_context(request),
+                "title": "Move listings to a category",
+                "opts": self.model._meta,
+                "form": form,
+                "count": queryset.count(),
+                "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            }
+            return TemplateResponse(
+                request, "admin/auctions/listing/move_to_category.html", context
+            )
+        name = form.cleaned_data["category"].name
+        with transaction.atomic():
+            to_move = queryset.exclude(category_id=name)
+            totals = to_move.aggregate(
+                active=Count("pk", filter=Q(closed=False)),
+                closed=Count("pk", filter=Q(closed=True)),
+            )
+            Category.objects.bump_for_listings(to_move, sign=-1)
+            ids = list(to_move.values_list("pk", flat=True))
+            ListingCard.objects.filter(pk__in=ids).update(category=name)
+            updated = Listing.objects.filter(pk__in=ids).update(category_id=name)
+            Category.objects.bump(name, **totals)
+            listings_changed(ids)
+        self.message_user(request, f"Moved {updated} listings to {name}.")
 
 
 @admin.register(Bid)
-class BidAdmin(admin.ModelAdmin):
+class BidAdmin(ScaleModelAdmin):
+    autocomplete_fields = ("listing", "bidder")
     list_display = ("listing", "amount", "bidder")
+    list_select_related = ("listing", "bidder")
+
+    # Bids are changed only by retracting (deleting) them, which the ledger
+    # records; a bulk delete would skip Bid.delete and with it the ledger
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for bid in queryset.select_related("listing"):
+                bid.delete()
+
+
+@admin.register(ProxyBid)
+class ProxyBidAdmin(ScaleModelAdmin):
+    autocomplete_fields = ("listing", "bidder")
+    list_display = ("listing", "max_amount", "bidder", "created")
+    list_select_related = ("listing", "bidder")
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ScaleModelAdmin):
+    autocomplete_fields = ("listing", "commenter")
     list_display = ("listing", "commenter", "text")
+    list_select_related = ("listing", "commenter")
+
+
+@admin.register(ArchivedListing)
+class ArchivedListingAdmin(ScaleModelAdmin):
+    list_display = ("title", "category", "listed_by", "winner", "closed_at")
+    list_select_related = ("category", "listed_by", "winner")
+    search_fields = ("title",)
+    readonly_fields = ("bids", "comments")
+
+
+@admin.register(Job)
+class JobAdmin(ScaleModelAdmin):
+    list_display = ("task", "queue", "priority", "status", "run_at", "attempts")
+    list_filter = ("status", "queue")
+    readonly_fields = ("last_error",)
+
+
+@admin.register(LedgerEvent)
+class LedgerEventAdmin(ScaleModelAdmin):
+    list_display = ("id", "listing", "kind", "bidder", "amount", "created")
+    list_filter = ("kind",)
+    list_select_related = ("listing", "bidder")
+    search_fields = ("=listing__id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FlaggedAccount)
+class FlaggedAccountAdmin(ScaleModelAdmin):
+    list_display = (
+        "bidder",
+        "seller",
+        "score",
+        "bid_count",
+        "affinity",
+        "losing_rate",
+        "near_increment_rate",
+    )
+    list_select_related = ("bidder", "seller")
+    search_fields = ("bidder__username", "seller__username")
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(ScaleModelAdmin):
+    list_display = ("user", "keywords", "category", "min_price", "max_price")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    readonly_fields = ("index_term",)
@@ -0,0 +1,121 @@
+import heapq
+from operator import itemgetter
+from django.db import transaction
+from auctions import sharding
+from auctions.models import Bid, FlaggedAccount
+
+FETCH_SIZE = 100_000
+MIN_BIDS = 5
+MIN_LISTINGS = 3
+# A bid overtaken by one less than this fraction above it looks like probing
+NEAR_INCREMENT = 0.02
+THRESHOLD = 0.6
+
+
+def load_bids(fetch_size=FETCH_SIZE):
+    """Return bids as columnar NumPy arrays sorted by listing, then time.
+
+    Reads every shard through a server-side cursor in chunks; only the
+    compact arrays are kept, never model instances.
+    """
+    import numpy as np
+
+    runs = [
+        Bid.objects.using(alias)
+        .filter(amount__isnull=False)
+        .order_by("listing_id", "created", "pk")
+        .values_list("listing_id", "bidder_id", "listing__listed_by_id", "amount")
+        .iterator(chunk_size=fetch_size)
+        for alias in sharding.aliases()
+    ]
+    # A listing's bids all sit on its shard, so merging on the listing keeps
+    # each listing's bids in time order
+    rows = heapq.merge(*runs, key=itemgetter(0))
+    chunks, buffer = [], []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= fetch_size:
+            chunks.append(np.array(buffer, dtype=np.float64))
+            buffer = []
+    if buffer:
+        chunks.append(np.array(buffer, dtype=np.float64))
+    data = np.concatenate(chunks) if chunks else np.empty((0, 4))
+    listing, bidder, seller = (data[:, i].astype(np.int64) for i in range(3))
+    return listing, bidder, seller, data[:, 3]
+
+
+def indicators(listing, bidder, seller, amount, near_increment=NEAR_INCREMENT):
+    """Score every (bidder, seller) pair; inputs must be sorted by listing, time.
+
+    Returns a dict of equal-length arrays, one entry per pair.
+    """
+    import numpy as np
+
+    base = int(max(bidder.max(), seller.max())) + 1
+    pair_keys, pair = np.unique(bidder * base + seller, return_inverse=True)
+    pair_bidder, pair_seller = pair_keys // base, pair_keys % base
+    bids = np.bincount(pair)
+
+    bidders, per_bidder = np.unique(bidder, return_counts=True)
+    affinity = bids / per_bidder[np.searchsorted(bidders, pair_bidder)]
+
+    same_listing_next = np.r_[listing[1:] == listing[:-1], False]
+    next_amount = np.r_[amount[1:], np.inf]
+    near = same_listing_next & ((next_amount - amount) <= amount * near_increment)
+    near_rate = np.bincount(pair, weights=near) / bids
+
+    # The last bid on each listing is the winning (or currently leading) one
+    last = np.r_[listing[1:] != listing[:-1], True]
+    leaders_listing, leaders = listing[last], bidder[last]
+    _, first = np.unique(listing * base + bidder, return_index=True)
+    won = leaders[np.searchsorted(leaders_listing, listing[first])] == bidder[first]
+    listings = np.bincount(pair[first], minlength=len(pair_keys))
+    lost = np.bincount(pair[first], weights=~won, minlength=len(pair_keys))
+    losing_rate = lost / listings
+
+    score = (affinity + losing_rate + near_rate) / 3
+    # Bidding on your own listings is shilling by definition
+    score[pair_bidder == pair_seller] = 1.0
+    return {
+        "bidder": pair_bidder,
+        "seller": pair_seller,
+        "bids": bids,
+        "listings": listings,
+        "affinity": affinity,
+        "losing_rate": losing_rate,
+        "near_increment_rate": near_rate,
+        "score": score,
+    }
+
+
+def flag_accounts(
+    threshold=THRESHOLD, min_bids=MIN_BIDS, min_listings=MIN_LISTINGS, columns=None
+):
+    """Recompute FlaggedAccount from the full bid history; return rows written."""
+    import numpy as np
+
+    columns = columns if columns is not None else load_bids()
+    selected, found = [], {}
+    if len(columns[0]):
+        found = indicators(*columns)
+        selected = np.flatnonzero(
+            (found["score"] >= threshold)
+            & (found["bids"] >= min_bids)
+            & (found["listings"] >= min_listings)
+        )
+    rows = [
+        FlaggedAccount(
+            bidder_id=int(found["bidder"][i]),
+            seller_id=int(found["seller"][i]),
+            score=float(found["score"][i]),
+            bid_count=int(found["bids"][i]),
+            affinity=float(found["affinity"][i]),
+            losing_rate=float(found["losing_rate"][i]),
+            near_increment_rate=float(found["near_increment_rate"][i]),
+        )
+        for i in selected
+    ]
+    with transaction.atomic():
+        FlaggedAccount.objects.all().delete()
+        FlaggedAccount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
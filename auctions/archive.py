@@ -0,0 +1,103 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+from auctions import sharding
+from auctions.models import ArchivedListing, Bid, Comment, LedgerEvent, Listing
+
+
+def archivable_listings(older_than=None):
+    if older_than is None:
+        older_than = timedelta(days=settings.AUCTIONS_ARCHIVE_AFTER_DAYS)
+    return Listing.objects.filter(
+        closed=True, closed_at__lt=timezone.now() - older_than
+    ).order_by("pk")
+
+
+def to_archive(listing):
+    # Expects bids ordered by amount and comments ordered by pk (see
+    # archive_batch) so the last bid is the winning one.
+    bids = list(listing.bids.all())
+    top_bid = bids[-1] if bids else None
+    return ArchivedListing(
+        id=listing.pk,
+        title=listing.title,
+        description=listing.description,
+        starting_bid=listing.starting_bid,
+        final_price=top_bid.amount if top_bid else None,
+        image_url=listing.image_url,
+        category_id=listing.category_id,
+        listed_by_id=listing.listed_by_id,
+        winner_id=top_bid.bidder_id if top_bid else None,
+        created=listing.created,
+        closed_at=listing.closed_at,
+        bid_count=len(bids),
+        watcher_count=listing.watcher_count,
+        bids=[
+            [
+                bid.bidder_id,
+                str(bid.amount.amount),
+                bid.created.isoformat(),
+                bid.pk,
+                str(bid.amount.currency),
+            ]
+            for bid in bids
+        ],
+        comments=[[c.commenter_id, c.text] for c in listing.comments.all()],
+        ledger=[event.row() for event in listing.ledger_events.all()],
+    )
+
+
+def archive_batch(queryset, batch_size):
+    """Move one batch of listings into the archive and return how many moved.
+
+    Rows are claimed with SKIP LOCKED where supported so a running archiver
+    never waits on, or blocks, a request touching the same listing. Reads
+    the listings of the current shard; the archive lives on default.
+    """
+    with sharding.atomic(sharding.current()), transaction.atomic():
+        ids = list(
+            queryset.select_for_update(skip_locked=True).values_list("pk", flat=True)[
+                :batch_size
+            ]
+        )
+        if not ids:
+            return 0
+        listings = (
+            Listing.objects.filter(pk__in=ids)
+            .annotate(watcher_count=Count("watchers"))
+            .prefetch_related(
+                Prefetch("bids", queryset=Bid.objects.order_by("amount", "pk")),
+                Prefetch("comments", queryset=Comment.objects.order_by("pk")),
+                Prefetch(
+                    "ledger_events", queryset=LedgerEvent.objects.order_by("id")
+                ),
+            )
+        )
+        # Default commits first; should the shard's delete then fail, the
+        # next run finds these rows already archived
+        ArchivedListing.objects.bulk_create(
+            [to_archive(listing) for listing in listings], ignore_conflicts=True
+        )
+        # A queryset delete cascades to bids, comments, watcher rows, the
+        # ledger (copied above) and snapshots but skips Listing.delete, so
+        # category counters are left alone: archived listings still count
+        # as closed.
+        Listing.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_closed_listings(older_than=None, batch_size=500, max_batches=None):
+    queryset = archivable_listings(older_than)
+    total = batches = 0
+    for alias in sharding.aliases():
+        with sharding.using(alias):
+            while max_batches is None or batches < max_batches:
+                moved = archive_batch(queryset, batch_size)
+                if not moved:
+                    break
+                total += moved
+                batches += 1
+    return total
+
@@ -0,0 +1,192 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+from auctions import sharding
+from auctions.models import Listing
+
+SUGGESTIONS = 10
+# Prefixes this short match too much of the index to scan per keystroke, so
+# their suggestions are computed at load and recomputed when a matching
+# title is added or removed
+SHORT_PREFIX = 2
+# Each title is findable from the start of its first few words
+MAX_WORDS = 6
+MAX_TERM_LENGTH = 32
+# Upper bound on index entries examined by one long-prefix lookup
+MAX_SCAN = 5000
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def terms(title):
+    text = normalize(title)
+    starts = [0] + [i + 1 for i, char in enumerate(text) if char == " "]
+    return {text[start : start + MAX_TERM_LENGTH] for start in starts[:MAX_WORDS]}
+
+
+class TitleIndex:
+    """Sorted (term, pk) array over active listing titles, ranked by watchers.
+
+    Lookups bisect the array for the prefix range and take the most watched
+    listings in it. The index is loaded once, then kept current by reading
+    listings created or closed since the last sync; a periodic rebuild in a
+    background thread picks up watcher counts and edited titles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.reset()
+
+    def reset(self):
+        self.keys = []
+        self.listings = {}
+        self.top = {}
+        self.max_pk = 0
+        self.built = self.synced = None
+        self.synced_at = None
+
+    def load(self, rows):
+        """Replace the index with (pk, title, popularity) rows."""
+        limit = settings.AUCTIONS_AUTOCOMPLETE_MAX_LISTINGS
+        rows = heapq.nlargest(limit, rows, key=lambda row: (row[2], row[0]))
+        listings = {pk: (title, popularity) for pk, title, popularity in rows}
+        keys = sorted((term, pk) for pk, title, _ in rows for term in terms(title))
+        short = {
+            term[:length] for term, _ in keys for length in range(1, SHORT_PREFIX + 1)
+        }
+        with self._lock:
+            self.keys, self.listings, self.top = keys, listings, {}
+            for prefix in short:
+                self.top[prefix] = self._scan(prefix, SUGGESTIONS, None)
+
+    def add(self, pk, title, popularity=0):
+        with self._lock:
+            if pk in self.listings:
+                return
+            if len(self.listings) >= settings.AUCTIONS_AUTOCOMPLETE_MAX_LISTINGS:
+                return
+            self.listings[pk] = (title, popularity)
+            for term in terms(title):
+                insort(self.keys, (term, pk))
+                self._invalidate(term)
+
+    def remove(self, pk):
+        with self._lock:
+            entry = self.listings.pop(pk, None)
+            if entry is None:
+                return
+            for term in terms(entry[0]):
+                position = bisect_left(self.keys, (term, pk))
+                if position < len(self.keys) and self.keys[position] == (term, pk):
+                    del self.keys[position]
+                self._invalidate(term)
+
+    def _invalidate(self, term):
+        for length in range(1, SHORT_PREFIX + 1):
+            self.top.pop(term[:length], None)
+
+    def suggest(self, prefix, limit=SUGGESTIONS):
+        prefix = normalize(prefix)[:MAX_TERM_LENGTH]
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX and limit <= SUGGESTIONS:
+            found = self.top.get(prefix)
+            if found is None:
+                found = self.top[prefix] = self._scan(prefix, SUGGESTIONS, None)
+            return found[:limit]
+        return self._scan(prefix, limit, MAX_SCAN)
+
+    def _scan(self, prefix, limit, max_scan):
+        keys, listings = self.keys, self.listings
+        start = bisect_left(keys, (prefix,))
+        end = bisect_right(keys, (prefix + "\U0010ffff",), lo=start)
+        if max_scan is not None:
+            end = min(end, start + max_scan)
+        best = {}
+        for _, pk in keys[start:end]:
+            entry = listings.get(pk)
+            if entry is not None:
+                best[pk] = entry
+        ranked = heapq.nlargest(
+            limit, best.items(), key=lambda item: (item[1][1], item[0])
+        )
+        return [{"id": pk, "title": title} for pk, (title, _) in ranked]
+
+    def build(self):
+        """Load every active listing of every shard; safe to call while
+        lookups are served."""
+        started = timezone.now()
+        rows = (
+            row
+            for alias in sharding.aliases()
+            for row in Listing.objects.using(alias)
+            .filter(closed=False)
+            .annotate(popularity=Count("watchers"))
+            .values_list("pk", "title", "popularity")
+            .iterator(chunk_size=10000)
+        )
+        max_pk = max(
+            Listing.objects.using(alias).aggregate(top=Max("pk"))["top"] or 0
+            for alias in sharding.aliases()
+        )
+        self.load(rows)
+        self.max_pk = max_pk
+        self.synced = started
+        self.built = self.synced_at = time.monotonic()
+
+    def sync(self):
+        """Apply listings created or closed since the last sync."""
+        since = self.synced
+        self.synced = timezone.now()
+        self.synced_at = time.monotonic()
+        max_pk = self.max_pk
+        for alias in sharding.aliases():
+            listings = Listing.objects.using(alias)
+            created = listings.filter(pk__gt=max_pk).values_list(
+                "pk", "title", "closed"
+            )
+            for pk, title, closed in created:
+                self.max_pk = max(self.max_pk, pk)
+                if not closed:
+                    self.add(pk, title)
+            closed = listings.filter(closed_at__gte=since)
+            for pk in closed.values_list("pk", flat=True):
+                self.remove(pk)
+
+    def refresh(self):
+        """Build on first use, then sync and rebuild on their intervals."""
+        if self.built is None:
+            self.build()
+            return
+        now = time.monotonic()
+        if now - self.synced_at >= settings.AUCTIONS_AUTOCOMPLETE_SYNC_SECONDS:
+            self.sync()
+        if (
+            now - self.built >= settings.AUCTIONS_AUTOCOMPLETE_REBUILD_SECONDS
+            and not self._rebuilding
+        ):
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+
+index = TitleIndex()
+
+
+def suggest(prefix, limit=SUGGESTIONS):
+    index.refresh()
+    return index.suggest(prefix, limit)
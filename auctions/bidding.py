@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from djmoney.money import Money
+from auctions import sharding
+from auctions.models import Bid, Listing, ProxyBid
+
+MAX_NOT_RAISED_ERROR = "Your maximum bid must be higher than your previous maximum."
+
+
+def increment(currency):
+    return Money(settings.AUCTIONS_BID_INCREMENT, currency)
+
+
+def opening_price(listing, currency):
+    if listing.starting_bid and listing.starting_bid.amount > 0:
+        return listing.starting_bid
+    return increment(currency)
+
+
+def locked(listing):
+    return Listing.objects.select_for_update().get(pk=listing.pk)
+
+
+def place_bid(listing, user, amount):
+    """Place a manual bid, then let standing proxies answer it."""
+    with sharding.atomic(listing._state.db):
+        listing = locked(listing)
+        bid = listing.place_bid(user, amount)
+        resolve(listing)
+    return bid
+
+
+def place_proxy_bid(listing, user, max_amount):
+    """Record ``user``'s maximum for ``listing`` and return the bids it caused.
+
+    The maximum must pass the same rules as a visible bid (see Bid.clean).
+    """
+    with sharding.atomic(listing._state.db):
+        listing = locked(listing)
+        candidate = Bid(listing=listing, amount=max_amount, bidder=user)
+        candidate.full_clean()
+        proxy = ProxyBid.objects.filter(listing=listing, bidder=user).first()
+        if proxy is None:
+            ProxyBid.objects.create(
+                listing=listing, bidder=user, max_amount=candidate.amount
+            )
+        elif proxy.max_amount >= candidate.amount:
+            raise ValidationError({"amount": MAX_NOT_RAISED_ERROR})
+        else:
+            proxy.max_amount = candidate.amount
+            proxy.save(update_fields=["max_amount"])
+        return resolve(listing)
+
+
+def resolve(listing):
+    """Settle competing proxies at the lowest price that still wins.
+
+    Only the two highest maxima matter, so this reads two proxy rows however
+    many are standing and writes at most two bids: the runner-up at its
+    maximum and the leader one increment above the strongest competitor.
+    Must run inside the transaction that locked ``listing``.
+    """
+    proxies = list(listing.proxy_bids.order_by("-max_amount", "created")[:2])
+    if not proxies:
+        return []
+    leader, runner = proxies[0], proxies[1] if len(proxies) > 1 else None
+    state = listing.ledger_state()
+    highest, highest_bidder_id = state.highest_bid, state.highest_bidder_id
+    step = increment(leader.max_amount.currency)
+
+    competitors = []
+    if runner:
+        competitors.append(runner.max_amount)
+    if highest is not None and highest_bidder_id != leader.bidder_id:
+        competitors.append(highest)
+    if competitors:
+        target = min(leader.max_amount, max(competitors) + step)
+    elif highest is None:
+        target = min(leader.max_amount, opening_price(listing, step.currency))
+    else:
+        # The leader already holds the highest bid and nobody challenges it
+        return []
+
+    created = []
+    if (
+        runner
+        and runner.max_amount < target
+        and (highest is None or runner.max_amount > highest)
+    ):
+        created.append(listing.place_bid(runner.bidder, runner.max_amount))
+        highest = runner.max_amount
+    if highest is None or target > highest:
+        created.append(listing.place_bid(leader.bidder, target))
+    return created
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+GENERATION_KEY = "tier:generation"
+CHANGE_KEY = "tier:change:%d"
+
+# One local tier per cache alias and process, shared by all threads, the way
+# LocMemCache keeps its stores
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """Bounded LRU of (value, expires_at) that remembers the last generation
+    of shared changes it has applied."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = None
+        self.checked_at = 0.0
+        self.stats = Counter()
+        self.shared_stats = Counter()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, entry[0]
+                del self.entries[key]
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return False, None
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache(BaseCache):
+    """An in-process LRU in front of a shared cache alias.
+
+    Reads are served from the local tier when possible; misses fall through
+    to the shared cache and fill the local tier for at most LOCAL_TIMEOUT
+    seconds. Every write through this backend also bumps a generation
+    counter in the shared cache and records the changed key under that
+    generation. Each process reads the counter at most once per
+    CHECK_INTERVAL and drops the keys changed since its last look, so
+    invalidation reaches every worker without a shared round trip per read.
+
+    Values held locally are returned as-is, not copied, so callers must not
+    mutate what they get back.
+
+    Changes are only kept for LOCAL_TIMEOUT + CHECK_INTERVAL seconds: by
+    then every local entry a change could have made stale has expired, and a
+    process that finds a change missing clears its tier anyway. The shared
+    backend must increment atomically and must not evict the generation
+    counter under pressure (Redis, memcached); losing it clears every local
+    tier, and a racy incr lets changes overwrite each other.
+
+    OPTIONS: SHARED (alias, required), MAX_ENTRIES, LOCAL_TIMEOUT,
+    CHECK_INTERVAL, CHANGE_LOG (generations kept; falling further behind
+    clears the local tier).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options["SHARED"]
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 30)
+        self.check_interval = options.get("CHECK_INTERVAL", 1)
+        self.change_log = options.get("CHANGE_LOG", 1000)
+        self.change_timeout = self.local_timeout + self.check_interval
+        with _tiers_lock:
+            self.local = _tiers.setdefault(
+                location or self.shared_alias,
+                LocalTier(options.get("MAX_ENTRIES", 1000)),
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def local_seconds(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout - time.time(), self.local_timeout)
+
+    def sync(self):
+        """Drop local entries changed elsewhere since the last check."""
+        local = self.local
+        now = time.monotonic()
+        if now - local.checked_at < self.check_interval:
+            return
+        local.checked_at = now
+        generation = self.shared.get(GENERATION_KEY, 0)
+        seen, local.generation = local.generation, generation
+        if seen is None or generation == seen:
+            return
+        if generation < seen or generation - seen > self.change_log:
+            local.clear()
+            return
+        changes = self.shared.get_many(
+            [CHANGE_KEY % number for number in range(seen + 1, generation + 1)]
+        )
+        if len(changes) < generation - seen:
+            local.clear()
+        else:
+            local.discard(changes.values())
+
+    def announce(self, key):
+        """Record a change to ``key`` for every process's local tier."""
+        self.shared.add(GENERATION_KEY, 0, timeout=None)
+        generation = self.shared.incr(GENERATION_KEY)
+        self.shared.set(CHANGE_KEY % generation, key, self.change_timeout)
+        if self.local.generation == generation - 1:
+            # Nobody else wrote in between, so there is nothing to drop
+            self.local.generation = generation
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.sync()
+        found, value = self.local.get(local_key)
+        if found:
+            return value
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            self.local.shared_stats["misses"] += 1
+            return default
+        self.local.shared_stats["hits"] += 1
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.shared.set(key, value, timeout, version=version)
+        self.announce(local_key)
+        self.local.set(local_key, value, self.local_seconds(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            local_key = self.make_and_validate_key(key, version=version)
+            self.announce(local_key)
+            self.local.set(local_key, value, self.local_seconds(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        deleted = self.shared.delete(key, version=version)
+        self.local.discard([local_key])
+        self.announce(local_key)
+        return deleted
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.shared.incr(key, delta, version=version)
+        self.local.discard([local_key])
+        self.announce(local_key)
+        return value
+
+    def clear(self):
+        generation = self.shared.get(GENERATION_KEY, 0)
+        self.shared.clear()
+        # Jump past every process's change log so they all clear too
+        self.shared.set(GENERATION_KEY, generation + self.change_log + 1, None)
+        self.local.clear()
+
+    def stats(self):
+        return {
+            "local": dict(self.local.stats, entries=len(self.local.entries)),
+            "shared": dict(self.local.shared_stats),
+        }
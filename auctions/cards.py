@@ -0,0 +1,83 @@
+"""Rebuilding and checking the ListingCard read model.
+
+Both work on the current database and derive each card from its listing
+and a fold of its whole ledger, ignoring snapshots and the cards already
+written. Listings are walked in id order beside ``ledger.stream_events``
+so every listing's auction is folded in one ordered pass.
+"""
+from itertools import groupby, islice
+from operator import itemgetter
+from auctions import ledger
+from auctions.models import AuctionState, Listing, ListingCard, User
+
+BATCH_SIZE = 2000
+
+# Everything a card holds besides its listing id
+FIELDS = [
+    field.name for field in ListingCard._meta.concrete_fields if not field.primary_key
+]
+
+
+def expected_cards(batch_size=BATCH_SIZE):
+    """What every listing's card should hold, in batches of unsaved cards."""
+    events = groupby(ledger.stream_events(batch_size), itemgetter(0))
+    pending = next(events, None)
+    listings = Listing.objects.order_by("pk").iterator(chunk_size=batch_size)
+    while batch := list(islice(listings, batch_size)):
+        sellers = dict(
+            User.objects.filter(
+                pk__in={listing.listed_by_id for listing in batch}
+            ).values_list("pk", "username")
+        )
+        cards = []
+        for listing in batch:
+            # Skip events of listings deleted since
+            while pending is not None and pending[0] < listing.pk:
+                pending = next(events, None)
+            state = AuctionState(listing.pk)
+            if pending is not None and pending[0] == listing.pk:
+                for _, *row in pending[1]:
+                    state.apply(*row)
+                pending = next(events, None)
+            seller = sellers.get(listing.listed_by_id, "")
+            cards.append(ListingCard.for_listing(listing, state, seller))
+        yield cards
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Rewrite every card; returns how many were written.
+
+    Cards are upserted rather than deleted first, so the list pages keep
+    working throughout. A card changed by a bid while its batch is being
+    written can be left stale; ``check`` afterwards finds it.
+    """
+    written = 0
+    for cards in expected_cards(batch_size):
+        ListingCard.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=["listing"],
+            update_fields=FIELDS,
+        )
+        written += len(cards)
+    return written
+
+
+def check(batch_size=BATCH_SIZE):
+    """Yield (expected card, names of the fields that differ) for every card
+    that is out of step with its listing, with ["missing"] when there is no
+    card at all."""
+    for cards in expected_cards(batch_size):
+        stored = ListingCard.objects.in_bulk([card.pk for card in cards])
+        for card in cards:
+            current = stored.get(card.pk)
+            if current is None:
+                yield card, ["missing"]
+                continue
+            fields = [
+                name
+                for name in FIELDS
+                if getattr(current, name) != getattr(card, name)
+            ]
+            if fields:
+                yield card, fields
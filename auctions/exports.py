@@ -0,0 +1,191 @@
+import csv
+import heapq
+from datetime import datetime, time
+from decimal import Decimal
+from itertools import chain, islice
+from operator import itemgetter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from auctions import sharding
+from auctions.models import ArchivedListing, Bid, Listing, User
+
+CHUNK_SIZE = 2000
+
+DATASETS = {
+    "listings": (
+        Listing,
+        [
+            ("id", "pk"),
+            ("title", "title"),
+            ("category", "category_id"),
+            ("starting_bid", "starting_bid"),
+            ("currency", "starting_bid_currency"),
+            ("listed_by", "listed_by_id"),
+            ("created", "created"),
+            ("closed", "closed"),
+            ("closed_at", "closed_at"),
+            ("watch_count", "watch_count"),
+        ],
+    ),
+    "bids": (
+        Bid,
+        [
+            ("id", "pk"),
+            ("listing", "listing_id"),
+            ("bidder", "bidder_id"),
+            ("amount", "amount"),
+            ("currency", "amount_currency"),
+            ("created", "created"),
+        ],
+    ),
+}
+
+# Exported by username; users live on default, apart from sharded rows
+USER_COLUMNS = {"listed_by", "bidder"}
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class Echo:
+    """File-like object that hands back what is written instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(dataset, since=None, until=None, category=None, closed=None):
+    model, columns = DATASETS[dataset]
+    prefix = "" if model is Listing else "listing__"
+    # Dates bound each row's own creation; category and closed are the
+    # listing's
+    filters = {}
+    if since is not None:
+        filters["created__gte"] = since
+    if until is not None:
+        filters["created__lt"] = until
+    if category is not None:
+        filters[f"{prefix}category"] = category
+    if closed is not None:
+        filters[f"{prefix}closed"] = closed
+    queryset = model.objects.filter(**filters)
+    if model is Listing:
+        queryset = queryset.annotate(watch_count=Count("watchers"))
+    return queryset.order_by("pk").values_list(*[field for _, field in columns])
+
+
+def as_datetime(value):
+    # Filters may be dates or naive datetimes; archived bid times are aware
+    if value is not None and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def archived_rows(dataset, since=None, until=None, category=None, closed=None):
+    """Rows of archived listings, or of their bids, in the dataset's columns."""
+    if closed is False:
+        return
+    archived = ArchivedListing.objects.order_by("pk")
+    if category is not None:
+        archived = archived.filter(category=category)
+    if dataset == "listings":
+        if since is not None:
+            archived = archived.filter(created__gte=since)
+        if until is not None:
+            archived = archived.filter(created__lt=until)
+        yield from archived.values_list(
+            "pk",
+            "title",
+            "category_id",
+            "starting_bid",
+            "starting_bid_currency",
+            "listed_by_id",
+            "created",
+            Value(True),
+            "closed_at",
+            "watcher_count",
+        ).iterator(chunk_size=CHUNK_SIZE)
+        return
+    since, until = as_datetime(since), as_datetime(until)
+    rows = archived.values_list("pk", "bids").iterator(chunk_size=CHUNK_SIZE)
+    for listing_id, bids in rows:
+        for bidder_id, amount, *rest in sorted(bids, key=lambda bid: bid[3:4]):
+            # Bids archived before their time and id were kept have neither
+            created, bid_id, currency = rest or (None, None, None)
+            created = created and parse_datetime(created)
+            if since is not None and (created is None or created < since):
+                continue
+            if until is not None and (created is None or created >= until):
+                continue
+            yield bid_id, listing_id, bidder_id, Decimal(amount), currency, created
+
+
+def export_rows(dataset, **filters):
+    """Matching rows of every shard in id order, then those of the archive,
+    with usernames filled in.
+
+    iterator() streams from a server-side cursor on Postgres, so memory
+    stays flat however many rows match.
+    """
+    columns = DATASETS[dataset][1]
+    users = [i for i, (name, _) in enumerate(columns) if name in USER_COLUMNS]
+    queryset = export_queryset(dataset, **filters)
+    runs = [
+        queryset.using(alias).iterator(chunk_size=CHUNK_SIZE)
+        for alias in sharding.aliases()
+    ]
+    rows = chain(
+        heapq.merge(*runs, key=itemgetter(0)), archived_rows(dataset, **filters)
+    )
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        usernames = dict(
+            User.objects.filter(
+                pk__in={row[i] for row in chunk for i in users}
+            ).values_list("pk", "username")
+        )
+        for row in chunk:
+            row = list(row)
+            for i in users:
+                row[i] = usernames.get(row[i])
+            yield row
+
+
+def stream_export(dataset, fmt, **filters):
+    header = [name for name, _ in DATASETS[dataset][1]]
+    rows = export_rows(dataset, **filters)
+    if fmt == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+def parse_filters(params):
+    """Turn query-string style parameters into export_queryset() filters.
+
+    Raises ValueError on malformed dates or flags.
+    """
+    filters = {}
+    for key in ("since", "until"):
+        if params.get(key):
+            value = parse_datetime(params[key]) or parse_date(params[key])
+            if value is None:
+                raise ValueError(f"Invalid {key} date: {params[key]}")
+            filters[key] = value
+    if params.get("category"):
+        filters["category"] = params["category"]
+    if params.get("closed"):
+        if params["closed"] not in ("true", "false"):
+            raise ValueError("closed must be true or false")
+        filters["closed"] = params["closed"] == "true"
+    return filters
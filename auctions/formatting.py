@@ -0,0 +1,89 @@
+import decimal
+import functools
+import re
+from babel.core import Locale
+from babel.numbers import (
+    get_currency_precision,
+    get_currency_symbol,
+    get_decimal_symbol,
+    get_group_symbol,
+)
+from django.conf import settings
+from django.utils import translation
+from djmoney.settings import MONEY_FORMAT
+
+
+def _literal(text, currency, locale):
+    # The same substitutions NumberPattern.apply makes on the whole string
+    text = text.replace("¤¤", currency.upper())
+    text = text.replace("¤", get_currency_symbol(currency, locale))
+    return re.sub(r"'([^']*)'", lambda m: m.group(1) or "'", text)
+
+
+@functools.lru_cache(maxsize=512)
+def compile_format(currency, locale):
+    """Return a function rendering amounts of ``currency`` the way Babel's
+    standard currency pattern for ``locale`` does, or None when the pattern
+    needs something only Babel handles (names, scientific or significant
+    digits, scaling)."""
+    parsed = Locale.parse(locale)
+    pattern = parsed.currency_formats["standard"]
+    if (
+        pattern.exp_prec
+        or pattern.scale
+        or "@" in pattern.pattern
+        or "¤¤¤" in "".join(pattern.prefix + pattern.suffix)
+    ):
+        return None
+    group, point = get_group_symbol(parsed), get_decimal_symbol(parsed)
+    if "'" in group + point:
+        return None
+    digits = get_currency_precision(currency)
+    quantum = decimal.Decimal(10) ** -digits
+    min_int = pattern.int_prec[0]
+    first, rest = pattern.grouping
+    thousands = first == rest == 3 and min_int <= 1
+    prefixes = [_literal(text, currency, parsed) for text in pattern.prefix]
+    suffixes = [_literal(text, currency, parsed) for text in pattern.suffix]
+
+    def render(amount):
+        if not amount.is_finite():
+            return None
+        negative = int(amount.is_signed())
+        rounded = abs(amount).normalize().quantize(quantum)
+        integer, _, fraction = f"{rounded:f}".partition(".")
+        integer = integer.zfill(min_int)
+        if thousands:
+            number = f"{int(integer):,}".replace(",", group)
+        else:
+            grouped, size = "", first
+            while len(integer) > size:
+                grouped = group + integer[-size:] + grouped
+                integer = integer[:-size]
+                size = rest
+            number = integer + grouped
+        if digits:
+            number += point + fraction.ljust(digits, "0")
+        return prefixes[negative] + number + suffixes[negative]
+
+    return render
+
+
+@functools.lru_cache(maxsize=64)
+def _to_locale(language):
+    return translation.to_locale(language)
+
+
+def current_locale():
+    # djmoney.money.get_current_locale, minus re-parsing the language code
+    return _to_locale(translation.get_language() or settings.LANGUAGE_CODE)
+
+
+def format_money(money):
+    """``str(money)`` for djmoney ``Money``, through a per-(currency, locale)
+    compiled pattern when the default formatting is in use."""
+    if MONEY_FORMAT or money.format_options:
+        return str(money)
+    render = compile_format(money.currency.code, current_locale())
+    text = render(money.amount) if render else None
+    return str(money) if text is None else text
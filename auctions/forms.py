@@ -1,37 +1,105 @@
+import hashlib
 from django import forms
+from django.conf import settings
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
+from crispy_forms.utils import render_crispy_form
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils import translation
+from django.utils.safestring import mark_safe
 from djmoney.money import Money
-from auctions.models import Listing
+from auctions.models import Category, Listing, SavedSearch
 from decimal import InvalidOperation
 from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator
 
 
-class CreateListingForm(forms.ModelForm):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper(self)
-        self.helper.add_input(Submit("submit", "Submit"))
-
+class BaseListingForm(forms.ModelForm):
     class Meta:
         model = Listing
-        fields = ["title", "description", "starting_bid", "image_url", "category"]
+        fields = [
+            "title",
+            "description",
+            "starting_bid",
+            "image_url",
+            "category",
+            "ends_at",
+        ]
+        widgets = {"ends_at": forms.DateTimeInput(attrs={"type": "datetime-local"})}
 
     def clean_starting_bid(self):
         # https://docs.djangoproject.com/en/3.2/ref/forms/validation/
         # #cleaning-a-specific-field-attribute
         starting_bid = self.data.get("starting_bid")
         currency = self.data.get("currency")
-        money = None
-        if starting_bid and currency:
-            try:
-                # NOTE: this creates two fields
-                money = Money(starting_bid, currency)
-            except InvalidOperation as e:
-                raise ValidationError("Invalid starting bid") from e
+        if starting_bid in (None, ""):
+            return None
+        if not currency:
+            raise ValidationError("A starting bid needs a currency")
+        if currency not in settings.CURRENCIES:
+            raise ValidationError(f"Unsupported currency: {currency}")
+        try:
+            # NOTE: this creates two fields
+            money = Money(starting_bid, currency)
+        except InvalidOperation as e:
+            raise ValidationError("Invalid starting bid") from e
+        # Rejects NaN, infinities and amounts the column cannot hold
+        field = Listing._meta.get_field("starting_bid")
+        DecimalValidator(field.max_digits, field.decimal_places)(money.amount)
         return money
 
 
+class CreateListingForm(BaseListingForm):
+    # Shared by every instance; the layout never depends on the bound data
+    helper = FormHelper()
+    helper.add_input(Submit("submit", "Submit"))
+
+    CSRF_PLACEHOLDER = "csrf-token-placeholder"
+
+    @classmethod
+    def cache_key(cls):
+        # Everything the unbound form's markup varies with, bar the CSRF token
+        names = "\n".join(category.name for category in Category.objects.cached())
+        variant = hashlib.md5(names.encode()).hexdigest()
+        return f"create-listing-form:{translation.get_language()}:{variant}"
+
+    @classmethod
+    def render_unbound(cls, request):
+        """The blank form's HTML, rendered by crispy once per variant."""
+        key = cls.cache_key()
+        html = cache.get(key)
+        if html is None:
+            html = render_crispy_form(
+                cls(), context={"csrf_token": cls.CSRF_PLACEHOLDER}
+            )
+            cache.set(key, html, None)
+        return mark_safe(html.replace(cls.CSRF_PLACEHOLDER, get_token(request)))
+
+
+class ImportListingForm(BaseListingForm):
+    # Category and seller are resolved per batch by auctions.imports instead
+    # of costing a query per row.
+    class Meta(BaseListingForm.Meta):
+        fields = ["title", "description", "starting_bid", "image_url", "ends_at"]
+
+
+class ListingImportUploadForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or NDJSON")
+
+
+class SavedSearchForm(forms.ModelForm):
+    class Meta:
+        model = SavedSearch
+        fields = ["keywords", "category", "min_price", "max_price"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not any(cleaned_data.get(field) for field in self.Meta.fields):
+            raise ValidationError("Enter at least one thing to search for.")
+        return cleaned_data
+
+
 class ListingForm(forms.Form):
     amount = forms.DecimalField(
         decimal_places=2,
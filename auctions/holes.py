@@ -0,0 +1,162 @@
+"""Pages shared by every visitor, with the per-user parts punched out.
+
+Templates wrap per-user markup in ``{% hole "name" %}``, optionally naming
+the listing (or archived listing) it describes. Normally the tag renders
+the fragment in place. SharedPageMixin instead renders a page as an
+anonymous visitor with each hole left as a placeholder, caches that
+skeleton for every user, and fills the placeholders per request. A
+signed-in visitor therefore reuses the same cached HTML as everyone else
+and only pays for the fragments.
+"""
+import hashlib
+import re
+import time
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from auctions import sharding
+from auctions.models import LISTING_PAGE_KEY, ArchivedListing, Listing
+
+PAGE_KEY = "page:%s:%s:%s"
+PLACEHOLDER = re.compile(r"<!--hole:([\w-]+)(?::(\d+))?-->")
+
+FRAGMENTS = {}
+
+
+def fragment(name, template_name, model=None):
+    """Register a function returning ``template_name``'s context for a
+    request, and for an instance of ``model`` when given."""
+
+    def register(function):
+        FRAGMENTS[name] = (function, template_name, model)
+        return function
+
+    return register
+
+
+def render(request, name, obj=None):
+    function, template_name, model = FRAGMENTS[name]
+    args = (request,) if model is None else (request, obj)
+    return render_to_string(template_name, function(*args), request)
+
+
+def placeholder(name, obj=None):
+    if obj is None:
+        return mark_safe(f"<!--hole:{name}-->")
+    return mark_safe(f"<!--hole:{name}:{obj.pk}-->")
+
+
+def fill(request, html):
+    """Replace the placeholders in ``html`` with ``request``'s fragments."""
+    objects = {}
+
+    def replace(match):
+        name, pk = match.groups()
+        if pk is None:
+            return render(request, name)
+        model = FRAGMENTS[name][2]
+        key = (model, int(pk))
+        if key not in objects:
+            with sharding.for_listing(key[1]):
+                objects[key] = model._default_manager.filter(pk=key[1]).first()
+        if objects[key] is None:
+            return ""
+        return render(request, name, objects[key])
+
+    return PLACEHOLDER.sub(replace, html)
+
+
+class SharedPageMixin:
+    """Serve GET requests from a skeleton shared by every visitor for up to
+    AUCTIONS_PAGE_CACHE_SECONDS."""
+
+    share_page = True
+
+    def page_version(self):
+        """Part of the cache key that changes when the page content does."""
+        return ""
+
+    def get(self, request, *args, **kwargs):
+        timeout = settings.AUCTIONS_PAGE_CACHE_SECONDS
+        if not timeout or not self.share_page:
+            return super().get(request, *args, **kwargs)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = PAGE_KEY % (translation.get_language(), path, self.page_version())
+        skeleton = cache.get(key)
+        if skeleton is not None:
+            return HttpResponse(fill(request, skeleton))
+        user, request.user = request.user, AnonymousUser()
+        request.skeleton = True
+        try:
+            response = super().get(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+        finally:
+            request.user = user
+            request.skeleton = False
+        skeleton = response.content.decode(response.charset)
+        if response.status_code == 200:
+            cache.set(key, skeleton, timeout)
+        response.content = fill(request, skeleton)
+        return response
+
+
+class SharedListingPageMixin(SharedPageMixin):
+    def page_version(self):
+        return cache.get_or_set(
+            LISTING_PAGE_KEY % self.kwargs["pk"], time.time_ns, None
+        )
+
+
+@fragment("nav", "auctions/holes/nav.html")
+def nav(request):
+    return {}
+
+
+@fragment("csrf", "auctions/holes/csrf.html")
+def csrf(request):
+    return {}
+
+
+def is_highest_bidder(request, listing):
+    # Anonymous visitors never cost a read of the auction state
+    user = request.user
+    return user.is_authenticated and listing.highest_bidder_id == user.pk
+
+
+@fragment("winner", "auctions/holes/winner.html", Listing)
+def winner(request, listing):
+    return {"won": listing.closed and is_highest_bidder(request, listing)}
+
+
+@fragment("archived-winner", "auctions/holes/winner.html", ArchivedListing)
+def archived_winner(request, archived):
+    user = request.user
+    return {"won": user.is_authenticated and archived.winner_id == user.pk}
+
+
+@fragment("watch-button", "auctions/holes/watch_button.html", Listing)
+def watch_button(request, listing):
+    watched = request.user.is_authenticated and listing.is_watched_by(request.user)
+    return {"watched": watched}
+
+
+@fragment("bid-status", "auctions/holes/bid_status.html", Listing)
+def bid_status(request, listing):
+    return {"highest": is_highest_bidder(request, listing)}
+
+
+@fragment("proxy-bid", "auctions/holes/proxy_bid.html", Listing)
+def proxy_bid(request, listing):
+    if not request.user.is_authenticated:
+        return {}
+    return {"proxy_bid": listing.proxy_bids.filter(bidder=request.user).first()}
+
+
+@fragment("seller-actions", "auctions/holes/seller_actions.html", Listing)
+def seller_actions(request, listing):
+    return {"listing": listing, "is_seller": listing.listed_by_id == request.user.pk}
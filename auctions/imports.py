@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+from django.db import transaction
+from django.utils import timezone
+from auctions import sharding
+from auctions.forms import ImportListingForm
+from auctions.models import (
+    Category,
+    Job,
+    Listing,
+    ListingCard,
+    ListingImport,
+    RankingEvent,
+    User,
+    update_rankings_soon,
+)
+
+BATCH_SIZE = 1000
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+def read_rows(fileobj, fmt):
+    """Yield (line number, row) from a CSV (with header) or NDJSON stream.
+
+    Numbers are physical lines of the file, blank ones included, so errors
+    point at the line to fix. CSV rows come out as dicts; NDJSON lines come
+    out as their text and are parsed by ``parse_row`` during validation, so
+    a bad line is reported as that row's error instead of ending the import.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(fileobj)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(fileobj, start=1):
+            if line.strip():
+                yield number, line
+
+
+def parse_row(row):
+    """Return the row as a dict, or raise ValueError saying why it is not one."""
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}") from None
+    if not isinstance(row, dict):
+        raise ValueError("Expected a JSON object")
+    return row
+
+
+def open_upload(upload):
+    fmt = "ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv"
+    return io.TextIOWrapper(upload.file, encoding="utf-8", newline=""), fmt
+
+
+def queue_upload(upload, user):
+    """Store an uploaded file and queue its import; returns the ListingImport.
+
+    Raises ValueError when the file is not UTF-8 text.
+    """
+    fileobj, fmt = open_upload(upload)
+    data = fileobj.read()
+    with transaction.atomic():
+        listing_import = ListingImport.objects.create(
+            uploaded_by=user, fmt=fmt, data=data
+        )
+        # Batches commit as they go, so a retry would import them twice
+        listing_import.job = Job.objects.enqueue(
+            "auctions.tasks.import_listings",
+            listing_import.pk,
+            queue="imports",
+            max_attempts=1,
+        )
+        listing_import.save(update_fields=["job"])
+    return listing_import
+
+
+def run_import(import_id):
+    """Import a queued upload and record its result on it."""
+    listing_import = ListingImport.objects.select_related("uploaded_by").get(
+        pk=import_id
+    )
+    rows = read_rows(io.StringIO(listing_import.data, newline=""), listing_import.fmt)
+    result = import_listings(rows, listing_import.uploaded_by)
+    listing_import.created_count = result.created
+    listing_import.errors = result.errors
+    listing_import.finished_at = timezone.now()
+    listing_import.data = ""
+    listing_import.save()
+    return result
+
+
+def validate_batch(batch, default_user, categories):
+    """Validate (line, row) pairs and return unsaved listings and errors."""
+    listings, errors, rows = [], [], []
+    for line, row in batch:
+        try:
+            rows.append((line, parse_row(row)))
+        except ValueError as e:
+            errors.append((line, str(e)))
+    usernames = {row["listed_by"] for _, row in rows if row.get("listed_by")}
+    sellers = dict(
+        User.objects.filter(username__in=usernames).values_list("username", "pk")
+    )
+    for line, row in rows:
+        form = ImportListingForm(data=row)
+        if not form.is_valid():
+            errors.append((line, form.errors.as_text()))
+            continue
+        category = row.get("category") or None
+        if category is not None and category not in categories:
+            errors.append((line, f"Unknown category: {category}"))
+            continue
+        seller = row.get("listed_by")
+        if seller and seller not in sellers:
+            errors.append((line, f"Unknown seller: {seller}"))
+            continue
+        listing = form.save(commit=False)
+        listing.category_id = category
+        listing.listed_by_id = sellers[seller] if seller else default_user.pk
+        listings.append(listing)
+    return listings, errors
+
+
+def import_listings(rows, default_user, batch_size=BATCH_SIZE):
+    """Validate and insert (line number, row) pairs, as read_rows yields them,
+    with the rules of CreateListingForm.
+
+    Each batch commits on its own, so a bad row only costs its own insert and
+    earlier batches stay imported if a later one fails.
+    """
+    result = ImportResult()
+    categories = set(Category.objects.values_list("name", flat=True))
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        listings, errors = validate_batch(batch, default_user, categories)
+        for line, message in errors:
+            result.add_error(line, message)
+        if not listings:
+            continue
+        with transaction.atomic():
+            # Imports land on default; ids still come from the shard directory
+            for listing, pk in zip(listings, sharding.reserve_ids(len(listings))):
+                listing.pk = pk
+            Listing.objects.bulk_create(listings)
+            # bulk_create skips Listing.save, so keep the counters in step here
+            per_category = Counter(listing.category_id for listing in listings)
+            for name, n in per_category.items():
+                Category.objects.bump(name, active=n)
+            RankingEvent.objects.bulk_create(
+                RankingEvent(listing_id=listing.pk) for listing in listings
+            )
+            sellers = dict(
+                User.objects.filter(
+                    pk__in={listing.listed_by_id for listing in listings}
+                ).values_list("pk", "username")
+            )
+            ListingCard.objects.bulk_create(
+                ListingCard.for_listing(listing, seller=sellers[listing.listed_by_id])
+                for listing in listings
+            )
+            transaction.on_commit(update_rankings_soon)
+        result.created += len(listings)
+    return result
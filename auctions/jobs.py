@@ -0,0 +1,167 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from auctions.models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+
+def task(func):
+    """Register ``func`` so workers may run it by its dotted path."""
+    REGISTRY[f"{func.__module__}.{func.__name__}"] = func
+    return func
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    # Jitter keeps retries of a failed burst from landing together
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def open_queues(queues=None):
+    """Queues the worker may take from, honouring AUCTIONS_JOB_QUEUE_LIMITS.
+
+    The running-job count is read without locking, so limits are best effort
+    when several workers claim at the same instant.
+    """
+    limits = settings.AUCTIONS_JOB_QUEUE_LIMITS
+    ready = Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+    if queues:
+        ready = ready.filter(queue__in=queues)
+    candidates = set(ready.values_list("queue", flat=True).distinct())
+    limited = [queue for queue in candidates if queue in limits]
+    running = dict(
+        Job.objects.filter(status=Job.RUNNING, queue__in=limited)
+        .values_list("queue")
+        .annotate(n=Count("pk"))
+    )
+    return [
+        queue
+        for queue in candidates
+        if queue not in limits or running.get(queue, 0) < limits[queue]
+    ]
+
+
+def claim(queues=None, worker=None):
+    """Atomically take the most urgent ready job, or return None."""
+    allowed = open_queues(queues)
+    if not allowed:
+        return None
+    ready = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now(), queue__in=allowed
+    ).order_by("priority", "run_at", "pk")
+    claimed = {
+        "status": Job.RUNNING,
+        "locked_by": worker or worker_name(),
+        "locked_at": timezone.now(),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = ready.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(**claimed)
+    else:
+        # SQLite serializes writers, so a conditional UPDATE is the claim.
+        for job in ready[:10]:
+            if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(**claimed):
+                break
+        else:
+            return None
+    job.refresh_from_db()
+    return job
+
+
+def touch(job):
+    """Refresh the lock of a job this worker is still running."""
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by
+    ).update(locked_at=timezone.now())
+
+
+@contextmanager
+def heartbeat(job, interval=None):
+    """Touch ``job`` every ``interval`` seconds from a background thread
+    while the block runs, so long jobs are never taken for stale."""
+    interval = interval or settings.AUCTIONS_JOB_HEARTBEAT_SECONDS
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(interval):
+                touch(job)
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-{job.pk}-heartbeat")
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run(job):
+    job.attempts += 1
+    try:
+        func = REGISTRY[job.task]
+        with heartbeat(job):
+            func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s failed for good: %s", job.pk, job.task)
+        else:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+            logger.warning("Job %s failed, retrying at %s", job.pk, job.run_at)
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    job.locked_by = ""
+    job.locked_at = None
+    job.save()
+    return job
+
+
+def requeue_stale(timeout):
+    """Put back jobs whose worker died mid-run: running jobs keep their lock
+    fresh with ``heartbeat``, so ``timeout`` must be well above
+    AUCTIONS_JOB_HEARTBEAT_SECONDS."""
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=timezone.now() - timeout
+    ).update(status=Job.QUEUED, locked_by="", locked_at=None)
+
+
+def work(queues=None, worker=None, limit=None):
+    """Run ready jobs until none are left (or ``limit`` ran); return the count."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim(queues, worker)
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
@@ -0,0 +1,58 @@
+from django.conf import settings
+from auctions.models import LEDGER_FIELDS, AuctionState, LedgerEvent, ListingSnapshot
+
+
+def stream_events(batch_size):
+    """Every ledger event as a row, grouped by listing and in order within
+    each, read through a server-side cursor."""
+    return (
+        LedgerEvent.objects.order_by("listing_id", "id")
+        .values_list("listing_id", *LEDGER_FIELDS)
+        .iterator(chunk_size=batch_size)
+    )
+
+
+def replay(batch_size=10_000, snapshot_every=None):
+    """Rebuild every listing's snapshots by folding the whole ledger.
+
+    Events are read in one ordered pass and only the listing being folded is
+    held in memory; snapshots are written in batches as they are produced.
+    Snapshots only cache a prefix of the ledger, so bidding can carry on
+    while this runs: any events it misses are replayed as the tail. A
+    listing's old snapshots are removed only once its new ones are written,
+    so reads never fall back to folding its whole ledger.
+    Returns the number of events and listings replayed.
+    """
+    every = snapshot_every or settings.AUCTIONS_LEDGER_SNAPSHOT_EVERY
+    pending = []
+    events = listings = 0
+    state = None
+
+    def flush():
+        ListingSnapshot.objects.bulk_create(pending, ignore_conflicts=True)
+        # Event ids are unique across listings, so this keeps exactly the
+        # snapshots just written
+        ListingSnapshot.objects.filter(
+            listing_id__in={snapshot.listing_id for snapshot in pending}
+        ).exclude(event_id__in=[snapshot.event_id for snapshot in pending]).delete()
+        pending.clear()
+
+    for listing_id, *row in stream_events(batch_size):
+        if state is None or state.listing_id != listing_id:
+            if state is not None and state.tail:
+                pending.append(ListingSnapshot.from_state(state))
+            # Batches end between listings so each one's snapshots are
+            # replaced together
+            if len(pending) >= batch_size:
+                flush()
+            state = AuctionState(listing_id)
+            listings += 1
+        state.apply(*row)
+        events += 1
+        if state.tail >= every:
+            pending.append(ListingSnapshot.from_state(state))
+            state.tail = 0
+    if state is not None and state.tail:
+        pending.append(ListingSnapshot.from_state(state))
+    flush()
+    return events, listings
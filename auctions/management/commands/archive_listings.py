@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from auctions.archive import archive_closed_listings
+
+
+class Command(BaseCommand):
+    help = "Move listings closed for longer than the archive age into cold storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.AUCTIONS_ARCHIVE_AFTER_DAYS,
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None)
+
+    def handle(self, *args, **options):
+        moved = archive_closed_listings(
+            older_than=timedelta(days=options["older_than_days"]),
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} listings"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from auctions import recommendations
+
+
+class Command(BaseCommand):
+    help = "Rebuild 'people who watched this also watched' neighbours."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=recommendations.TOP_K)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=recommendations.CHUNK_SIZE,
+            help="Listings per similarity block; bounds peak memory",
+        )
+
+    def handle(self, *args, **options):
+        done = recommendations.rebuild_similar_listings(
+            top_k=options["top_k"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt neighbours for {done} listings"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from auctions import cards, sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every listing card with its listing and bid ledger, and "
+        "report (or, with --fix, rewrite) the cards that differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=cards.BATCH_SIZE)
+        parser.add_argument("--fix", action="store_true")
+
+    def handle(self, *args, **options):
+        stale = 0
+        for alias in sharding.aliases():
+            with sharding.using(alias):
+                for card, fields in cards.check(batch_size=options["batch_size"]):
+                    self.stdout.write(f"Listing {card.pk}: {', '.join(fields)}")
+                    if options["fix"]:
+                        card.save(using=alias)
+                    stale += 1
+        if not options["fix"]:
+            if stale:
+                raise CommandError(f"{stale} listing cards are out of step")
+            self.stdout.write(self.style.SUCCESS("Listing cards are in step"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {stale} listing cards"))
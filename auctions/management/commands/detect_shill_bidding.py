@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from auctions import analytics
+
+
+class Command(BaseCommand):
+    help = "Score bidder/seller pairs for shill bidding and flag the worst."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=analytics.THRESHOLD)
+        parser.add_argument("--min-bids", type=int, default=analytics.MIN_BIDS)
+        parser.add_argument(
+            "--min-listings", type=int, default=analytics.MIN_LISTINGS
+        )
+
+    def handle(self, *args, **options):
+        flagged = analytics.flag_accounts(
+            threshold=options["threshold"],
+            min_bids=options["min_bids"],
+            min_listings=options["min_listings"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Flagged {flagged} bidder/seller pairs"))
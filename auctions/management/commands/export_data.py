@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from auctions import exports
+
+
+class Command(BaseCommand):
+    help = "Stream listings or bids as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(exports.DATASETS))
+        parser.add_argument(
+            "--format", dest="fmt", choices=sorted(exports.FORMATS), default="csv"
+        )
+        parser.add_argument("--output", help="File to write to (default: stdout)")
+        parser.add_argument("--since", help="Only rows created on/after")
+        parser.add_argument("--until", help="Only rows created before")
+        parser.add_argument("--category")
+        parser.add_argument("--closed", choices=["true", "false"])
+
+    def handle(self, *args, **options):
+        try:
+            filters = exports.parse_filters(options)
+        except ValueError as e:
+            raise CommandError(e) from e
+        chunks = exports.stream_export(options["dataset"], options["fmt"], **filters)
+        if options["output"]:
+            with open(options["output"], "w", newline="") as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
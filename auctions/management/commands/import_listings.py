@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from auctions import imports
+from auctions.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import listings from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Seller for rows without a listed_by column",
+        )
+        parser.add_argument("--format", dest="fmt", choices=["csv", "ndjson"])
+        parser.add_argument("--batch-size", type=int, default=imports.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist as e:
+            raise CommandError(f"Unknown user: {options['user']}") from e
+        fmt = options["fmt"] or (
+            "ndjson" if options["path"].endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        with open(options["path"], newline="") as f:
+            result = imports.import_listings(
+                imports.read_rows(f, fmt), user, batch_size=options["batch_size"]
+            )
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} listings"))
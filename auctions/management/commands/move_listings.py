@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from auctions import sharding
+from auctions.models import ListingShard
+
+
+class Command(BaseCommand):
+    help = "Move listings, with their bids and other rows, to another shard."
+
+    def add_arguments(self, parser):
+        parser.add_argument("listings", nargs="*", type=int)
+        parser.add_argument("--to", required=True, help="Target shard alias")
+        parser.add_argument(
+            "--from", dest="source", help="Move listings off this shard"
+        )
+        parser.add_argument("--limit", type=int, help="Move at most this many")
+
+    def handle(self, *args, **options):
+        target = options["to"]
+        if target not in sharding.aliases():
+            raise CommandError(f"Unknown shard: {target}")
+        ids = options["listings"]
+        if options["source"]:
+            ids = ListingShard.objects.filter(shard=options["source"]).order_by("pk")
+            ids = ids.values_list("pk", flat=True)
+        elif not ids:
+            raise CommandError("Give listing ids or --from")
+        if options["limit"] is not None:
+            ids = ids[: options["limit"]]
+        moved = sum(sharding.move_listing(pk, target) for pk in list(ids))
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} listings to {target}"))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from auctions.middleware import PROFILE_HEADER, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed token that turns on the sampling profiler per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Who the token was issued to")
+
+    def handle(self, *args, **options):
+        token = make_profile_token(options["username"])
+        minutes = settings.AUCTIONS_PROFILE_TOKEN_MAX_AGE // 60
+        self.stdout.write(f"{PROFILE_HEADER}: {token}")
+        self.stdout.write(f"Valid for {minutes} minutes.")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from auctions import cards, sharding
+
+
+class Command(BaseCommand):
+    help = "Rewrite every listing card from its listing and bid ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=cards.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written = 0
+        for alias in sharding.aliases():
+            with sharding.using(alias):
+                written += cards.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} listing cards"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from auctions.models import Category
+
+
+class Command(BaseCommand):
+    help = "Recount active and closed listings per category and fix any drift."
+
+    def handle(self, *args, **options):
+        fixed = Category.objects.reconcile()
+        for category in fixed:
+            self.stdout.write(
+                f"{category.name}: {category.active_count} active, "
+                f"{category.closed_count} closed"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(fixed)} categories"))
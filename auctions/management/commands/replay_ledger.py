@@ -0,0 +1,49 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from auctions import ledger, sharding
+from auctions.models import ArchivedListing, LedgerEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild listing snapshots from the bid ledger, or print one "
+        "listing's auction state as of a given time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--snapshot-every", type=int)
+        parser.add_argument("--listing", type=int, help="Print this listing's state")
+        parser.add_argument("--at", help="ISO timestamp to replay --listing up to")
+
+    def handle(self, *args, **options):
+        if options["listing"] is not None:
+            at = options["at"] and parse_datetime(options["at"])
+            if options["at"] and at is None:
+                raise CommandError(f"Invalid --at timestamp: {options['at']}")
+            if at and timezone.is_naive(at):
+                at = timezone.make_aware(at)
+            # Archived listings keep their ledger in the archive
+            archived = ArchivedListing.objects.filter(pk=options["listing"]).first()
+            if archived is not None:
+                state = archived.ledger_state(at)
+            else:
+                with sharding.for_listing(options["listing"]):
+                    state = LedgerEvent.objects.state(options["listing"], at=at)
+            self.stdout.write(json.dumps(state.as_dict(), cls=DjangoJSONEncoder))
+            return
+        events = listings = 0
+        for alias in sharding.aliases():
+            with sharding.using(alias):
+                counts = ledger.replay(
+                    batch_size=options["batch_size"],
+                    snapshot_every=options["snapshot_every"],
+                )
+            events += counts[0]
+            listings += counts[1]
+        self.stdout.write(
+            self.style.SUCCESS(f"Replayed {events} events for {listings} listings")
+        )
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from auctions import jobs
+import auctions.tasks  # noqa: F401 registers the project's tasks
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Only take jobs from this queue (repeatable)",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Run ready jobs, then exit"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=1.0, help="Seconds to sleep when idle"
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=600,
+            help="Requeue running jobs whose lock is this many seconds old",
+        )
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        if options["stale_after"] <= 2 * settings.AUCTIONS_JOB_HEARTBEAT_SECONDS:
+            raise CommandError(
+                "--stale-after must exceed twice AUCTIONS_JOB_HEARTBEAT_SECONDS"
+            )
+        stale_after = timedelta(seconds=options["stale_after"])
+        self.stdout.write(f"Worker {worker} started")
+        while True:
+            jobs.requeue_stale(stale_after)
+            done = jobs.work(options["queues"], worker)
+            if done:
+                self.stdout.write(f"Ran {done} jobs")
+            if options["once"]:
+                break
+            if not done:
+                time.sleep(options["interval"])
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from auctions import sharding
+from auctions.notifications import BATCH_SIZE, dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver outbid and closing notifications from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the outbox and exit"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0, help="Seconds to sleep when idle"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            handled = 0
+            for alias in sharding.aliases():
+                with sharding.using(alias):
+                    handled += dispatch_pending(options["batch_size"])
+            if handled:
+                self.stdout.write(f"Delivered {handled} events")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,86 @@
+import os
+import resource
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+TOP_SITES = 25
+
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class MemoryStats:
+    """Per-process results of sampled allocation tracing.
+
+    ``views`` holds, per URL name, how many requests were traced and their
+    largest and summed peak allocation. ``sites`` accumulates the bytes
+    still held at the end of traced requests by allocating source line,
+    which is what keeps a worker's RSS up after the request is gone.
+    """
+
+    def __init__(self):
+        self.views = defaultdict(
+            lambda: {"samples": 0, "max_peak": 0, "total_peak": 0}
+        )
+        self.sites = Counter()
+        self._tracing = threading.Lock()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def tracing(self, frames=1):
+        """Trace allocations in the block and yield a dict that receives
+        ``peak`` and ``statistics`` when it ends.
+
+        Yields None instead when a trace is already running: tracemalloc is
+        process-wide, so only one request per process is traced at a time.
+        """
+        if tracemalloc.is_tracing() or not self._tracing.acquire(blocking=False):
+            yield None
+            return
+        result = {}
+        try:
+            tracemalloc.start(frames)
+            try:
+                yield result
+                _, result["peak"] = tracemalloc.get_traced_memory()
+                result["statistics"] = tracemalloc.take_snapshot().statistics("lineno")
+            finally:
+                tracemalloc.stop()
+        finally:
+            self._tracing.release()
+
+    def record(self, url_name, peak, statistics):
+        with self._lock:
+            view = self.views[url_name]
+            view["samples"] += 1
+            view["max_peak"] = max(view["max_peak"], peak)
+            view["total_peak"] += peak
+            for stat in statistics[: TOP_SITES * 4]:
+                frame = stat.traceback[0]
+                self.sites[f"{frame.filename}:{frame.lineno}"] += stat.size
+
+    def report(self, limit=TOP_SITES):
+        with self._lock:
+            views = {
+                name: dict(view, mean_peak=view["total_peak"] // view["samples"])
+                for name, view in self.views.items()
+            }
+            sites = self.sites.most_common(limit)
+        return {
+            "pid": os.getpid(),
+            "rss": rss_bytes(),
+            "views": views,
+            "sites": [{"site": site, "bytes": size} for site, size in sites],
+        }
+
+
+stats = MemoryStats()
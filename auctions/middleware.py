@@ -0,0 +1,228 @@
+import logging
+import os
+import random
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from auctions import memory
+from auctions.profiling import (
+    OverheadBudget,
+    QueryLog,
+    StackSampler,
+    profile_templates,
+    write_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PROFILE_PARAM = "profile-templates"
+PROFILE_PARAM = "profile"
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_SALT = "auctions.profile"
+
+
+def make_profile_token(username):
+    """Token that gets requests profiled until AUCTIONS_PROFILE_TOKEN_MAX_AGE."""
+    return signing.dumps({"by": username}, salt=PROFILE_SALT)
+
+
+def valid_profile_token(value):
+    try:
+        signing.loads(
+            value, salt=PROFILE_SALT, max_age=settings.AUCTIONS_PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def server_timing(entries, prefix):
+    metrics = []
+    for i, (label, stats) in enumerate(entries):
+        description = label.replace('"', "'").encode("ascii", "replace").decode()
+        duration = stats["self"] * 1000
+        metrics.append(f'{prefix}{i};desc="{description}";dur={duration:.2f}')
+    return ", ".join(metrics)
+
+
+def when_sent(response, callback):
+    """Run ``callback`` once ``response`` has been produced: at once for a
+    plain response, after the last chunk (or on close) of a streamed one,
+    whose content is only rendered as the server sends it."""
+    if not response.streaming:
+        callback()
+        return response
+    content = response.streaming_content
+
+    def stream():
+        try:
+            yield from content
+        finally:
+            callback()
+
+    response.streaming_content = stream()
+    return response
+
+
+class TemplateProfilingMiddleware:
+    """Profile template rendering for staff requests carrying
+    ``?profile-templates``, when AUCTIONS_TEMPLATE_PROFILING is on.
+
+    The slowest templates and tags by self time go out as a Server-Timing
+    header (visible in the browser's network panel) and to the log.
+    """
+
+    def __init__(self, get_response):
+        if not settings.AUCTIONS_TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if TEMPLATE_PROFILE_PARAM not in request.GET or not (
+            request.user.is_authenticated and request.user.is_staff
+        ):
+            return self.get_response(request)
+        with profile_templates() as profile:
+            response = self.get_response(request)
+        top = profile.top(settings.AUCTIONS_TEMPLATE_PROFILE_TOP)
+        response["Server-Timing"] = server_timing(top, "tpl")
+        logger.info(
+            "Template profile for %s:\n%s",
+            request.path,
+            "\n".join(
+                f"{stats['self'] * 1000:9.2f}ms self {stats['total'] * 1000:9.2f}ms "
+                f"total {stats['calls']:6d}x  {label}"
+                for label, stats in top
+            ),
+        )
+        return response
+
+
+class SamplingProfilerMiddleware:
+    """Run a sampling profiler over single requests.
+
+    A request is profiled when a staff user adds ``?profile``, when it
+    carries a signed token (``manage.py profile_token``) in the
+    X-Profile-Token header or the ``profile`` parameter, or at random, one
+    in AUCTIONS_PROFILE_ONE_IN requests per URL name, while the profiler's
+    own cost stays within AUCTIONS_PROFILE_OVERHEAD_BUDGET of request time.
+    Profiles land in AUCTIONS_PROFILE_DIR as collapsed stacks with a JSON
+    file holding the URL name and a summary of the SQL run.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budget = OverheadBudget(settings.AUCTIONS_PROFILE_OVERHEAD_BUDGET)
+
+    def requested(self, request):
+        value = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+        if value is None:
+            return False
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+        return valid_profile_token(value)
+
+    def sampled(self, url_name):
+        one_in = settings.AUCTIONS_PROFILE_ONE_IN_BY_VIEW.get(
+            url_name, settings.AUCTIONS_PROFILE_ONE_IN
+        )
+        return bool(one_in) and self.budget.allows() and random.random() * one_in < 1
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        url_name = request.resolver_match.url_name
+        if self.requested(request):
+            trigger = "requested"
+        elif self.sampled(url_name):
+            trigger = "sampled"
+        else:
+            return None
+        stack = ExitStack()
+        queries = QueryLog()
+        stack.enter_context(connection.execute_wrapper(queries))
+        sampler = StackSampler(
+            threading.get_ident(), settings.AUCTIONS_PROFILE_INTERVAL
+        ).start()
+        stack.callback(sampler.stop)
+        request._profile = (stack, sampler, queries, trigger, url_name)
+        return None
+
+    def __call__(self, request):
+        started = perf_counter()
+        response = self.get_response(request)
+        profile = getattr(request, "_profile", None)
+        if profile is None:
+            return when_sent(
+                response, lambda: self.budget.record(perf_counter() - started)
+            )
+        stack, sampler, queries, trigger, url_name = profile
+        name = f"{timezone.now():%Y%m%dT%H%M%S%f}-{url_name or 'unnamed'}-{os.getpid()}"
+        # Set now: a streamed page is profiled until its last chunk, long
+        # after its headers went out
+        response["X-Profile"] = name
+
+        def finish():
+            elapsed = perf_counter() - started
+            stack.close()
+            writing = perf_counter()
+            path = write_profile(
+                settings.AUCTIONS_PROFILE_DIR,
+                name,
+                sampler,
+                {
+                    "url_name": url_name,
+                    "path": request.get_full_path(),
+                    "method": request.method,
+                    "status": response.status_code,
+                    "trigger": trigger,
+                    "ms": round(elapsed * 1000, 2),
+                    "interval": sampler.interval,
+                    "samples": sum(sampler.stacks.values()),
+                    "sql": queries.summary(),
+                },
+            )
+            overhead = sampler.cost + perf_counter() - writing
+            if trigger == "sampled":
+                self.budget.record(elapsed, overhead)
+            logger.info("Profiled %s (%s) to %s", request.path, trigger, path)
+
+        return when_sent(response, finish)
+
+
+class MemoryProfilingMiddleware:
+    """Trace allocations with tracemalloc for one in
+    AUCTIONS_MEMORY_SAMPLE_ONE_IN requests, recording the peak per URL name
+    and the lines still holding memory afterwards (see auctions.memory)."""
+
+    def __init__(self, get_response):
+        if not settings.AUCTIONS_MEMORY_SAMPLE_ONE_IN:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() * settings.AUCTIONS_MEMORY_SAMPLE_ONE_IN >= 1:
+            return self.get_response(request)
+        stack = ExitStack()
+        trace = stack.enter_context(memory.stats.tracing())
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+
+        def finish():
+            # Streamed pages are traced until their last chunk
+            stack.close()
+            if trace is not None:
+                match = request.resolver_match
+                memory.stats.record(
+                    match.url_name if match else None,
+                    trace["peak"],
+                    trace["statistics"],
+                )
+
+        return when_sent(response, finish)
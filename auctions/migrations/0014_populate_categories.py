@@ -0,0 +1,51 @@
+# Generated by Django 4.2.5 on 2026-10-19 09:13
+
+from django.db import migrations
+from django.db.models import Count
+
+DEFAULT_CATEGORIES = ["Fashion", "Toys", "Electronics", "Home"]
+
+
+def create_categories(apps, schema_editor):
+    Category = apps.get_model("auctions", "Category")
+    Listing = apps.get_model("auctions", "Listing")
+    names = set(DEFAULT_CATEGORIES)
+    names.update(
+        Listing.objects.exclude(category_name__isnull=True)
+        .exclude(category_name="")
+        .values_list("category_name", flat=True)
+        .distinct()
+    )
+    Category.objects.bulk_create([Category(name=name) for name in sorted(names)])
+
+
+def link_listings(apps, schema_editor):
+    Category = apps.get_model("auctions", "Category")
+    Listing = apps.get_model("auctions", "Listing")
+    for name in Category.objects.values_list("name", flat=True):
+        Listing.objects.filter(category_name=name).update(category_id=name)
+    rows = Listing.objects.values("category_id", "closed").annotate(n=Count("pk"))
+    for row in rows.order_by():
+        if row["category_id"] is None:
+            continue
+        field = "closed_count" if row["closed"] else "active_count"
+        Category.objects.filter(name=row["category_id"]).update(**{field: row["n"]})
+
+
+def unlink_listings(apps, schema_editor):
+    Category = apps.get_model("auctions", "Category")
+    Listing = apps.get_model("auctions", "Listing")
+    for name in Category.objects.values_list("name", flat=True):
+        Listing.objects.filter(category_id=name).update(category_name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0013_category"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_categories, migrations.RunPython.noop),
+        migrations.RunPython(link_listings, unlink_listings),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-19 09:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0014_populate_categories"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="listing",
+            name="category_name",
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.5 on 2026-10-19 00:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import djmoney.models.fields
+
+
+def backfill_closed_at(apps, schema_editor):
+    # The real closing time was never recorded; start the archive clock now.
+    Listing = apps.get_model("auctions", "Listing")
+    Listing.objects.filter(closed=True, closed_at__isnull=True).update(
+        closed_at=django.utils.timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0015_remove_listing_category_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedListing',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('starting_bid_currency', djmoney.models.fields.CurrencyField(choices=[('USD', 'US Dollar')], default='USD', editable=False, max_length=3, null=True)),
+                ('starting_bid', djmoney.models.fields.MoneyField(blank=True, decimal_places=2, default_currency='USD', max_digits=14, null=True)),
+                ('final_price_currency', djmoney.models.fields.CurrencyField(choices=[('USD', 'US Dollar')], default='USD', editable=False, max_length=3, null=True)),
+                ('final_price', djmoney.models.fields.MoneyField(blank=True, decimal_places=2, default_currency='USD', max_digits=14, null=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('created', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('watcher_count', models.PositiveIntegerField(default=0)),
+                ('bids', models.JSONField(default=list)),
+                ('comments', models.JSONField(default=list)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_listings', to='auctions.category', to_field='name')),
+                ('listed_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_listings', to=settings.AUTH_USER_MODEL)),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_wins', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_closed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.5 on 2026-10-19 00:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0019_proxybid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['listing', 'created'], name='bid_listing_created_idx'),
+        ),
+    ]
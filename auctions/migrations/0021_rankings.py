@@ -0,0 +1,37 @@
+# Generated by Django 4.2.5 on 2026-10-19 00:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0020_bid_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingRank',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='auctions.listing')),
+                ('trending_key', models.FloatField(blank=True, db_index=True, null=True)),
+                ('ends_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RankingEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('listing_id', models.IntegerField()),
+                ('weight', models.FloatField(default=0.0)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
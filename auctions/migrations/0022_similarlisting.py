@@ -0,0 +1,31 @@
+# Generated by Django 4.2.5 on 2026-10-19 00:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0021_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarListing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='auctions.listing')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auctions.listing')),
+            ],
+            options={
+                'ordering': ['listing', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarlisting',
+            constraint=models.UniqueConstraint(fields=('listing', 'rank'), name='similar_listing_rank'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.5 on 2026-10-19 00:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0022_similarlisting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlaggedAccount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(db_index=True)),
+                ('bid_count', models.PositiveIntegerField()),
+                ('affinity', models.FloatField(help_text="Share of the bidder's bids on this seller")),
+                ('losing_rate', models.FloatField(help_text="Share of this seller's listings the bidder bid on but lost")),
+                ('near_increment_rate', models.FloatField(help_text='Share of bids overtaken by a bid just above them')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('bidder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+    ]
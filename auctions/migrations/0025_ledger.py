@@ -0,0 +1,89 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import djmoney.models.fields
+
+BATCH_SIZE = 10_000
+
+
+def record_existing_bids(apps, schema_editor):
+    Bid = apps.get_model("auctions", "Bid")
+    Listing = apps.get_model("auctions", "Listing")
+    LedgerEvent = apps.get_model("auctions", "LedgerEvent")
+
+    def write(events):
+        batch = []
+        for event in events:
+            batch.append(event)
+            if len(batch) >= BATCH_SIZE:
+                LedgerEvent.objects.bulk_create(batch)
+                batch = []
+        LedgerEvent.objects.bulk_create(batch)
+
+    bids = Bid.objects.order_by("created", "pk").iterator(chunk_size=BATCH_SIZE)
+    write(
+        LedgerEvent(
+            listing_id=bid.listing_id,
+            kind="bid-placed",
+            bid_id=bid.pk,
+            bidder_id=bid.bidder_id,
+            amount=bid.amount,
+            created=bid.created,
+        )
+        for bid in bids
+    )
+    closed = Listing.objects.filter(closed=True).values_list("pk", "closed_at")
+    write(
+        LedgerEvent(
+            listing_id=pk,
+            kind="listing-closed",
+            created=closed_at or django.utils.timezone.now(),
+        )
+        for pk, closed_at in closed.order_by("pk").iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0024_savedsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.BigIntegerField()),
+                ('at', models.DateTimeField()),
+                ('bids', models.JSONField(default=list)),
+                ('closed', models.BooleanField(default=False)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='auctions.listing')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('bid-placed', 'Bid placed'), ('bid-retracted', 'Bid retracted'), ('listing-closed', 'Listing closed')], max_length=20)),
+                ('bid_id', models.IntegerField(blank=True, null=True)),
+                ('amount_currency', djmoney.models.fields.CurrencyField(choices=[('USD', 'US Dollar')], default='USD', editable=False, max_length=3, null=True)),
+                ('amount', djmoney.models.fields.MoneyField(blank=True, decimal_places=2, default_currency='USD', max_digits=14, null=True)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('bidder', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_events', to='auctions.listing')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='listingsnapshot',
+            constraint=models.UniqueConstraint(fields=('listing', 'event_id'), name='one_snapshot_per_event'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerevent',
+            index=models.Index(fields=['listing', 'id'], name='ledger_listing_idx'),
+        ),
+        migrations.RunPython(record_existing_bids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.core.management.color import no_style
+
+BATCH_SIZE = 10_000
+
+
+def register_existing_listings(apps, schema_editor):
+    """Give every existing listing a directory entry on default, so ids the
+    directory hands out from now on start past them."""
+    Listing = apps.get_model("auctions", "Listing")
+    ListingShard = apps.get_model("auctions", "ListingShard")
+    connection = schema_editor.connection
+    ids = Listing.objects.order_by("pk").values_list("pk", flat=True)
+    batch = []
+    for pk in ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ListingShard(pk=pk, shard="default"))
+        if len(batch) >= BATCH_SIZE:
+            ListingShard.objects.bulk_create(batch)
+            batch = []
+    ListingShard.objects.bulk_create(batch)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [ListingShard]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0025_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.CharField(db_index=True, max_length=50)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='bid',
+            name='bidder',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='bids', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='commenter',
+            field=models.ForeignKey(db_constraint=False, default=None, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='category',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='listings', to='auctions.category', to_field='name'),
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='listed_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='listings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='listing',
+            name='watchers',
+            field=models.ManyToManyField(blank=True, db_constraint=False, related_name='watching', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='actor',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='previous_bidder',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='proxybid',
+            name='bidder',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='savedsearchmatch',
+            name='search',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='listing_matches', to='auctions.savedsearch'),
+        ),
+        migrations.AlterField(
+            model_name='similarlisting',
+            name='similar',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auctions.listing'),
+        ),
+        migrations.RunPython(register_existing_listings, migrations.RunPython.noop),
+    ]
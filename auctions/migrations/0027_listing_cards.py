@@ -0,0 +1,87 @@
+# Generated by Django 4.2.5 on 2026-10-19 01:41
+
+from itertools import islice
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+import django.db.models.deletion
+import djmoney.models.fields
+from djmoney.money import Money
+
+BATCH_SIZE = 2000
+
+
+def fill_listing_cards(apps, schema_editor):
+    """Write a card for every listing on this database. Standing bids are
+    exactly the Bid rows, so they give the price and bid count."""
+    Bid = apps.get_model("auctions", "Bid")
+    Listing = apps.get_model("auctions", "Listing")
+    ListingCard = apps.get_model("auctions", "ListingCard")
+    User = apps.get_model("auctions", "User")
+    alias = schema_editor.connection.alias
+    listings = Listing.objects.using(alias).order_by("pk").iterator(BATCH_SIZE)
+    while batch := list(islice(listings, BATCH_SIZE)):
+        # Users stay on default when listings are sharded
+        sellers = dict(
+            User.objects.using(DEFAULT_DB_ALIAS)
+            .filter(pk__in={listing.listed_by_id for listing in batch})
+            .values_list("pk", "username")
+        )
+        bids = (
+            Bid.objects.using(alias)
+            .filter(listing_id__in=[listing.pk for listing in batch])
+            .order_by("amount", "pk")
+            .values_list("listing_id", "amount", "amount_currency")
+        )
+        highest, counts = {}, {}
+        for listing_id, amount, currency in bids:
+            highest[listing_id] = Money(amount, currency)
+            counts[listing_id] = counts.get(listing_id, 0) + 1
+        ListingCard.objects.using(alias).bulk_create(
+            ListingCard(
+                listing_id=listing.pk,
+                title=listing.title,
+                description=listing.description,
+                image_url=listing.image_url,
+                price=highest.get(listing.pk, listing.starting_bid),
+                bid_count=counts.get(listing.pk, 0),
+                seller=sellers.get(listing.listed_by_id, ""),
+                category=listing.category_id,
+                created=listing.created,
+                closed=listing.closed,
+            )
+            for listing in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0026_sharding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingCard',
+            fields=[
+                ('listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='auctions.listing')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('price_currency', djmoney.models.fields.CurrencyField(choices=[('USD', 'US Dollar')], default='USD', editable=False, max_length=3, null=True)),
+                ('price', djmoney.models.fields.MoneyField(blank=True, decimal_places=2, default_currency='USD', max_digits=14, null=True)),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('seller', models.CharField(max_length=150)),
+                ('category', models.CharField(blank=True, max_length=100, null=True)),
+                ('created', models.DateTimeField()),
+                ('closed', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['closed', '-listing'], name='card_closed_idx'), models.Index(fields=['category', 'closed', '-listing'], name='card_category_idx')],
+            },
+        ),
+        # Run on every shard, which hold listing cards too
+        migrations.RunPython(
+            fill_listing_cards,
+            migrations.RunPython.noop,
+            hints={"model_name": "listingcard"},
+        ),
+    ]
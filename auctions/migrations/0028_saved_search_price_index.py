@@ -0,0 +1,35 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:04
+
+from django.db import migrations, models
+
+
+def index_price_only_searches(apps, schema_editor):
+    """Move searches that only filter on price from "*" to their currency."""
+    SavedSearch = apps.get_model("auctions", "SavedSearch")
+    price_only = SavedSearch.objects.filter(index_term="*")
+    for currency in ("min_price_currency", "max_price_currency"):
+        bound = currency.removesuffix("_currency")
+        rows = (
+            price_only.filter(**{f"{bound}__isnull": False})
+            .values_list(currency, flat=True)
+            .distinct()
+        )
+        for code in list(rows):
+            price_only.filter(
+                **{f"{bound}__isnull": False, currency: code}
+            ).update(index_term=f"p:{code}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0027_listing_cards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(fields=['index_term', 'min_price'], name='search_price_idx'),
+        ),
+        migrations.RunPython(index_price_only_searches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.5 on 2026-10-19 02:33
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0030_listing_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedlisting',
+            name='ledger',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+    ]
@@ -1,10 +1,20 @@
+import re
+from bisect import insort
 from decimal import Decimal
+from operator import itemgetter
 from django.contrib.auth.models import AbstractUser
 from djmoney.models.fields import MoneyField
-from django.db import models
+from djmoney.money import Money
+from django.db import models, router, transaction
+from django.db.models import Count, F
 from django.urls import reverse
+from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+from auctions import sharding
 
 BID_TOO_LOW_ERROR_MESSAGE = (
     "Bid must be at least as large as the starting bid, and must be greater "
@@ -18,17 +28,128 @@ class User(AbstractUser):
     pass
 
 
+class CategoryManager(models.Manager):
+    CACHE_KEY = "categories"
+
+    def cached(self):
+        """All categories; counts may be AUCTIONS_CATEGORY_CACHE_SECONDS old."""
+        return cache.get_or_set(
+            self.CACHE_KEY,
+            lambda: tuple(self.all()),
+            settings.AUCTIONS_CATEGORY_CACHE_SECONDS,
+        )
+
+    def bump(self, name, active=0, closed=0):
+        # Counters are only ever moved with F() expressions so concurrent
+        # listing writes never lose an increment.
+        if name is None or not (active or closed):
+            return
+        self.filter(name=name).update(
+            active_count=F("active_count") + active,
+            closed_count=F("closed_count") + closed,
+        )
+
+    def bump_for_listings(self, listings, sign=1):
+        # Set-based counterpart of bump() for bulk paths (bulk_create, queryset
+        # updates) which bypass Listing.save().
+        rows = (
+            listings.order_by()
+            .values("category_id", "closed")
+            .annotate(n=Count("pk"))
+        )
+        for row in rows:
+            if row["closed"]:
+                self.bump(row["category_id"], closed=sign * row["n"])
+            else:
+                self.bump(row["category_id"], active=sign * row["n"])
+
+    def reconcile(self):
+        counts = {}
+        # Each shard counts its own listings; the counters hold the sum
+        rows = (
+            row
+            for alias in sharding.aliases()
+            for row in Listing.objects.using(alias)
+            .order_by()
+            .values("category_id", "closed")
+            .annotate(n=Count("pk"))
+        )
+        for row in rows:
+            active, closed = counts.get(row["category_id"], (0, 0))
+            if row["closed"]:
+                closed += row["n"]
+            else:
+                active += row["n"]
+            counts[row["category_id"]] = (active, closed)
+        # Archived listings still count as closed listings of their category
+        rows = (
+            ArchivedListing.objects.order_by()
+            .values("category_id")
+            .annotate(n=Count("pk"))
+        )
+        for row in rows:
+            active, closed = counts.get(row["category_id"], (0, 0))
+            counts[row["category_id"]] = (active, closed + row["n"])
+        fixed = []
+        for category in self.all():
+            active, closed = counts.get(category.name, (0, 0))
+            if (category.active_count, category.closed_count) != (active, closed):
+                category.active_count = active
+                category.closed_count = closed
+                fixed.append(category)
+        self.bulk_update(fixed, ["active_count", "closed_count"])
+        if fixed:
+            cache.delete(self.CACHE_KEY)
+        return fixed
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="children",
+    )
+    active_count = models.PositiveIntegerField(default=0)
+    closed_count = models.PositiveIntegerField(default=0)
+
+    objects = CategoryManager()
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name_plural = "categories"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(Category.objects.CACHE_KEY)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete(Category.objects.CACHE_KEY)
+        return result
+
+
+class ListingShard(models.Model):
+    """Directory entry placing a listing on a database (auctions.sharding);
+    its id is the listing's. Listings without an entry live on default."""
+
+    shard = models.CharField(max_length=50, db_index=True)
+
+    def __repr__(self) -> str:
+        return f"ListingShard({self.pk}, '{self.shard}')"
+
+
 class Listing(models.Model):
+    # Categories seeded by migration 0013_category
     FASHION = "Fashion"
     TOYS = "Toys"
     ELECTRONICS = "Electronics"
     HOME = "Home"
-    CATEGORY_CHOICES = [
-        (FASHION, "Fashion"),
-        (TOYS, "Toys"),
-        (ELECTRONICS, "Electronics"),
-        (HOME, "Home"),
-    ]
     title = models.CharField(max_length=100)
     description = models.TextField(null=True, blank=True)
     # https://djangolearn.com/p/money-fields-for-django-forms-and-models
@@ -41,17 +162,88 @@ class Listing(models.Model):
         default_currency="USD",
     )
     image_url = models.URLField(null=True, blank=True)
-    category = models.CharField(
-        max_length=100, null=True, blank=True, choices=CATEGORY_CHOICES
+    # Users and categories stay on default when listings are sharded, so the
+    # database cannot check references to them (db_constraint=False here and
+    # on the other rows that live with a listing)
+    category = models.ForeignKey(
+        Category,
+        to_field="name",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="listings",
+        db_constraint=False,
     )
     watchers = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, blank=True, related_name="watching"
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name="watching",
+        db_constraint=False,
     )
     listed_by = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="listings"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="listings",
+        db_constraint=False,
     )
     created = models.DateTimeField(auto_now_add=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
     closed = models.BooleanField(default=False)
+    closed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # Auction state read from the ledger, kept for the life of this instance
+    _ledger_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not {"category_id", "closed"} & instance.get_deferred_fields():
+            instance._counted_as = (instance.category_id, instance.closed)
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.pk is None:
+            # Placed by the directory, whatever database the manager chose
+            self.pk, kwargs["using"] = sharding.allocate()
+            kwargs["force_insert"] = True
+        using = kwargs.get("using") or router.db_for_write(Listing, instance=self)
+        if self._state.adding:
+            counted_as = None
+        else:
+            counted_as = getattr(self, "_counted_as", None)
+            if counted_as is None:
+                counted_as = (
+                    Listing.objects.using(using)
+                    .filter(pk=self.pk)
+                    .values_list("category_id", "closed")
+                    .first()
+                )
+        with sharding.atomic(using):
+            super().save(*args, **kwargs)
+            if counted_as != (self.category_id, self.closed):
+                if counted_as is not None:
+                    self._bump_category(*counted_as, sign=-1)
+                self._bump_category(self.category_id, self.closed)
+            state = None if counted_as is None else self.ledger_state()
+            ListingCard.for_listing(self, state).save(force_insert=state is None)
+            # Keeps the ranking table in step with closing and ends_at changes
+            record_ranking_event(self.pk)
+            listing_page_changed(self.pk)
+        self._counted_as = (self.category_id, self.closed)
+
+    def delete(self, *args, **kwargs):
+        with sharding.atomic(self._state.db):
+            listing_page_changed(self.pk)
+            result = super().delete(*args, **kwargs)
+            self._bump_category(self.category_id, self.closed, sign=-1)
+        return result
+
+    @staticmethod
+    def _bump_category(category_id, closed, sign=1):
+        if closed:
+            Category.objects.bump(category_id, closed=sign)
+        else:
+            Category.objects.bump(category_id, active=sign)
 
     def __repr__(self) -> str:
         return (
@@ -64,37 +256,91 @@ class Listing(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    def ledger_state(self):
+        if self._ledger_state is None:
+            with sharding.using(self._state.db or sharding.current()):
+                self._ledger_state = LedgerEvent.objects.state(self.pk)
+        return self._ledger_state
+
+    @property
+    def highest_bidder_id(self):
+        return self.ledger_state().highest_bidder_id
+
     @property
     def highest_bidder(self):
-        try:
-            return self.bids.order_by("-amount").first().bidder
-        except AttributeError:
-            pass
+        bidder_id = self.highest_bidder_id
+        if bidder_id is not None:
+            return User.objects.filter(pk=bidder_id).first()
 
     @property
     def highest_bid(self):
-        try:
-            return self.bids.order_by("-amount").first().amount
-        except AttributeError:
-            pass
+        return self.ledger_state().highest_bid
+
+    @property
+    def bid_count(self):
+        return len(self.ledger_state().bids)
 
     @property
     def price(self):
-        return self.highest_bid if self.bids.count() else self.starting_bid
+        highest = self.highest_bid
+        return self.starting_bid if highest is None else highest
 
     def get_absolute_url(self):
         return reverse("listing-detail", kwargs={"pk": self.pk})
 
+    def is_watched_by(self, user):
+        # Through the watcher rows, which live on the listing's shard
+        return (
+            Listing.watchers.through.objects.using(self._state.db)
+            .filter(listing_id=self.pk, user_id=user.pk)
+            .exists()
+        )
+
     def add_remove_from_watchlist(self, user):
-        if user not in self.watchers.all():
-            self.watchers.add(user)
-        else:
-            self.watchers.remove(user)
+        with sharding.using(self._state.db):
+            if not self.is_watched_by(user):
+                self.watchers.add(user)
+                record_ranking_event(self.pk, RankingEvent.WATCH_WEIGHT)
+            else:
+                self.watchers.remove(user)
+
+    def place_bid(self, user, amount):
+        with sharding.atomic(self._state.db):
+            # Lock the listing row so concurrent bids are validated in turn and
+            # the outbid notification names the right previous bidder.
+            list(Listing.objects.select_for_update().filter(pk=self.pk).values("pk"))
+            self._ledger_state = None
+            previous_bidder = self.highest_bidder
+            bid = Bid(listing=self, amount=amount, bidder=user)
+            bid.full_clean()
+            bid.save()
+            OutboxEvent.objects.create(
+                kind=OutboxEvent.BID_PLACED,
+                listing=self,
+                actor=user,
+                previous_bidder=previous_bidder,
+                payload={
+                    "amount": str(bid.amount.amount),
+                    "currency": str(bid.amount.currency),
+                },
+            )
+            record_ranking_event(self.pk, RankingEvent.BID_WEIGHT)
+            transaction.on_commit(dispatch_notifications_soon, using=self._state.db)
+        return bid
 
     def close(self, user):
         if self.listed_by == user:
-            self.closed = True
-            self.save()
+            with sharding.atomic(self._state.db):
+                self.closed = True
+                self.closed_at = timezone.now()
+                self.save()
+                LedgerEvent.objects.append(self, LedgerEvent.LISTING_CLOSED)
+                OutboxEvent.objects.create(
+                    kind=OutboxEvent.LISTING_CLOSED, listing=self, actor=user
+                )
+                transaction.on_commit(
+                    dispatch_notifications_soon, using=self._state.db
+                )
 
     @property
     def winner(self):
@@ -108,22 +354,347 @@ class Bid(models.Model):
         max_digits=14, decimal_places=2, null=True, blank=True, default_currency="USD"
     )
     bidder = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="bids"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="bids",
+        db_constraint=False,
     )
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["listing", "created"], name="bid_listing_created_idx")
+        ]
 
     def clean(self) -> None:
         if self.listing.closed:
             raise ValidationError({None: LISTING_CLOSED_ERROR})
+        highest = self.listing.highest_bid
         if (
             self.listing.starting_bid and (self.listing.starting_bid > self.amount)
-        ) or (self.listing.bids.count() and (self.listing.highest_bid >= self.amount)):
+        ) or (highest is not None and highest >= self.amount):
             raise ValidationError({"amount": BID_TOO_LOW_ERROR_MESSAGE})
         return super().clean()
 
+    # Bid rows mirror the standing bids; every placement and retraction is
+    # recorded in the ledger, which is what auction state is read from
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with sharding.atomic(router.db_for_write(Bid, instance=self)):
+            super().save(*args, **kwargs)
+            if adding:
+                LedgerEvent.objects.append(self.listing, LedgerEvent.BID_PLACED, self)
+
+    def delete(self, *args, **kwargs):
+        with sharding.atomic(self._state.db):
+            LedgerEvent.objects.append(self.listing, LedgerEvent.BID_RETRACTED, self)
+            return super().delete(*args, **kwargs)
+
     def __repr__(self) -> str:
         return f"Bid('{self.listing}', '{self.amount}', {self.bidder})"
 
 
+class AuctionState:
+    """A listing's auction as of ledger event ``event_id``.
+
+    ``bids`` holds the standing bids as (bid_id, bidder_id, amount, currency)
+    in ascending amount, so the last one leads.
+    """
+
+    def __init__(self, listing_id, event_id=0, at=None, bids=(), closed=False):
+        self.listing_id = listing_id
+        self.event_id = event_id
+        self.at = at
+        self.bids = list(bids)
+        self.closed = closed
+        # Events applied on top of the snapshot this state was read from
+        self.tail = 0
+
+    def apply(self, event_id, kind, at, bid_id, bidder_id, amount, currency):
+        if kind == LedgerEvent.BID_PLACED:
+            insort(self.bids, (bid_id, bidder_id, amount, currency), key=itemgetter(2))
+        elif kind == LedgerEvent.BID_RETRACTED:
+            self.bids = [bid for bid in self.bids if bid[0] != bid_id]
+        elif kind == LedgerEvent.LISTING_CLOSED:
+            self.closed = True
+        self.event_id, self.at = event_id, at
+        self.tail += 1
+
+    @property
+    def highest_bid(self):
+        if self.bids:
+            return Money(self.bids[-1][2], self.bids[-1][3])
+
+    @property
+    def highest_bidder_id(self):
+        if self.bids:
+            return self.bids[-1][1]
+
+    def as_dict(self):
+        return {
+            "listing": self.listing_id,
+            "event": self.event_id,
+            "at": self.at,
+            "closed": self.closed,
+            "bids": [
+                {"bid": bid, "bidder": bidder, "amount": str(amount), "currency": cur}
+                for bid, bidder, amount, cur in self.bids
+            ],
+        }
+
+
+# Event columns in the order AuctionState.apply takes them
+LEDGER_FIELDS = (
+    "id",
+    "kind",
+    "created",
+    "bid_id",
+    "bidder_id",
+    "amount",
+    "amount_currency",
+)
+
+
+class LedgerManager(models.Manager):
+    def state(self, listing_id, at=None):
+        """The latest snapshot plus the events after it; with ``at``, the
+        state as of that moment, for settling disputes."""
+        snapshots = ListingSnapshot.objects.filter(listing_id=listing_id)
+        events = self.filter(listing_id=listing_id)
+        if at is not None:
+            snapshots = snapshots.filter(at__lte=at)
+            events = events.filter(created__lte=at)
+        snapshot = snapshots.order_by("-event_id").first()
+        state = snapshot.state() if snapshot else AuctionState(listing_id)
+        tail = events.filter(id__gt=state.event_id).order_by("id")
+        for row in tail.values_list(*LEDGER_FIELDS):
+            state.apply(*row)
+        return state
+
+    def append(self, listing, kind, bid=None):
+        """Record ``kind`` for ``listing`` and snapshot its state every
+        AUCTIONS_LEDGER_SNAPSHOT_EVERY events and on closing."""
+        cached = listing._ledger_state
+        event = self.create(
+            listing=listing,
+            kind=kind,
+            bid_id=bid and bid.pk,
+            bidder_id=bid and bid.bidder_id,
+            amount=bid and bid.amount,
+        )
+        if cached is None:
+            state = listing.ledger_state()
+        else:
+            state = cached
+            state.apply(*event.row())
+        highest = state.highest_bid
+        ListingCard.objects.using(event._state.db).filter(pk=listing.pk).update(
+            price=listing.starting_bid if highest is None else highest,
+            bid_count=len(state.bids),
+        )
+        listing_page_changed(listing.pk)
+        if state.tail >= settings.AUCTIONS_LEDGER_SNAPSHOT_EVERY or (
+            kind == LedgerEvent.LISTING_CLOSED
+        ):
+            if cached is not None:
+                # The instance may have missed events appended elsewhere
+                state = listing._ledger_state = self.state(listing.pk)
+            ListingSnapshot.objects.bulk_create(
+                [ListingSnapshot.from_state(state)], ignore_conflicts=True
+            )
+            state.tail = 0
+        return event
+
+
+class LedgerEvent(models.Model):
+    """Append-only record of everything that changes a listing's auction."""
+
+    BID_PLACED = "bid-placed"
+    BID_RETRACTED = "bid-retracted"
+    LISTING_CLOSED = "listing-closed"
+    KIND_CHOICES = [
+        (BID_PLACED, "Bid placed"),
+        (BID_RETRACTED, "Bid retracted"),
+        (LISTING_CLOSED, "Listing closed"),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="ledger_events"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Plain ids: the history outlives retracted bids and deleted accounts
+    bid_id = models.IntegerField(null=True, blank=True)
+    bidder = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    amount = MoneyField(
+        max_digits=14, decimal_places=2, null=True, blank=True, default_currency="USD"
+    )
+    created = models.DateTimeField(default=timezone.now)
+
+    objects = LedgerManager()
+
+    class Meta:
+        indexes = [models.Index(fields=["listing", "id"], name="ledger_listing_idx")]
+
+    def row(self):
+        amount = self.amount
+        return (
+            self.pk,
+            self.kind,
+            self.created,
+            self.bid_id,
+            self.bidder_id,
+            None if amount is None else amount.amount,
+            None if amount is None else str(amount.currency),
+        )
+
+    def __repr__(self) -> str:
+        return f"LedgerEvent('{self.kind}', {self.listing_id}, bid={self.bid_id})"
+
+
+class ListingSnapshot(models.Model):
+    """A listing's AuctionState after ledger event ``event_id``."""
+
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    event_id = models.BigIntegerField()
+    at = models.DateTimeField()
+    bids = models.JSONField(default=list)
+    closed = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["listing", "event_id"], name="one_snapshot_per_event"
+            )
+        ]
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(
+            listing_id=state.listing_id,
+            event_id=state.event_id,
+            at=state.at,
+            bids=[
+                [bid, bidder, str(amount), currency]
+                for bid, bidder, amount, currency in state.bids
+            ],
+            closed=state.closed,
+        )
+
+    def state(self):
+        return AuctionState(
+            self.listing_id,
+            self.event_id,
+            self.at,
+            [
+                (bid, bidder, Decimal(amount), currency)
+                for bid, bidder, amount, currency in self.bids
+            ],
+            self.closed,
+        )
+
+
+class ListingCard(models.Model):
+    """What the list pages show of a listing, in one narrow row.
+
+    Written in the transaction of every change it reflects: Listing.save
+    writes the whole card and each ledger event its price and bid count.
+    auctions.cards rebuilds and checks cards from the listings and ledger.
+    """
+
+    listing = models.OneToOneField(
+        Listing, on_delete=models.CASCADE, primary_key=True, related_name="card"
+    )
+    title = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    image_url = models.URLField(null=True, blank=True)
+    price = MoneyField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        default_currency="USD",
+    )
+    bid_count = models.PositiveIntegerField(default=0)
+    # Names rather than references, so a card renders without joins
+    seller = models.CharField(max_length=150)
+    category = models.CharField(max_length=100, null=True, blank=True)
+    created = models.DateTimeField()
+    closed = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["closed", "-listing"], name="card_closed_idx"),
+            models.Index(
+                fields=["category", "closed", "-listing"], name="card_category_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.title
+
+    @classmethod
+    def for_listing(cls, listing, state=None, seller=None):
+        """The card of ``listing`` with auction ``state`` (no bids when
+        omitted); ``seller`` saves looking up the seller's username."""
+        bids = state.bids if state else []
+        highest = state.highest_bid if state else None
+        return cls(
+            listing_id=listing.pk,
+            title=listing.title,
+            description=listing.description,
+            image_url=listing.image_url,
+            price=listing.starting_bid if highest is None else highest,
+            bid_count=len(bids),
+            seller=listing.listed_by.username if seller is None else seller,
+            category=listing.category_id,
+            created=listing.created,
+            closed=listing.closed,
+        )
+
+    def get_absolute_url(self):
+        return reverse("listing-detail", kwargs={"pk": self.pk})
+
+
+class ProxyBid(models.Model):
+    """A bidder's hidden maximum; auctions.bidding turns it into visible bids."""
+
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="proxy_bids"
+    )
+    bidder = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="proxy_bids",
+        db_constraint=False,
+    )
+    max_amount = MoneyField(max_digits=14, decimal_places=2, default_currency="USD")
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["listing", "bidder"], name="one_proxy_per_bidder"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["listing", "-max_amount", "created"], name="proxy_leader_idx"
+            )
+        ]
+
+    def __repr__(self) -> str:
+        return f"ProxyBid('{self.listing}', '{self.max_amount}', {self.bidder})"
+
+
 class Comment(models.Model):
     listing = models.ForeignKey(
         Listing, on_delete=models.CASCADE, related_name="comments", default=None
@@ -133,5 +704,473 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name="comments",
         default=None,
+        db_constraint=False,
     )
     text = models.TextField(blank=True)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        listing_page_changed(self.listing_id)
+
+    def delete(self, *args, **kwargs):
+        listing_page_changed(self.listing_id)
+        return super().delete(*args, **kwargs)
+
+
+# Version of a listing's cached page (auctions.holes)
+LISTING_PAGE_KEY = "page-version:listing:%d"
+
+
+def listing_page_changed(listing_id):
+    """Retire cached copies of a listing's page, now and again on commit so
+    a copy rendered before the change commits is not kept either."""
+    key = LISTING_PAGE_KEY % listing_id
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=sharding.current())
+
+
+def dispatch_notifications_soon():
+    Job.objects.enqueue(
+        "auctions.tasks.dispatch_notifications", queue="email", unique=True
+    )
+
+
+class OutboxEvent(models.Model):
+    """Side effect recorded in the same transaction as the change causing it.
+
+    Delivered later by auctions.notifications so requests never wait on it.
+    """
+
+    BID_PLACED = "bid-placed"
+    LISTING_CLOSED = "listing-closed"
+    SEARCH_MATCHED = "search-matched"
+    KIND_CHOICES = [
+        (BID_PLACED, "Bid placed"),
+        (LISTING_CLOSED, "Listing closed"),
+        (SEARCH_MATCHED, "Saved search matched"),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="outbox_events"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+    )
+    previous_bidder = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_constraint=False,
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Set while a dispatcher is sending the event; past this time the
+    # dispatcher is presumed dead and another may claim it
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="outbox_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            )
+        ]
+
+    def __repr__(self) -> str:
+        return f"OutboxEvent('{self.kind}', {self.listing_id})"
+
+
+class JobManager(models.Manager):
+    def enqueue(
+        self,
+        task,
+        *args,
+        queue="default",
+        priority=0,
+        run_at=None,
+        max_attempts=5,
+        unique=False,
+        **kwargs,
+    ):
+        """Queue ``task`` (a dotted path registered with auctions.jobs.task).
+
+        With ``unique=True`` nothing is added while an identical job is still
+        waiting, which lets hot paths enqueue freely.
+        """
+        fields = {"task": task, "args": list(args), "kwargs": kwargs, "queue": queue}
+        if unique and self.filter(status=Job.QUEUED, **fields).exists():
+            return None
+        return self.create(
+            priority=priority,
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts,
+            **fields,
+        )
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default="default")
+    # Lower numbers run first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["queue", "priority", "run_at"],
+                name="job_ready_idx",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(fields=["status", "queue"], name="job_status_idx"),
+        ]
+
+    def __repr__(self) -> str:
+        return f"Job('{self.task}', queue='{self.queue}', status='{self.status}')"
+
+
+class ListingImport(models.Model):
+    """An uploaded listings file, imported by a job (auctions.imports)."""
+
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    fmt = models.CharField(max_length=10)
+    # Emptied once imported
+    data = models.TextField(blank=True)
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_count = models.PositiveIntegerField(default=0)
+    # [line, message] pairs
+    errors = models.JSONField(default=list, blank=True)
+
+    @property
+    def failed(self):
+        return self.finished_at is None and (
+            self.job is None or self.job.status == Job.FAILED
+        )
+
+
+def match_saved_searches_soon(listing_id):
+    Job.objects.enqueue(
+        "auctions.tasks.match_saved_searches", listing_id, queue="searches"
+    )
+
+
+def update_rankings_soon():
+    Job.objects.enqueue("auctions.tasks.update_rankings", queue="rankings", unique=True)
+
+
+def record_ranking_event(listing_id, weight=0.0):
+    RankingEvent.objects.create(listing_id=listing_id, weight=weight)
+    transaction.on_commit(update_rankings_soon, using=sharding.current())
+
+
+class RankingEvent(models.Model):
+    """Pending input for auctions.rankings, deleted once applied.
+
+    A zero weight only asks for the listing's rank row to be re-synced
+    (opened, closed or ends_at changed).
+    """
+
+    BID_WEIGHT = 1.0
+    WATCH_WEIGHT = 0.5
+    listing_id = models.IntegerField()
+    weight = models.FloatField(default=0.0)
+    created = models.DateTimeField(default=timezone.now)
+
+
+class ListingRank(models.Model):
+    """Precomputed feed position of an open listing.
+
+    ``trending_key`` is the log of an exponentially decayed activity score,
+    shifted by time so that keys written at different moments compare
+    directly and never need to be decayed in place.
+    """
+
+    listing = models.OneToOneField(
+        Listing, on_delete=models.CASCADE, primary_key=True, related_name="rank"
+    )
+    trending_key = models.FloatField(null=True, blank=True, db_index=True)
+    ends_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+
+class SimilarListing(models.Model):
+    """Top-K co-watched neighbours of a listing, rebuilt nightly in batch."""
+
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="similar"
+    )
+    # May live on another shard
+    similar = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="+", db_constraint=False
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["listing", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["listing", "rank"], name="similar_listing_rank"
+            )
+        ]
+
+
+class FlaggedAccount(models.Model):
+    """A bidder whose bidding on one seller's listings looks like shilling.
+
+    Written by auctions.analytics; each run replaces the previous results.
+    """
+
+    bidder = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField(db_index=True)
+    bid_count = models.PositiveIntegerField()
+    affinity = models.FloatField(help_text="Share of the bidder's bids on this seller")
+    losing_rate = models.FloatField(
+        help_text="Share of this seller's listings the bidder bid on but lost"
+    )
+    near_increment_rate = models.FloatField(
+        help_text="Share of bids overtaken by a bid just above them"
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-score"]
+
+
+def words_in_order(text):
+    """Distinct words of ``text``, first occurrence first."""
+    return list(dict.fromkeys(re.findall(r"\w+", (text or "").casefold())))
+
+
+def words(text):
+    return set(words_in_order(text))
+
+
+class SavedSearch(models.Model):
+    """A buyer's standing query, matched against each new listing.
+
+    ``index_term`` is the one term a new listing must contain for the search
+    to be considered at all: its longest keyword, else its category. Searches
+    that only filter on price are indexed by currency (``p:USD``) and loaded
+    with their bounds checked in SQL; ``*`` is left for searches that match
+    everything.
+    """
+
+    MATCH_ALL = "*"
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="searches"
+    )
+    keywords = models.CharField(max_length=200, blank=True)
+    category = models.ForeignKey(
+        Category,
+        to_field="name",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    min_price = MoneyField(
+        max_digits=14, decimal_places=2, null=True, blank=True, default_currency="USD"
+    )
+    max_price = MoneyField(
+        max_digits=14, decimal_places=2, null=True, blank=True, default_currency="USD"
+    )
+    index_term = models.CharField(max_length=110, db_index=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "saved searches"
+        indexes = [
+            models.Index(fields=["index_term", "min_price"], name="search_price_idx")
+        ]
+
+    def __str__(self) -> str:
+        parts = [self.keywords, self.category_id, self.min_price, self.max_price]
+        return " / ".join(str(part) for part in parts if part) or "Everything"
+
+    def save(self, *args, **kwargs):
+        keywords = words(self.keywords)
+        if keywords:
+            self.index_term = "w:" + max(sorted(keywords), key=len)[:100]
+        elif self.category_id:
+            self.index_term = f"c:{self.category_id}"
+        elif self.min_price is not None or self.max_price is not None:
+            bound = self.min_price if self.min_price is not None else self.max_price
+            self.index_term = self.price_term(bound.currency)
+        else:
+            self.index_term = self.MATCH_ALL
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def price_term(currency):
+        return f"p:{currency}"
+
+    def matches(self, listing, listing_words, categories):
+        if self.category_id and self.category_id not in categories:
+            return False
+        if not words(self.keywords) <= listing_words:
+            return False
+        price = listing.starting_bid
+        # Bounds in another currency never match rather than guess a rate
+        if self.min_price is not None and not (
+            price is not None
+            and price.currency == self.min_price.currency
+            and price >= self.min_price
+        ):
+            return False
+        if self.max_price is not None and not (
+            price is not None
+            and price.currency == self.max_price.currency
+            and price <= self.max_price
+        ):
+            return False
+        return True
+
+
+class SavedSearchMatch(models.Model):
+    search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name="listing_matches",
+        db_constraint=False,
+    )
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="+")
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["search", "listing"], name="saved_search_match_once"
+            )
+        ]
+
+
+class ArchivedListing(models.Model):
+    """A closed listing moved out of the hot tables, bids and comments included.
+
+    The primary key is the original listing id so existing URLs keep resolving.
+    Bids are stored as ``[bidder_id, amount, created, bid_id, currency]``
+    in ascending amount (rows archived before the timestamp was kept stop
+    after the amount) and comments as ``[commenter_id, text]`` pairs, oldest
+    first. ``ledger`` keeps the
+    listing's ledger events as LEDGER_FIELDS rows, so disputes can still be
+    replayed with ``ledger_state``.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    starting_bid = MoneyField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        default_currency="USD",
+    )
+    final_price = MoneyField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        default_currency="USD",
+    )
+    image_url = models.URLField(null=True, blank=True)
+    category = models.ForeignKey(
+        Category,
+        to_field="name",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_listings",
+    )
+    listed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_listings",
+    )
+    winner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_wins",
+    )
+    created = models.DateTimeField()
+    closed_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    watcher_count = models.PositiveIntegerField(default=0)
+    bids = models.JSONField(default=list)
+    comments = models.JSONField(default=list)
+    ledger = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    closed = True
+
+    def __str__(self) -> str:
+        return self.title
+
+    @property
+    def price(self):
+        return self.final_price if self.bid_count else self.starting_bid
+
+    @property
+    def seller(self):
+        return self.listed_by.username
+
+    @property
+    def comment_texts(self):
+        return [text for _, text in self.comments]
+
+    def ledger_state(self, at=None):
+        """The auction as of ``at`` (or its end), folded from the ledger."""
+        state = AuctionState(self.pk)
+        for event_id, kind, created, bid_id, bidder_id, amount, currency in self.ledger:
+            created = parse_datetime(created)
+            if at is not None and created > at:
+                break
+            if amount is not None:
+                amount = Decimal(amount)
+            state.apply(event_id, kind, created, bid_id, bidder_id, amount, currency)
+        return state
+
+    def get_absolute_url(self):
+        return reverse("listing-detail", kwargs={"pk": self.pk})
@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from auctions import sharding
+from auctions.models import Listing, OutboxEvent, User
+
+BATCH_SIZE = 500
+SEND_CHUNK_SIZE = 1000
+
+OUTBID = "outbid"
+NEW_BID = "new-bid"
+CLOSED = "closed"
+WON = "won"
+MATCHED = "matched"
+
+
+def watcher_ids(listing_id):
+    through = Listing.watchers.through
+    return (
+        through.objects.filter(listing_id=listing_id)
+        .values_list("user_id", flat=True)
+        .iterator(chunk_size=SEND_CHUNK_SIZE)
+    )
+
+
+def collect(events):
+    """Coalesce a batch of events into {user_id: {(listing_id, topic): info}}.
+
+    Repeated events for the same user, listing and topic collapse into one
+    entry that keeps a count and the most recent event.
+    """
+    inbox = defaultdict(dict)
+
+    def notify(user_id, event, topic):
+        if user_id is None or user_id == event.actor_id:
+            return
+        key = (event.listing_id, topic)
+        count = inbox[user_id][key][1] + 1 if key in inbox[user_id] else 1
+        inbox[user_id][key] = (event, count)
+
+    for event in events:
+        if event.kind == OutboxEvent.BID_PLACED:
+            notify(event.previous_bidder_id, event, OUTBID)
+            for user_id in watcher_ids(event.listing_id):
+                if user_id != event.previous_bidder_id:
+                    notify(user_id, event, NEW_BID)
+        elif event.kind == OutboxEvent.LISTING_CLOSED:
+            winner = event.listing.highest_bidder
+            winner_id = winner.pk if winner else None
+            notify(winner_id, event, WON)
+            for user_id in watcher_ids(event.listing_id):
+                if user_id != winner_id:
+                    notify(user_id, event, CLOSED)
+        elif event.kind == OutboxEvent.SEARCH_MATCHED:
+            for user_id in event.payload.get("users", []):
+                notify(user_id, event, MATCHED)
+    return inbox
+
+
+def describe(event, topic, count):
+    title = event.listing.title
+    if topic in (OUTBID, NEW_BID):
+        price = f"{event.payload.get('amount')} {event.payload.get('currency')}"
+        if topic == OUTBID:
+            return f"You have been outbid on {title}. The current bid is {price}."
+        bids = f"{count} new bids" if count > 1 else "A new bid"
+        return f"{bids} on {title}. The current bid is {price}."
+    if topic == WON:
+        return f"You won {title}!"
+    if topic == MATCHED:
+        return f"{title} matches one of your saved searches."
+    return f"{title} has closed."
+
+
+def build_messages(inbox):
+    user_ids = list(inbox)
+    for start in range(0, len(user_ids), SEND_CHUNK_SIZE):
+        chunk = user_ids[start : start + SEND_CHUNK_SIZE]
+        emails = User.objects.filter(pk__in=chunk).exclude(email="")
+        for user_id, email in emails.values_list("pk", "email"):
+            lines = [
+                describe(event, topic, count)
+                for (_, topic), (event, count) in inbox[user_id].items()
+            ]
+            yield EmailMessage(
+                subject="Auction updates",
+                body="\n".join(lines),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email],
+            )
+
+
+def send(inbox):
+    connection = get_connection()
+    messages = []
+    for message in build_messages(inbox):
+        messages.append(message)
+        if len(messages) >= SEND_CHUNK_SIZE:
+            connection.send_messages(messages)
+            messages = []
+    if messages:
+        connection.send_messages(messages)
+
+
+def claim(batch_size):
+    """Claim a batch of unsent events for AUCTIONS_OUTBOX_CLAIM_SECONDS.
+
+    The rows are only locked while the claim is written, with SKIP LOCKED so
+    several workers can share the outbox.
+    """
+    now = timezone.now()
+    with transaction.atomic(using=sharding.current()):
+        events = list(
+            OutboxEvent.objects.filter(processed_at__isnull=True)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("listing")
+            .order_by("pk")[:batch_size]
+        )
+        claimed_until = now + timedelta(seconds=settings.AUCTIONS_OUTBOX_CLAIM_SECONDS)
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            claimed_until=claimed_until
+        )
+    return events
+
+
+def dispatch_pending(batch_size=BATCH_SIZE):
+    """Deliver one batch of outbox events and return how many were handled.
+
+    Mail is sent after the claim has committed, so a slow mail server never
+    holds row locks. Delivery is at-least-once: a failed send releases the
+    claim, and a dispatcher dying mid-send leaves a claim that expires.
+    Reads the outbox of the current shard.
+    """
+    events = claim(batch_size)
+    if not events:
+        return 0
+    claimed = OutboxEvent.objects.filter(pk__in=[event.pk for event in events])
+    try:
+        send(collect(events))
+    except Exception:
+        claimed.update(claimed_until=None)
+        raise
+    claimed.update(processed_at=timezone.now())
+    return len(events)
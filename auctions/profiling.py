@@ -0,0 +1,195 @@
+import contextvars
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from django.template.base import Node, Template, TextNode, VariableNode
+
+_current = contextvars.ContextVar("template_profile", default=None)
+_installed = False
+
+
+class TemplateProfile:
+    """Render time per template and per block tag.
+
+    ``total`` includes nested templates and tags; ``self`` excludes them, so
+    self times add up to the whole render.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: {"calls": 0, "total": 0.0, "self": 0.0})
+        self._children = []
+
+    def timed(self, label, render, *args):
+        self._children.append(0.0)
+        started = perf_counter()
+        try:
+            return render(*args)
+        finally:
+            elapsed = perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            entry = self.stats[label]
+            entry["calls"] += 1
+            entry["total"] += elapsed
+            entry["self"] += elapsed - children
+
+    def top(self, limit=10, key="self"):
+        ranked = sorted(self.stats.items(), key=lambda item: -item[1][key])
+        return ranked[:limit]
+
+
+def tag_label(node):
+    token = node.token
+    if token is None:
+        return type(node).__name__
+    origin = getattr(node, "origin", None)
+    name = getattr(origin, "template_name", None) or "<string>"
+    return f"{{% {token.contents[:60]} %}} {name}:{token.lineno}"
+
+
+def install():
+    """Wrap template and tag rendering; a no-op unless a profile is active."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    render_template = Template._render
+    render_node = Node.render_annotated
+
+    def _render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return render_template(self, context)
+        return profile.timed(f"template {self.name}", render_template, self, context)
+
+    def render_annotated(self, context):
+        profile = _current.get()
+        if profile is None or isinstance(self, (TextNode, VariableNode)):
+            return render_node(self, context)
+        return profile.timed(tag_label(self), render_node, self, context)
+
+    Template._render = _render
+    Node.render_annotated = render_annotated
+
+
+@contextmanager
+def profile_templates():
+    install()
+    profile = TemplateProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+class StackSampler:
+    """Sample one thread's Python stack every ``interval`` seconds from a
+    background thread, counting identical stacks (collapsed-stack format).
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.cost = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        started = time.thread_time()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = frame.f_globals.get("__name__", "?")
+                stack.append(f"{module}:{code.co_qualname}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+        self.cost = time.thread_time() - started
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+class QueryLog:
+    """connection.execute_wrapper that totals SQL time by statement shape."""
+
+    LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    LISTS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+
+    def __init__(self):
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            shape = self.LITERALS.sub("?", sql.replace("%s", "?"))
+            shape = self.LISTS.sub("(...)", shape)
+            entry = self.statements[shape]
+            entry[0] += 1
+            entry[1] += perf_counter() - started
+
+    def summary(self, limit=5):
+        ranked = sorted(self.statements.items(), key=lambda item: -item[1][1])
+        totals = self.statements.values()
+        return {
+            "queries": sum(count for count, _ in totals),
+            "ms": round(sum(spent for _, spent in totals) * 1000, 2),
+            "slowest": [
+                {"sql": sql[:300], "count": count, "ms": round(spent * 1000, 2)}
+                for sql, (count, spent) in ranked[:limit]
+            ],
+        }
+
+
+class OverheadBudget:
+    """Allow random profiling only while the profiler's own cost stays under
+    ``fraction`` of the request time seen. Both totals halve once a window
+    of request time has passed, so old history fades out."""
+
+    def __init__(self, fraction, window=60.0):
+        self.fraction = fraction
+        self.window = window
+        self.elapsed = 0.0
+        self.overhead = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, overhead=0.0):
+        with self._lock:
+            self.elapsed += elapsed
+            self.overhead += overhead
+            if self.elapsed > self.window:
+                self.elapsed /= 2
+                self.overhead /= 2
+
+    def allows(self):
+        return self.overhead <= self.fraction * self.elapsed
+
+
+def write_profile(directory, name, sampler, meta):
+    """Write ``<name>.collapsed`` for flamegraph tools plus ``<name>.json``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{name}.collapsed").write_text(sampler.collapsed())
+    (directory / f"{name}.json").write_text(json.dumps(meta, indent=2, default=str))
+    return directory / f"{name}.collapsed"
@@ -0,0 +1,144 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from auctions import sharding
+from auctions.models import Listing, ListingCard, ListingRank, RankingEvent
+
+BATCH_SIZE = 5000
+FEED_SIZE = 50
+FEED_KEYS = {"trending": "feed:trending", "ending-soon": "feed:ending-soon"}
+
+# Keys are measured from a fixed instant so they stay comparable forever
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / (settings.AUCTIONS_TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def logaddexp(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def event_key(weight, at):
+    """log(weight * e^(rate * t)): an event's contribution in key space.
+
+    The decayed score at any later time T is exp(key - rate * T), the same
+    shift for every listing, so ordering by key orders by current score.
+    """
+    return math.log(weight) + decay_rate() * (at - EPOCH).total_seconds()
+
+
+def apply_pending(batch_size=BATCH_SIZE):
+    """Fold one batch of ranking events into ListingRank; return events used.
+
+    Work is proportional to the events in the batch: each listing's new key
+    is its old key log-added to its new events, with no read of Bid rows.
+    Works on the current shard.
+    """
+    alias = sharding.current()
+    with transaction.atomic(using=alias):
+        events = list(
+            RankingEvent.objects.select_for_update(skip_locked=True).order_by("pk")[
+                :batch_size
+            ]
+        )
+        if not events:
+            return 0
+        added = defaultdict(lambda: None)
+        for event in events:
+            key = event_key(event.weight, event.created) if event.weight > 0 else None
+            added[event.listing_id] = logaddexp(added[event.listing_id], key)
+        ids = list(added)
+        listings = Listing.objects.filter(pk__in=ids).values_list(
+            "pk", "closed", "ends_at"
+        )
+        # Locked in id order, so a second job folding the same listings waits
+        # instead of overwriting this one's keys
+        ranks = {
+            rank.pk: rank
+            for rank in ListingRank.objects.select_for_update()
+            .filter(pk__in=ids)
+            .order_by("pk")
+        }
+        to_create, to_update, gone = [], [], set(ids)
+        for pk, closed, ends_at in listings:
+            gone.discard(pk)
+            if closed:
+                continue
+            rank = ranks.get(pk)
+            if rank is None:
+                to_create.append(
+                    ListingRank(listing_id=pk, trending_key=added[pk], ends_at=ends_at)
+                )
+            else:
+                rank.trending_key = logaddexp(rank.trending_key, added[pk])
+                rank.ends_at = ends_at
+                to_update.append(rank)
+        closed_ids = [pk for pk, closed, _ in listings if closed]
+        ListingRank.objects.filter(pk__in=closed_ids + list(gone)).delete()
+        ListingRank.objects.bulk_create(to_create)
+        ListingRank.objects.bulk_update(to_update, ["trending_key", "ends_at"])
+        RankingEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+        transaction.on_commit(
+            lambda: cache.delete_many(FEED_KEYS.values()), using=alias
+        )
+    return len(events)
+
+
+def in_rank_order(ids):
+    """The cards of listings ``ids``, in that order."""
+    cards = {}
+    for alias in sharding.aliases():
+        cards.update(ListingCard.objects.using(alias).in_bulk(ids))
+    return [cards[pk] for pk in ids if pk in cards]
+
+
+def cached_feed(name, build, limit):
+    """Serve the first FEED_SIZE entries of a feed from the cache."""
+    if limit > FEED_SIZE:
+        return build(limit)
+    feed = cache.get_or_set(
+        FEED_KEYS[name],
+        lambda: tuple(build(FEED_SIZE)),
+        settings.AUCTIONS_FEED_CACHE_SECONDS,
+    )
+    return list(feed[:limit])
+
+
+def trending(limit=FEED_SIZE):
+    return cached_feed("trending", build_trending, limit)
+
+
+def ending_soon(limit=FEED_SIZE):
+    return cached_feed("ending-soon", build_ending_soon, limit)
+
+
+def build_trending(limit):
+    ranks = (
+        ListingRank.objects.filter(trending_key__isnull=False)
+        .order_by(F("trending_key").desc(nulls_last=True))
+        .values_list("trending_key", "listing_id")
+    )
+    rows = sharding.merged(ranks, limit, key=lambda row: -row[0])
+    return in_rank_order([pk for _, pk in rows])
+
+
+def build_ending_soon(limit):
+    ranks = (
+        ListingRank.objects.filter(ends_at__gte=timezone.now())
+        .order_by("ends_at")
+        .values_list("ends_at", "listing_id")
+    )
+    rows = sharding.merged(ranks, limit, key=lambda row: row[0])
+    return in_rank_order([pk for _, pk in rows])
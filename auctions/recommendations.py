@@ -0,0 +1,134 @@
+from django.db import transaction
+from auctions import sharding
+from auctions.models import Bid, Listing, SimilarListing
+
+TOP_K = 10
+CHUNK_SIZE = 2000
+# Users touching more listings than this say little about any pair of them
+# and would make the co-occurrence blocks dense.
+MAX_USER_ITEMS = 1000
+FETCH_SIZE = 10000
+
+
+def interactions(placement=None):
+    """Yield (user_id, listing_id) pairs for watched or bid-on open listings
+    on every shard, noting each listing's shard in ``placement``."""
+    through = Listing.watchers.through
+    for alias in sharding.aliases():
+        watchers = through.objects.using(alias).filter(listing__closed=False)
+        bids = Bid.objects.using(alias).filter(listing__closed=False)
+        for rows in (
+            watchers.values_list("user_id", "listing_id"),
+            bids.values_list("bidder_id", "listing_id"),
+        ):
+            for user_id, listing_id in rows.iterator(chunk_size=FETCH_SIZE):
+                if placement is not None:
+                    placement[listing_id] = alias
+                yield user_id, listing_id
+
+
+def build_matrix(pairs, max_user_items=MAX_USER_ITEMS):
+    """Return (binary user x listing CSR matrix, listing ids per column)."""
+    import numpy as np
+    from scipy import sparse
+
+    flat = np.fromiter(
+        (value for pair in pairs for value in pair), dtype=np.int64
+    ).reshape(-1, 2)
+    if not len(flat):
+        return sparse.csr_matrix((0, 0)), np.empty(0, dtype=np.int64)
+    user_ids, rows = np.unique(flat[:, 0], return_inverse=True)
+    listing_ids, cols = np.unique(flat[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(flat), dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(listing_ids)),
+    )
+    matrix.data[:] = 1  # watching and bidding on the same listing counts once
+    per_user = np.diff(matrix.indptr)
+    matrix = sparse.diags((per_user <= max_user_items).astype(np.float32)) @ matrix
+    matrix.eliminate_zeros()
+    return matrix.tocsr(), listing_ids
+
+
+def top_k_neighbours(matrix, top_k=TOP_K, chunk_size=CHUNK_SIZE):
+    """Yield (listing column, neighbour columns, cosine scores) per listing.
+
+    Similarity is computed a block of listings at a time as
+    ``X[:, block].T @ X``, so memory is bounded by the block, not by
+    listings squared.
+    """
+    import numpy as np
+
+    items = matrix.T.tocsr()
+    norms = np.sqrt(np.asarray(items.sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    for start in range(0, items.shape[0], chunk_size):
+        block = (items[start : start + chunk_size] @ matrix).tocsr()
+        for offset in range(block.shape[0]):
+            column = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            neighbours = block.indices[lo:hi]
+            scores = block.data[lo:hi] / (norms[column] * norms[neighbours])
+            keep = neighbours != column
+            neighbours, scores = neighbours[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                neighbours, scores = neighbours[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            yield column, neighbours[order], scores[order]
+
+
+def rebuild_similar_listings(top_k=TOP_K, chunk_size=CHUNK_SIZE):
+    """Recompute SimilarListing for every listing with interactions."""
+    import numpy as np
+
+    placement = {}
+    matrix, listing_ids = build_matrix(interactions(placement))
+    sources, rows, done = [], [], 0
+
+    def flush():
+        # Each listing's rows live on its shard
+        for alias in sharding.aliases():
+            on_shard = [pk for pk in sources if placement[pk] == alias]
+            if not on_shard:
+                continue
+            with transaction.atomic(using=alias):
+                SimilarListing.objects.using(alias).filter(
+                    listing_id__in=on_shard
+                ).delete()
+                SimilarListing.objects.using(alias).bulk_create(
+                    row for row in rows if placement[row.listing_id] == alias
+                )
+
+    for column, neighbours, scores in top_k_neighbours(matrix, top_k, chunk_size):
+        listing_id = int(listing_ids[column])
+        sources.append(listing_id)
+        rows.extend(
+            SimilarListing(
+                listing_id=listing_id,
+                similar_id=int(listing_ids[neighbour]),
+                score=float(score),
+                rank=rank,
+            )
+            for rank, (neighbour, score) in enumerate(zip(neighbours, scores))
+        )
+        done += 1
+        if len(sources) >= chunk_size:
+            flush()
+            sources, rows = [], []
+    if sources:
+        flush()
+
+    # Listings that closed or lost every interaction keep no stale rows
+    for alias in sharding.aliases():
+        similar = SimilarListing.objects.using(alias)
+        previous = np.fromiter(
+            similar.values_list("listing_id", flat=True)
+            .distinct()
+            .iterator(chunk_size=FETCH_SIZE),
+            dtype=np.int64,
+        )
+        stale = np.setdiff1d(previous, listing_ids).tolist()
+        for start in range(0, len(stale), chunk_size):
+            similar.filter(listing_id__in=stale[start : start + chunk_size]).delete()
+    return done
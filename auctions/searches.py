@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models import Q
+from auctions import sharding
+from auctions.models import (
+    Listing,
+    OutboxEvent,
+    SavedSearch,
+    SavedSearchMatch,
+    dispatch_notifications_soon,
+    words_in_order,
+)
+
+# Longer descriptions only contribute their first distinct words
+MAX_LISTING_WORDS = 500
+
+
+def listing_terms(listing):
+    """Return (index terms, words, categories) describing a new listing."""
+    text = f"{listing.title} {listing.description or ''}"
+    listing_words = set(words_in_order(text)[:MAX_LISTING_WORDS])
+    categories = set()
+    if listing.category:
+        categories.add(listing.category_id)
+        if listing.category.parent:
+            categories.add(listing.category.parent.name)
+    terms = {SavedSearch.MATCH_ALL}
+    terms.update(f"c:{name}" for name in categories)
+    terms.update(f"w:{word[:100]}" for word in listing_words)
+    return terms, listing_words, categories
+
+
+def candidates(listing, terms):
+    """Saved searches that may match ``listing``, given its index terms."""
+    wanted = Q(index_term__in=terms)
+    price = listing.starting_bid
+    if price is not None:
+        wanted |= (
+            Q(index_term=SavedSearch.price_term(price.currency))
+            & (Q(min_price__isnull=True) | Q(min_price__lte=price))
+            & (Q(max_price__isnull=True) | Q(max_price__gte=price))
+        )
+    return SavedSearch.objects.filter(wanted).exclude(user_id=listing.listed_by_id)
+
+
+def match_listing(listing_id):
+    """Percolate one new listing through the saved searches; return matches.
+
+    Only searches whose index term occurs in the listing are loaded, and
+    price-only searches only when the price is within their bounds, so the
+    cost follows the number of plausible matches rather than the number of
+    saved searches.
+    """
+    # Categories live on default, so they are not joined to the listing
+    listing = Listing.objects.filter(pk=listing_id, closed=False).first()
+    if listing is None:
+        return 0
+    terms, listing_words, categories = listing_terms(listing)
+    matched = [
+        search
+        for search in candidates(listing, terms).iterator()
+        if search.matches(listing, listing_words, categories)
+    ]
+    if not matched:
+        return 0
+    alias = listing._state.db
+    with sharding.atomic(alias):
+        SavedSearchMatch.objects.bulk_create(
+            [SavedSearchMatch(search=search, listing=listing) for search in matched],
+            ignore_conflicts=True,
+        )
+        OutboxEvent.objects.create(
+            kind=OutboxEvent.SEARCH_MATCHED,
+            listing=listing,
+            actor_id=listing.listed_by_id,
+            payload={"users": sorted({search.user_id for search in matched})},
+        )
+        transaction.on_commit(dispatch_notifications_soon, using=alias)
+    return len(matched)
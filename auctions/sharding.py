@@ -0,0 +1,277 @@
+"""Optional horizontal sharding of listings and the rows keyed on them.
+
+AUCTIONS_SHARDS names the database aliases that hold listings, "default"
+first. Default also keeps every global table (users, categories, saved
+searches, jobs, the ListingShard directory). Everything keyed on one listing
+(bids, comments, watchers, proxies, ledger, snapshots, cards, outbox,
+ranking and match rows) lives on that listing's shard. That way a bid and
+its side effects commit in one transaction on one database.
+
+The ListingShard directory maps listing ids to shards and is written for
+every new listing, sharded or not: its auto-increment id becomes the
+listing's primary key, which keeps ids unique across shards and lets
+``move_listing`` rebalance a listing without renumbering it.
+
+ShardRouter picks the database for a query from the model instance it
+concerns when Django passes one. Otherwise it uses the shard selected with
+``using`` or ``for_listing`` around the code, and falls back to default.
+Work over all listings (list pages, search indexes, batch jobs, exports)
+loops over ``aliases()`` or merges per-shard results with ``gather``.
+"""
+import contextvars
+import heapq
+import itertools
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+SHARDED_MODELS = {
+    "listing",
+    "listing_watchers",
+    "bid",
+    "comment",
+    "proxybid",
+    "ledgerevent",
+    "listingsnapshot",
+    "outboxevent",
+    "rankingevent",
+    "listingrank",
+    "listingcard",
+    "similarlisting",
+    "savedsearchmatch",
+}
+CACHE_KEY = "shard:%d"
+
+_current = contextvars.ContextVar("shard", default=None)
+_placement = itertools.count()
+
+
+def aliases():
+    return settings.AUCTIONS_SHARDS
+
+
+def enabled():
+    return len(settings.AUCTIONS_SHARDS) > 1
+
+
+def is_sharded(model):
+    """Whether ``model`` (a class or instance) lives on listing shards."""
+    meta = model._meta
+    return meta.app_label == "auctions" and meta.model_name in SHARDED_MODELS
+
+
+def current():
+    return _current.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def using(alias):
+    """Send queries on sharded models that carry no instance to ``alias``."""
+    token = _current.set(alias)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def for_listing(listing_id):
+    return using(shard_for(listing_id))
+
+
+@contextmanager
+def atomic(alias):
+    """``using(alias)`` plus a transaction on that database."""
+    with using(alias), transaction.atomic(using=alias):
+        yield
+
+
+def shard_for(listing_id):
+    if not enabled() or listing_id is None:
+        return DEFAULT_DB_ALIAS
+    alias = cache.get(CACHE_KEY % listing_id)
+    if alias is None:
+        from auctions.models import ListingShard
+
+        alias = (
+            ListingShard.objects.filter(pk=listing_id)
+            .values_list("shard", flat=True)
+            .first()
+        ) or DEFAULT_DB_ALIAS
+        cache.set(CACHE_KEY % listing_id, alias, None)
+    return alias
+
+
+def allocate():
+    """Reserve a listing id on the next shard in turn; return (id, alias)."""
+    from auctions.models import ListingShard
+
+    shards = aliases()
+    entry = ListingShard.objects.create(shard=shards[next(_placement) % len(shards)])
+    if enabled():
+        cache.set(CACHE_KEY % entry.pk, entry.shard, None)
+    return entry.pk, entry.shard
+
+
+def reserve_ids(count, alias=DEFAULT_DB_ALIAS):
+    """Reserve ``count`` listing ids on one shard, for bulk inserts."""
+    from auctions.models import ListingShard
+
+    entries = ListingShard.objects.bulk_create(
+        [ListingShard(shard=alias) for _ in range(count)]
+    )
+    return [entry.pk for entry in entries]
+
+
+def merged(queryset, limit, key):
+    """The first ``limit`` rows of an ordered ``queryset`` across every shard.
+
+    Each shard returns only its own first ``limit`` rows; the sorted runs
+    are merged k-way by ``key`` and cut to ``limit``.
+    """
+    runs = [queryset.using(alias)[:limit] for alias in aliases()]
+    return list(itertools.islice(heapq.merge(*runs, key=key), limit))
+
+
+def gather(queryset, limit, before=None):
+    """Newest-first page of ``queryset`` across every shard, below the
+    ``before`` id when given."""
+    queryset = queryset.order_by("-pk")
+    if before is not None:
+        queryset = queryset.filter(pk__lt=before)
+    return merged(queryset, limit, key=lambda obj: -obj.pk)
+
+
+def in_bulk(queryset, ids):
+    """``queryset.in_bulk(ids)`` over every shard."""
+    found = {}
+    for alias in aliases():
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            found.update(queryset.using(alias).in_bulk(missing))
+    return found
+
+
+def co_located_models():
+    """Models whose rows move with their listing, bids first."""
+    from auctions.models import Listing, RankingEvent
+
+    models = [
+        relation.related_model
+        for relation in Listing._meta.related_objects
+        if relation.field.name == "listing" and not relation.many_to_many
+    ]
+    return models + [RankingEvent, Listing.watchers.through]
+
+
+def copy_rows(model, objects, keep_pk=False):
+    """bulk_create ``objects`` on the current shard, keeping timestamps that
+    auto_now(_add) would otherwise reset."""
+    stamped = [
+        field.name
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    stamps = [[getattr(obj, name) for name in stamped] for obj in objects]
+    if not keep_pk:
+        for obj in objects:
+            obj.pk = None
+    model._base_manager.bulk_create(objects)
+    if stamped and objects:
+        for obj, values in zip(objects, stamps):
+            for name, value in zip(stamped, values):
+                setattr(obj, name, value)
+        model._base_manager.bulk_update(objects, stamped)
+
+
+def move_listing(listing_id, target):
+    """Copy a listing and its rows to ``target``, repoint the directory, then
+    delete the originals. Returns False when it already lives there.
+
+    Only the listing and rows keyed on it keep their ids; other rows are
+    renumbered by the target shard, with ledger references to bids remapped
+    and snapshots rebuilt. The listing row stays locked on its old shard
+    throughout, so bids wait for the move. Processes may keep reading the
+    old shard until their cache tier syncs; bids placed there in that window
+    fail and can be retried.
+    """
+    from auctions.models import (
+        Bid,
+        LedgerEvent,
+        Listing,
+        ListingShard,
+        ListingSnapshot,
+        RankingEvent,
+    )
+
+    source = shard_for(listing_id)
+    if source == target:
+        return False
+    with atomic(source):
+        listing = Listing.objects.select_for_update().get(pk=listing_id)
+        rows = []
+        for model in co_located_models():
+            if model is not ListingSnapshot:
+                objects = model._base_manager.filter(listing_id=listing_id)
+                rows.append((model, list(objects.order_by("pk"))))
+        with atomic(target):
+            # Left over from an interrupted move
+            Listing.objects.filter(pk=listing_id).delete()
+            copy_rows(Listing, [listing], keep_pk=True)
+            bid_ids = {}
+            for model, objects in rows:
+                if model is LedgerEvent:
+                    # Bids retracted before the move have no row to renumber;
+                    # negating their ids keeps them apart from renumbered ones
+                    for event in objects:
+                        if event.bid_id is not None:
+                            event.bid_id = bid_ids.get(event.bid_id, -event.bid_id)
+                old_ids = [obj.pk for obj in objects]
+                # Ranks and cards are keyed on the listing itself
+                copy_rows(model, objects, keep_pk=model._meta.pk.name == "listing")
+                if model is Bid:
+                    bid_ids = {old: bid.pk for old, bid in zip(old_ids, objects)}
+            state = LedgerEvent.objects.state(listing_id)
+            if state.event_id:
+                ListingSnapshot.from_state(state).save()
+        ListingShard.objects.update_or_create(
+            pk=listing_id, defaults={"shard": target}
+        )
+        Listing.objects.filter(pk=listing_id).delete()
+        RankingEvent.objects.filter(listing_id=listing_id).delete()
+        transaction.on_commit(
+            lambda: cache.delete(CACHE_KEY % listing_id), using=source
+        )
+    return True
+
+
+class ShardRouter:
+    def _route(self, model, **hints):
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(instance):
+            if instance._state.db:
+                return instance._state.db
+            listing_id = getattr(instance, "listing_id", None)
+            if instance._meta.model_name == "listing":
+                listing_id = instance.pk
+            if listing_id is not None:
+                return shard_for(listing_id)
+        return current()
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(obj1) and is_sharded(obj2):
+            return obj1._state.db == obj2._state.db
+        # Sharded rows point at global ones by id only
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        if db in aliases():
+            return app_label == "auctions" and model_name in SHARDED_MODELS
+        return None
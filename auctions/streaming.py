@@ -0,0 +1,57 @@
+"""Streamed list pages.
+
+The page around the listings (head, nav, title) is sent first, so browsers
+start fetching styles and images at once. The listing cards follow in
+chunks of AUCTIONS_STREAM_CHUNK_SIZE as rows come off a server-side cursor,
+so neither time to first byte nor worker memory grows with the list.
+"""
+from itertools import islice
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.template import engines
+from django.template.loader import render_to_string, select_template
+
+MARKER = "<!--listings-->"
+# Any list page with its listings block cut out
+FRAME = engines["django"].from_string(
+    "{% extends page %}{% block listings %}" + MARKER + "{% endblock %}"
+)
+
+
+class StreamingListMixin:
+    """Stream a ListView whose template renders its listings in a
+    ``{% block listings %}`` with ``cards_template_name``."""
+
+    cards_template_name = "auctions/listing_cards.html"
+
+    def render_to_response(self, context, **response_kwargs):
+        if getattr(self.request, "skeleton", False):
+            # Shared pages (auctions.holes) are cached whole
+            return super().render_to_response(context, **response_kwargs)
+        page = select_template(self.get_template_names()).template
+        frame = FRAME.render(dict(context, page=page), self.request)
+        head, tail = frame.split(MARKER)
+        response_kwargs.setdefault("content_type", self.content_type)
+        return StreamingHttpResponse(
+            self.stream(head, context, tail), **response_kwargs
+        )
+
+    def stream(self, head, context, tail):
+        yield head
+        size = settings.AUCTIONS_STREAM_CHUNK_SIZE
+        listings = context["object_list"]
+        if isinstance(listings, QuerySet):
+            listings = listings.iterator(chunk_size=size)
+        listings = iter(listings)
+        chunk = list(islice(listings, size))
+        while True:
+            # The first chunk renders the empty message when there are none
+            yield render_to_string(
+                self.cards_template_name,
+                {"listings": chunk, "empty_message": context.get("empty_message")},
+            )
+            chunk = list(islice(listings, size))
+            if not chunk:
+                break
+        yield tail
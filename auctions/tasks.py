@@ -0,0 +1,57 @@
+from auctions import sharding
+from auctions.analytics import flag_accounts
+from auctions.archive import archive_closed_listings
+from auctions.imports import run_import
+from auctions.jobs import task
+from auctions.models import Category
+from auctions.notifications import dispatch_pending
+from auctions.rankings import apply_pending
+from auctions.recommendations import rebuild_similar_listings
+from auctions.searches import match_listing
+
+
+@task
+def dispatch_notifications():
+    for alias in sharding.aliases():
+        with sharding.using(alias):
+            while dispatch_pending():
+                pass
+
+
+@task
+def reconcile_category_counts():
+    Category.objects.reconcile()
+
+
+@task
+def archive_listings():
+    archive_closed_listings()
+
+
+@task
+def update_rankings():
+    for alias in sharding.aliases():
+        with sharding.using(alias):
+            while apply_pending():
+                pass
+
+
+@task
+def build_similar_listings():
+    rebuild_similar_listings()
+
+
+@task
+def detect_shill_bidding():
+    flag_accounts()
+
+
+@task
+def match_saved_searches(listing_id):
+    with sharding.for_listing(listing_id):
+        match_listing(listing_id)
+
+
+@task
+def import_listings(import_id):
+    run_import(import_id)
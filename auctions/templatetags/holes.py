@@ -0,0 +1,14 @@
+from django import template
+from auctions import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, obj=None):
+    """Per-user markup: a placeholder while rendering a shared skeleton
+    (auctions.holes), otherwise the fragment itself."""
+    request = context["request"]
+    if getattr(request, "skeleton", False):
+        return holes.placeholder(name, obj)
+    return holes.render(request, name, obj)
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.html import avoid_wrapping, conditional_escape
+from django.utils.safestring import mark_safe
+from djmoney.money import Money
+from auctions.formatting import format_money
+
+register = template.Library()
+
+
+@register.filter
+def money(value):
+    """Render Money exactly like ``{{ value }}`` does, only faster."""
+    if not isinstance(value, Money):
+        return value
+    return mark_safe(avoid_wrapping(conditional_escape(format_money(value))))
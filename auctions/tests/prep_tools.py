@@ -1,4 +1,5 @@
 from django.contrib import auth
+from django.http import HttpResponse
 from auctions.models import Listing
 
 User = auth.get_user_model()
@@ -20,3 +21,16 @@ def create_listing(**kwargs) -> Listing:
         listing.save()
     listing.full_clean()
     return listing
+
+
+def buffered(response):
+    """Read a streamed response into a plain one that can be checked more
+    than once, keeping what the test client recorded about it."""
+    if not response.streaming:
+        return response
+    result = HttpResponse(
+        b"".join(response.streaming_content), status=response.status_code
+    )
+    for name in ("client", "request", "templates", "context", "wsgi_request"):
+        setattr(result, name, getattr(response, name))
+    return result
@@ -0,0 +1,81 @@
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from auctions.admin import ListingAdmin
+from auctions.models import (
+    LISTING_PAGE_KEY,
+    Category,
+    Listing,
+    ListingCard,
+    ListingSnapshot,
+)
+from auctions.paginators import EstimatedCountPaginator
+from auctions.tests.prep_tools import create_registered_user
+
+
+class ListingAdminTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.admin = ListingAdmin(Listing, AdminSite())
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+        self.admin.message_user = lambda *args, **kwargs: None
+        return super().setUp()
+
+    MOVE_TEMPLATE = "admin/auctions/listing/move_to_category.html"
+
+    def post(self, data):
+        request = RequestFactory().post("/", data)
+        request.user = self.user
+        return request
+
+    def test_close_action_updates_listings_and_counters(self):
+        Listing.objects.create(title="a", category_id=Listing.TOYS, listed_by=self.user)
+        Listing.objects.create(title="b", category_id=Listing.TOYS, listed_by=self.user)
+        Category.objects.cached()
+        self.admin.close_listings(self.request, Listing.objects.all())
+        self.assertFalse(Listing.objects.filter(closed=False).exists())
+        self.assertIsNone(cache.get(Category.objects.CACHE_KEY))
+        toys = Category.objects.get(name=Listing.TOYS)
+        self.assertEqual((toys.active_count, toys.closed_count), (0, 2))
+        self.assertEqual(ListingSnapshot.objects.filter(closed=True).count(), 2)
+
+    def test_move_action_asks_for_the_category_then_moves(self):
+        listing = Listing.objects.create(
+            title="a", category_id=Listing.TOYS, listed_by=self.user
+        )
+        cache.set(LISTING_PAGE_KEY % listing.pk, 1)
+        Category.objects.cached()
+        selected = {"action": "move_to_category", "_selected_action": [listing.pk]}
+        response = self.admin.move_to_category(
+            self.post(selected), Listing.objects.all()
+        )
+        self.assertEqual(response.template_name, self.MOVE_TEMPLATE)
+        self.assertEqual(Listing.objects.get().category_id, Listing.TOYS)
+        home = Category.objects.get(name=Listing.HOME)
+        request = self.post({**selected, "apply": "1", "category": home.pk})
+        self.assertIsNone(self.admin.move_to_category(request, Listing.objects.all()))
+        self.assertEqual(Listing.objects.get().category_id, Listing.HOME)
+        self.assertEqual(ListingCard.objects.get().category, Listing.HOME)
+        self.assertEqual(Category.objects.get(name=Listing.TOYS).active_count, 0)
+        self.assertEqual(Category.objects.get(name=Listing.HOME).active_count, 1)
+        self.assertIsNone(cache.get(LISTING_PAGE_KEY % listing.pk))
+        self.assertIsNone(cache.get(Category.objects.CACHE_KEY))
+
+    def test_move_form_renders_from_the_changelist(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        listing = Listing.objects.create(title="a", listed_by=self.user)
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:auctions_listing_changelist"),
+            {"action": "move_to_category", "_selected_action": [listing.pk]},
+        )
+        self.assertTemplateUsed(response, self.MOVE_TEMPLATE)
+        self.assertContains(response, "Move 1 listing to:")
+
+    def test_estimated_paginator_falls_back_to_exact_count(self):
+        Listing.objects.create(title="a", listed_by=self.user)
+        paginator = EstimatedCountPaginator(Listing.objects.order_by("pk"), 10)
+        self.assertEqual(paginator.count, 1)
@@ -0,0 +1,65 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from auctions import analytics
+from auctions.models import Bid, FlaggedAccount, Listing
+from auctions.tests.prep_tools import create_registered_user
+
+
+class ShillBiddingTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.shill = create_registered_user("sam")
+        self.buyer = create_registered_user("max")
+        self.other = create_registered_user("ann")
+        return super().setUp()
+
+    def bid(self, listing, bidder, amount):
+        Bid.objects.create(listing=listing, bidder=bidder, amount=amount)
+
+    def test_flags_bidder_pushing_one_sellers_prices(self):
+        for i in range(3):
+            listing = Listing.objects.create(title=f"Lamp {i}", listed_by=self.seller)
+            # The shill always bids just under the real buyer and never wins
+            self.bid(listing, self.shill, 10)
+            self.bid(listing, self.buyer, "10.10")
+            self.bid(listing, self.shill, 20)
+            self.bid(listing, self.buyer, "20.20")
+        for i in range(3):
+            listing = Listing.objects.create(title=f"Vase {i}", listed_by=self.other)
+            self.bid(listing, self.buyer, 10)
+
+        self.assertEqual(analytics.flag_accounts(), 1)
+        flagged = FlaggedAccount.objects.get()
+        self.assertEqual(
+            (flagged.bidder, flagged.seller, flagged.bid_count),
+            (self.shill, self.seller, 6),
+        )
+        self.assertEqual(flagged.affinity, 1.0)
+        self.assertEqual(flagged.losing_rate, 1.0)
+        self.assertEqual(flagged.near_increment_rate, 1.0)
+
+    def test_bidding_on_own_listings_scores_highest(self):
+        for i in range(3):
+            listing = Listing.objects.create(title=f"Lamp {i}", listed_by=self.seller)
+            self.bid(listing, self.seller, 10 + i)
+            self.bid(listing, self.seller, 20 + i)
+        analytics.flag_accounts()
+        flagged = FlaggedAccount.objects.get()
+        self.assertEqual((flagged.bidder, flagged.score), (self.seller, 1.0))
+
+    def test_rerun_replaces_flags_and_respects_support(self):
+        FlaggedAccount.objects.create(
+            bidder=self.shill,
+            seller=self.seller,
+            score=1.0,
+            bid_count=9,
+            affinity=1.0,
+            losing_rate=1.0,
+            near_increment_rate=1.0,
+        )
+        listing = Listing.objects.create(title="Lamp", listed_by=self.seller)
+        self.bid(listing, self.shill, 10)
+        self.bid(listing, self.buyer, "10.10")
+        call_command("detect_shill_bidding", stdout=StringIO())
+        self.assertFalse(FlaggedAccount.objects.exists())
@@ -0,0 +1,115 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from auctions.archive import archive_closed_listings
+from auctions.models import ArchivedListing, Bid, Category, LedgerEvent, Listing
+from auctions.tests.prep_tools import buffered, create_registered_user
+
+
+class ArchiveTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.bidder = create_registered_user("max")
+        return super().setUp()
+
+    def create_closed_listing(self, days_ago, **kwargs):
+        listing = Listing.objects.create(
+            title="Sweet Thing", listed_by=self.user, starting_bid=2, **kwargs
+        )
+        Bid.objects.create(listing=listing, amount=3, bidder=self.user)
+        Bid.objects.create(listing=listing, amount=5, bidder=self.bidder)
+        listing.comments.create(commenter=self.user, text="best ever")
+        listing.watchers.add(self.bidder)
+        listing.close(self.user)
+        Listing.objects.filter(pk=listing.pk).update(
+            closed_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return listing
+
+    def test_moves_old_closed_listings_with_bids_and_comments(self):
+        listing = self.create_closed_listing(days_ago=100)
+        moved = archive_closed_listings(older_than=timedelta(days=90))
+        self.assertEqual(moved, 1)
+        self.assertFalse(Listing.objects.exists())
+        self.assertFalse(Bid.objects.exists())
+        archived = ArchivedListing.objects.get(pk=listing.pk)
+        self.assertEqual(archived.winner, self.bidder)
+        self.assertEqual(archived.price.amount, 5)
+        self.assertEqual(archived.bid_count, 2)
+        self.assertEqual(archived.watcher_count, 1)
+        self.assertEqual(archived.comment_texts, ["best ever"])
+
+    def test_keeps_the_ledger_for_disputes(self):
+        listing = self.create_closed_listing(days_ago=100)
+        live = listing.ledger_state().as_dict()
+        first_bid = LedgerEvent.objects.order_by("id").first().created
+        archive_closed_listings(older_than=timedelta(days=90))
+        self.assertFalse(LedgerEvent.objects.exists())
+        archived = ArchivedListing.objects.get(pk=listing.pk)
+        state = archived.ledger_state()
+        self.assertEqual((state.closed, state.highest_bid.amount), (True, 5))
+        self.assertEqual(state.as_dict()["bids"], live["bids"])
+        self.assertEqual(len(archived.ledger_state(at=first_bid).bids), 1)
+        out = StringIO()
+        call_command("replay_ledger", listing=listing.pk, stdout=out)
+        self.assertTrue(json.loads(out.getvalue())["closed"])
+
+    def test_leaves_recently_closed_and_open_listings(self):
+        self.create_closed_listing(days_ago=1)
+        Listing.objects.create(title="Open", listed_by=self.user)
+        moved = archive_closed_listings(older_than=timedelta(days=90))
+        self.assertEqual(moved, 0)
+        self.assertEqual(Listing.objects.count(), 2)
+
+    def test_archives_in_batches(self):
+        for _ in range(3):
+            self.create_closed_listing(days_ago=100)
+        moved = archive_closed_listings(
+            older_than=timedelta(days=90), batch_size=2, max_batches=1
+        )
+        self.assertEqual(moved, 2)
+        self.assertEqual(ArchivedListing.objects.count(), 2)
+
+    def test_archived_listing_still_counts_as_closed(self):
+        self.create_closed_listing(days_ago=100, category_id=Listing.TOYS)
+        archive_closed_listings(older_than=timedelta(days=90))
+        self.assertEqual(Category.objects.reconcile(), [])
+        self.assertEqual(Category.objects.get(name=Listing.TOYS).closed_count, 1)
+
+    def test_closed_listings_page_reads_through_archive(self):
+        listing = self.create_closed_listing(days_ago=100)
+        archive_closed_listings(older_than=timedelta(days=90))
+        response = buffered(self.client.get(reverse("closed-listings")))
+        self.assertContains(response, "Sweet Thing")
+        self.assertContains(response, listing.get_absolute_url())
+
+    @override_settings(AUCTIONS_SHARD_PAGE_SIZE=2)
+    def test_closed_listings_page_merges_archive_newest_first(self):
+        old = [self.create_closed_listing(days_ago=100) for _ in range(2)]
+        archive_closed_listings(older_than=timedelta(days=90))
+        recent = self.create_closed_listing(days_ago=1)
+        ids = [recent.pk, old[1].pk, old[0].pk]
+        response = self.client.get(reverse("closed-listings"))
+        self.assertEqual([obj.pk for obj in response.context["object_list"]], ids[:2])
+        response = self.client.get(
+            reverse("closed-listings"), {"before": response.context["next_before"]}
+        )
+        self.assertEqual([obj.pk for obj in response.context["object_list"]], ids[2:])
+        self.assertNotIn("next_before", response.context)
+
+    def test_detail_page_reads_through_archive(self):
+        listing = self.create_closed_listing(days_ago=100)
+        archive_closed_listings(older_than=timedelta(days=90))
+        self.client.force_login(self.bidder)
+        response = self.client.get(listing.get_absolute_url())
+        self.assertTemplateUsed(response, "auctions/archived_listing_detail.html")
+        self.assertContains(response, "You won this item!")
+        self.assertContains(response, "best ever")
+
+    def test_unknown_listing_is_still_404(self):
+        response = self.client.get(reverse("listing-detail", args=[999]))
+        self.assertEqual(response.status_code, 404)
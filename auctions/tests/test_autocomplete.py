@@ -0,0 +1,80 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions.autocomplete import TitleIndex, index
+from auctions.models import Listing
+from auctions.tests.prep_tools import create_registered_user
+
+
+class TitleIndexTest(TestCase):
+    def setUp(self) -> None:
+        self.index = TitleIndex()
+        self.index.load(
+            [
+                (1, "Vintage Lamp", 1),
+                (2, "Lamp shade", 5),
+                (3, "Laptop stand", 3),
+                (4, "Desk", 9),
+            ]
+        )
+        return super().setUp()
+
+    def titles(self, prefix, limit=10):
+        return [found["title"] for found in self.index.suggest(prefix, limit)]
+
+    def test_matches_word_prefixes_by_popularity(self):
+        self.assertEqual(
+            self.titles("la"), ["Lamp shade", "Laptop stand", "Vintage Lamp"]
+        )
+        self.assertEqual(self.titles("LAMP"), ["Lamp shade", "Vintage Lamp"])
+        self.assertEqual(self.titles("la", limit=1), ["Lamp shade"])
+        self.assertEqual(self.titles("lamps"), [])
+        self.assertEqual(self.titles(" "), [])
+
+    def test_incremental_updates_refresh_short_prefixes(self):
+        self.assertEqual(
+            self.titles("l"), ["Lamp shade", "Laptop stand", "Vintage Lamp"]
+        )
+        self.index.remove(2)
+        self.index.add(5, "Lantern")
+        self.assertEqual(
+            self.titles("l"), ["Laptop stand", "Vintage Lamp", "Lantern"]
+        )
+        self.assertEqual(self.titles("lamp"), ["Vintage Lamp"])
+
+    @override_settings(AUCTIONS_AUTOCOMPLETE_MAX_LISTINGS=2)
+    def test_keeps_most_watched_listings_within_bound(self):
+        self.index.load([(1, "Lamp", 1), (2, "Lamp shade", 5), (3, "Lantern", 3)])
+        self.index.add(4, "Ladder")
+        self.assertEqual(self.titles("la"), ["Lamp shade", "Lantern"])
+
+
+class AutocompleteViewTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.watcher = create_registered_user("max")
+        index.reset()
+        self.addCleanup(index.reset)
+        return super().setUp()
+
+    def test_suggests_active_titles_and_follows_creates_and_closes(self):
+        lamp = Listing.objects.create(title="Lamp", listed_by=self.user)
+        shade = Listing.objects.create(title="Lamp shade", listed_by=self.user)
+        shade.watchers.add(self.watcher)
+        url = reverse("autocomplete")
+        response = self.client.get(url, {"q": "lam"})
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {"id": shade.pk, "title": "Lamp shade"},
+                    {"id": lamp.pk, "title": "Lamp"},
+                ]
+            },
+        )
+        lamp.close(self.user)
+        Listing.objects.create(title="Lamp post", listed_by=self.user)
+        index.sync()
+        self.assertEqual(
+            [found["title"] for found in index.suggest("lam")],
+            ["Lamp shade", "Lamp post"],
+        )
@@ -0,0 +1,96 @@
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions import bidding
+from auctions.models import Bid, Listing
+from auctions.tests.prep_tools import create_registered_user
+
+
+@override_settings(AUCTIONS_BID_INCREMENT="1.00")
+class ProxyBiddingTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        self.listing = Listing.objects.create(
+            title="Sweet Thing", listed_by=self.seller, starting_bid=5
+        )
+        return super().setUp()
+
+    def visible(self):
+        return [
+            (bid.bidder.username, bid.amount.amount)
+            for bid in self.listing.bids.order_by("amount")
+        ]
+
+    def test_single_proxy_opens_at_starting_bid(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "50.00")
+        self.assertEqual(self.visible(), [("alice", Decimal("5.00"))])
+
+    def test_competing_proxies_settle_one_increment_above_runner_up(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "50.00")
+        bidding.place_proxy_bid(self.listing, self.bob, "30.00")
+        self.assertEqual(
+            self.visible(),
+            [
+                ("alice", Decimal("5.00")),
+                ("bob", Decimal("30.00")),
+                ("alice", Decimal("31.00")),
+            ],
+        )
+        self.assertEqual(self.listing.highest_bidder, self.alice)
+
+    def test_higher_new_proxy_takes_the_lead(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "20.00")
+        bidding.place_proxy_bid(self.listing, self.bob, "40.00")
+        self.assertEqual(self.listing.highest_bidder, self.bob)
+        self.assertEqual(self.listing.highest_bid.amount, Decimal("21.00"))
+
+    def test_equal_maxima_go_to_the_earlier_proxy(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "20.00")
+        bidding.place_proxy_bid(self.listing, self.bob, "20.00")
+        self.assertEqual(self.listing.highest_bidder, self.alice)
+        self.assertEqual(self.listing.highest_bid.amount, Decimal("20.00"))
+
+    def test_manual_bid_is_answered_by_proxy(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "50.00")
+        bidding.place_bid(self.listing, self.bob, "10.00")
+        self.assertEqual(self.listing.highest_bidder, self.alice)
+        self.assertEqual(self.listing.highest_bid.amount, Decimal("11.00"))
+
+    def test_manual_bid_above_proxy_max_wins(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "20.00")
+        bidding.place_bid(self.listing, self.bob, "25.00")
+        self.assertEqual(self.listing.highest_bidder, self.bob)
+
+    def test_max_follows_bid_rules(self):
+        with self.assertRaises(ValidationError):
+            bidding.place_proxy_bid(self.listing, self.alice, "4.00")
+        self.listing.close(self.seller)
+        with self.assertRaises(ValidationError):
+            bidding.place_proxy_bid(self.listing, self.alice, "40.00")
+        self.assertEqual(Bid.objects.count(), 0)
+
+    def test_max_can_only_be_raised(self):
+        bidding.place_proxy_bid(self.listing, self.alice, "50.00")
+        with self.assertRaises(ValidationError):
+            bidding.place_proxy_bid(self.listing, self.alice, "40.00")
+
+    def test_each_proxy_writes_at_most_two_bids(self):
+        for i in range(1, 21):
+            user = create_registered_user(f"user{i}")
+            bidding.place_proxy_bid(self.listing, user, f"{i * 10}.00")
+        self.assertLessEqual(self.listing.bids.count(), 2 * 20)
+        self.assertEqual(self.listing.highest_bidder.username, "user20")
+        self.assertEqual(self.listing.highest_bid.amount, Decimal("191.00"))
+
+    def test_set_max_bid_from_detail_page(self):
+        self.client.force_login(self.alice)
+        response = self.client.post(
+            reverse("listing-detail", args=[self.listing.pk]),
+            data={"action": "set-max-bid", "amount": "30.00"},
+        )
+        self.assertRedirects(response, self.listing.get_absolute_url())
+        response = self.client.get(self.listing.get_absolute_url())
+        self.assertContains(response, "Bidding for you up to")
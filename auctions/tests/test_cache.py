@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions.cache import CHANGE_KEY, GENERATION_KEY, TieredCache
+from auctions.models import Category
+from auctions.tests.prep_tools import create_registered_user
+
+SHARED = {"shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=SHARED)
+class TieredCacheTest(TestCase):
+    def worker(self, name, **options):
+        # Each worker stands in for a separate process with its own local tier
+        options = {"SHARED": "shared", "CHECK_INTERVAL": 0, **options}
+        return TieredCache(f"{self.id()}-{name}", {"OPTIONS": options})
+
+    def test_reads_are_served_locally_after_first_fill(self):
+        web = self.worker("web")
+        web.shared.set("greeting", "hello")
+        self.assertEqual(web.get("greeting"), "hello")
+        self.assertEqual(web.get("greeting"), "hello")
+        self.assertIsNone(web.get("missing"))
+        stats = web.stats()
+        self.assertEqual(stats["local"]["hits"], 1)
+        self.assertEqual(stats["shared"], {"hits": 1, "misses": 1})
+
+    def test_writes_invalidate_other_workers(self):
+        web, worker = self.worker("web"), self.worker("worker")
+        web.set("feed", (1, 2))
+        self.assertEqual(worker.get("feed"), (1, 2))
+        web.set("feed", (3,))
+        self.assertEqual(worker.get("feed"), (3,))
+        web.delete("feed")
+        self.assertIsNone(worker.get("feed"))
+
+    def test_stale_reads_bounded_by_check_interval(self):
+        web, worker = self.worker("web"), self.worker("worker", CHECK_INTERVAL=60)
+        web.set("feed", (1,))
+        self.assertEqual(worker.get("feed"), (1,))
+        web.set("feed", (2,))
+        self.assertEqual(worker.get("feed"), (1,))
+
+    def test_falling_behind_the_change_log_clears_local_tier(self):
+        web, worker = self.worker("web"), self.worker("worker", CHANGE_LOG=2)
+        web.set("feed", (1,))
+        worker.get("feed")
+        for i in range(3):
+            web.set(f"other-{i}", i)
+        web.shared.set("feed", (2,))
+        self.assertEqual(worker.get("feed"), (2,))
+
+    def test_expired_changes_clear_the_local_tier(self):
+        web = self.worker("web", LOCAL_TIMEOUT=0)
+        worker = self.worker("worker")
+        web.set("feed", (1,))
+        self.assertEqual(worker.get("feed"), (1,))
+        web.set("feed", (2,))
+        generation = web.shared.get(GENERATION_KEY)
+        self.assertIsNone(web.shared.get(CHANGE_KEY % generation))
+        self.assertEqual(worker.get("feed"), (2,))
+
+    def test_local_tier_is_bounded(self):
+        web = self.worker("web", MAX_ENTRIES=2)
+        for key in ("a", "b", "c"):
+            web.set(key, key)
+        self.assertEqual(web.stats()["local"]["evictions"], 1)
+        self.assertEqual(web.stats()["local"]["entries"], 2)
+        self.assertEqual(web.get("a"), "a")
+        self.assertEqual(web.stats()["shared"], {"hits": 1})
+
+    def test_local_entries_expire(self):
+        web = self.worker("web", LOCAL_TIMEOUT=0)
+        web.set("feed", (1,))
+        web.get("feed")
+        self.assertEqual(web.stats()["local"]["expirations"], 1)
+
+
+class CachedCategoriesTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(create_registered_user("joe"))
+        return super().setUp()
+
+    def test_categories_page_reads_list_from_cache(self):
+        self.client.get(reverse("categories"))
+        # session, user, watchlist count
+        with self.assertNumQueries(3):
+            self.client.get(reverse("categories"))
+
+    def test_category_changes_invalidate_list(self):
+        self.client.get(reverse("categories"))
+        Category.objects.create(name="Garden")
+        self.assertContains(self.client.get(reverse("categories")), ">Garden<")
+
+    def test_stats_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse("cache-stats")).status_code, 403)
+        staff = create_registered_user("admin")
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        stats = self.client.get(reverse("cache-stats")).json()
+        self.assertEqual(set(stats), {"local", "shared"})
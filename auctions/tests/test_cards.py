@@ -0,0 +1,95 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from djmoney.money import Money
+from auctions import cards
+from auctions.imports import import_listings, read_rows
+from auctions.models import Listing, ListingCard
+from auctions.tests.prep_tools import buffered, create_registered_user
+
+
+class ListingCardTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        self.listing = Listing.objects.create(
+            title="Lamp",
+            starting_bid=Money(3, "USD"),
+            category_id=Listing.HOME,
+            listed_by=self.seller,
+        )
+        return super().setUp()
+
+    def fresh(self):
+        return Listing.objects.get(pk=self.listing.pk)
+
+    def card(self):
+        return ListingCard.objects.get(pk=self.listing.pk)
+
+    def test_card_follows_bids_retractions_and_closing(self):
+        card = self.card()
+        self.assertEqual(
+            (card.title, card.price, card.bid_count, card.seller, card.category),
+            ("Lamp", Money(3, "USD"), 0, "joe", Listing.HOME),
+        )
+        self.fresh().place_bid(self.alice, 5)
+        top = self.fresh().place_bid(self.bob, 7)
+        card = self.card()
+        self.assertEqual((card.price, card.bid_count), (Money(7, "USD"), 2))
+        top.delete()
+        card = self.card()
+        self.assertEqual((card.price, card.bid_count), (Money(5, "USD"), 1))
+        self.fresh().close(self.seller)
+        self.assertTrue(self.card().closed)
+        self.assertEqual(list(cards.check()), [])
+
+    def test_check_finds_and_fixes_stale_cards(self):
+        other = Listing.objects.create(title="Rug", listed_by=self.seller)
+        self.fresh().place_bid(self.alice, 5)
+        ListingCard.objects.filter(pk=self.listing.pk).update(
+            title="Old", bid_count=0
+        )
+        ListingCard.objects.filter(pk=other.pk).delete()
+        stale = {card.pk: fields for card, fields in cards.check(batch_size=1)}
+        self.assertEqual(
+            stale, {self.listing.pk: ["title", "bid_count"], other.pk: ["missing"]}
+        )
+        with self.assertRaises(CommandError):
+            call_command("check_listing_cards", stdout=StringIO())
+        out = StringIO()
+        call_command("check_listing_cards", fix=True, stdout=out)
+        self.assertIn("Fixed 2 listing cards", out.getvalue())
+        self.assertEqual(self.card().title, "Lamp")
+        self.assertEqual(list(cards.check()), [])
+
+    def test_rebuild_rewrites_every_card(self):
+        Listing.objects.create(title="Rug", listed_by=self.seller)
+        self.fresh().place_bid(self.alice, 5)
+        ListingCard.objects.update(price=None, seller="")
+        out = StringIO()
+        call_command("rebuild_listing_cards", batch_size=1, stdout=out)
+        self.assertIn("Rebuilt 2 listing cards", out.getvalue())
+        self.assertEqual(self.card().price, Money(5, "USD"))
+        self.assertEqual(list(cards.check()), [])
+
+    def test_imports_write_cards(self):
+        rows = '{"title": "Vase", "starting_bid": "4", "currency": "USD"}\n'
+        import_listings(read_rows(StringIO(rows), "ndjson"), self.seller)
+        card = ListingCard.objects.get(title="Vase")
+        self.assertEqual((card.seller, card.price), ("joe", Money(4, "USD")))
+
+    def test_list_pages_read_cards(self):
+        self.fresh().place_bid(self.alice, 5)
+        # Only the card changes what the list pages show
+        ListingCard.objects.filter(pk=self.listing.pk).update(title="Lamp (card)")
+        response = buffered(self.client.get(reverse("index")))
+        self.assertContains(response, "Lamp (card)")
+        self.assertContains(response, "1 bid &middot; Listed by joe in Home")
+        response = buffered(
+            self.client.get(reverse("listings-in-category", args=[Listing.HOME]))
+        )
+        self.assertContains(response, "Lamp (card)")
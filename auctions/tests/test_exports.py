@@ -0,0 +1,101 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from auctions.archive import archive_closed_listings
+from auctions.models import Bid, Listing
+from auctions.tests.prep_tools import create_registered_user
+
+
+class ExportTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.staff = create_registered_user("boss")
+        self.staff.is_staff = True
+        self.staff.save()
+        self.listing = Listing.objects.create(
+            title="Gadget", category_id=Listing.TOYS, listed_by=self.user
+        )
+        self.listing.watchers.add(self.user, self.staff)
+        Bid.objects.create(listing=self.listing, amount=5, bidder=self.user)
+        Listing.objects.create(title="Shirt", listed_by=self.user).close(self.user)
+        return super().setUp()
+
+    def get_export(self, name, **params):
+        response = self.client.get(reverse("export", args=name.split(".")), params)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("export", args=["listings", "csv"]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_streams_listings_csv_with_watch_counts(self):
+        self.client.force_login(self.staff)
+        response, content = self.get_export("listings.csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = content.splitlines()
+        self.assertTrue(lines[0].startswith("id,title,category"))
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith(",False,,2"))
+
+    def test_filters_by_closed_and_category(self):
+        self.client.force_login(self.staff)
+        _, content = self.get_export("listings.ndjson", closed="true")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Shirt"])
+        _, content = self.get_export("bids.ndjson", category=Listing.TOYS)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows[0]["bidder"], "joe")
+        self.assertEqual(rows[0]["amount"], "5.00")
+
+    def test_bids_are_dated_by_when_they_were_placed(self):
+        Bid.objects.update(created=timezone.now() - timedelta(days=3))
+        self.listing.place_bid(self.staff, 7)
+        self.client.force_login(self.staff)
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        _, content = self.get_export("bids.ndjson", since=since)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["amount"] for row in rows], ["7.00"])
+        self.assertTrue(rows[0]["created"])
+
+    def test_exports_cover_the_archive(self):
+        self.listing.close(self.user)
+        Listing.objects.filter(pk=self.listing.pk).update(
+            closed_at=timezone.now() - timedelta(days=100)
+        )
+        archive_closed_listings(older_than=timedelta(days=90))
+        self.client.force_login(self.staff)
+        _, content = self.get_export("listings.ndjson", closed="true")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Shirt", "Gadget"])
+        self.assertEqual((rows[1]["listed_by"], rows[1]["watch_count"]), ("joe", 2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        _, content = self.get_export("bids.ndjson", since=since)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            (rows[0]["listing"], rows[0]["bidder"], rows[0]["amount"]),
+            (self.listing.pk, "joe", "5.00"),
+        )
+        self.assertEqual(rows[0]["currency"], "USD")
+        self.assertTrue(rows[0]["id"] and rows[0]["created"])
+        _, content = self.get_export("bids.ndjson", closed="false")
+        self.assertEqual(content, "")
+
+    def test_invalid_filter_is_bad_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("export", args=["bids", "csv"]), {"since": "yesterday"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command("export_data", "bids", "--format", "csv", stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines()[0], "id,listing,bidder,amount,currency,created"
+        )
@@ -0,0 +1,29 @@
+from decimal import Decimal
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from django.utils import translation
+from djmoney.money import Money
+from auctions.formatting import format_money
+
+AMOUNTS = ["0", "-0", "0.005", "7", "-1234.5", "1234567.891", "1E+3", "99999999.995"]
+
+
+class FormatMoneyTest(SimpleTestCase):
+    def test_matches_djmoney_across_locales_and_currencies(self):
+        for language in ("en-us", "de", "fr", "de-ch", "en-in", "ar", "ja"):
+            for currency in ("USD", "EUR", "JPY", "BHD", "INR"):
+                for amount in AMOUNTS:
+                    money = Money(Decimal(amount), currency)
+                    with self.subTest(language=language, money=money):
+                        with translation.override(language):
+                            self.assertEqual(format_money(money), str(money))
+
+    def test_custom_format_options_use_djmoney(self):
+        money = Money("1234.5", "USD", format_options={"format": "#,##0.00 ¤¤"})
+        self.assertEqual(format_money(money), "1,234.50 USD")
+
+    def test_filter_renders_like_the_plain_variable(self):
+        context = Context({"price": Money("1234.5", "EUR"), "missing": None})
+        plain = Template("{{ price }} {{ missing }}").render(context)
+        filtered = Template("{% load money %}{{ price|money }} {{ missing|money }}")
+        self.assertEqual(filtered.render(context), plain)
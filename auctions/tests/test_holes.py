@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions.tests.prep_tools import create_listing, create_registered_user
+
+
+@override_settings(AUCTIONS_PAGE_CACHE_SECONDS=60)
+class SharedPageTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        self.listing = create_listing(
+            title="Lamp", listed_by=self.seller, watched_by=[self.alice]
+        )
+        self.url = self.listing.get_absolute_url()
+        return super().setUp()
+
+    def test_signed_in_users_share_the_page_with_their_own_holes(self):
+        self.listing.place_bid(self.alice, 5)
+        self.assertContains(self.client.get(self.url), "Not signed in.")
+        self.client.force_login(self.alice)
+        response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, "auctions/listing_detail.html")
+        self.assertContains(response, "Signed in as <strong>alice</strong>")
+        self.assertContains(response, "badge-info")
+        self.assertContains(
+            response, '<span class="is-current-bid">is</span>', html=True
+        )
+        self.assertRegex(
+            response.content.decode(),
+            r'name="csrfmiddlewaretoken" value="[A-Za-z0-9]{64}"',
+        )
+        self.assertNotContains(response, "<!--hole:")
+        self.client.force_login(self.bob)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, "alice")
+        self.assertNotContains(response, "badge-info")
+        self.assertNotContains(response, "close-button")
+
+    def test_seller_gets_the_close_button(self):
+        self.client.get(self.url)
+        self.client.force_login(self.seller)
+        self.assertContains(self.client.get(self.url), "close-button")
+
+    def test_bids_and_comments_retire_the_cached_page(self):
+        self.client.get(self.url)
+        self.listing.place_bid(self.bob, 7)
+        self.assertContains(self.client.get(self.url), "$7.00")
+        self.listing.comments.create(commenter=self.bob, text="Still boxed?")
+        self.assertContains(self.client.get(self.url), "Still boxed?")
+
+    def test_list_pages_are_shared_but_not_the_watchlist(self):
+        self.client.get(reverse("index"))
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse("index"))
+        self.assertTemplateNotUsed(response, "auctions/index.html")
+        self.assertContains(response, "Lamp")
+        self.assertContains(
+            response,
+            '<span class="watchlist-count badge badge-secondary">1</span>',
+            html=True,
+        )
+        response = self.client.get(reverse("watchlist"))
+        self.assertTemplateUsed(response, "auctions/index.html")
+        self.assertContains(response, "Lamp")
@@ -0,0 +1,109 @@
+import io
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+import auctions.tasks  # noqa: F401 registers the project's tasks
+from auctions import jobs
+from auctions.imports import import_listings, read_rows
+from auctions.models import Category, Listing, ListingImport
+from auctions.tests.prep_tools import create_registered_user
+
+CSV = """title,description,starting_bid,currency,category,listed_by
+Lego Set,Bricks,12.50,USD,Toys,
+Bad Price,,2x,USD,,
+Lamp,,,,Home,max
+,,,,,
+Mystery,,,,Nowhere,
+"""
+
+
+class ImportListingsTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.max = create_registered_user("max")
+        return super().setUp()
+
+    def test_imports_valid_rows_and_reports_bad_ones(self):
+        result = import_listings(read_rows(io.StringIO(CSV), "csv"), self.user)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [3, 5, 6])
+        self.assertIn("Invalid starting bid", result.errors[0][1])
+        lego = Listing.objects.get(title="Lego Set")
+        self.assertEqual(lego.starting_bid.amount, 12.5)
+        self.assertEqual(lego.listed_by, self.user)
+        self.assertEqual(Listing.objects.get(title="Lamp").listed_by, self.max)
+
+    def test_import_keeps_category_counters(self):
+        import_listings(read_rows(io.StringIO(CSV), "csv"), self.user, batch_size=2)
+        self.assertEqual(Category.objects.get(name=Listing.TOYS).active_count, 1)
+        self.assertEqual(Category.objects.reconcile(), [])
+
+    def test_reads_ndjson(self):
+        rows = '{"title": "Kite", "starting_bid": "3", "currency": "USD"}\n'
+        result = import_listings(read_rows(io.StringIO(rows), "ndjson"), self.user)
+        self.assertEqual(result.created, 1)
+
+    def test_unusable_starting_bids_are_row_errors(self):
+        rows = [
+            {"title": "No currency", "starting_bid": "5"},
+            {"title": "Bad currency", "starting_bid": "5", "currency": "XYZ"},
+            {"title": "Not a number", "starting_bid": "NaN", "currency": "USD"},
+            {"title": "Too precise", "starting_bid": "1.234", "currency": "USD"},
+            {"title": "Free", "currency": "USD"},
+        ]
+        result = import_listings(enumerate(rows, start=1), self.user)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [1, 2, 3, 4])
+        self.assertIn("needs a currency", result.errors[0][1])
+        self.assertIn("Unsupported currency", result.errors[1][1])
+        self.assertEqual(Listing.objects.get().title, "Free")
+
+    def test_bad_ndjson_lines_are_row_errors(self):
+        rows = (
+            '{"title": "Kite", "starting_bid": "3", "currency": "USD"}\n'
+            "\n"
+            '{"title": "Broken",\n'
+            '["not", "an", "object"]\n'
+            '{"title": "Yoyo", "starting_bid": "2", "currency": "USD"}\n'
+        )
+        result = import_listings(read_rows(io.StringIO(rows), "ndjson"), self.user)
+        self.assertEqual(result.created, 2)
+        # Blank lines still count
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertIn("Invalid JSON", result.errors[0][1])
+        self.assertEqual(result.errors[1][1], "Expected a JSON object")
+
+    def test_upload_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("import-listings"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_upload(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile("listings.csv", CSV.encode())
+        response = self.client.post(reverse("import-listings"), {"file": upload})
+        listing_import = ListingImport.objects.get()
+        status = reverse("listing-import", args=[listing_import.pk])
+        self.assertRedirects(response, status)
+        # Nothing is imported until the job runs
+        self.assertFalse(Listing.objects.exists())
+        response = self.client.get(status)
+        self.assertContains(response, "Importing")
+        self.assertEqual(response["Refresh"], "2")
+        self.assertEqual(jobs.work(queues=["imports"]), 1)
+        response = self.client.get(status)
+        self.assertContains(response, "Imported <strong>2</strong> listings.")
+        self.assertContains(response, "Line 3:")
+        self.assertFalse(response.has_header("Refresh"))
+        self.assertEqual(ListingImport.objects.get().data, "")
+
+    def test_upload_that_is_not_utf8_is_rejected(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile("listings.csv", b"title\n\xff\xfe\n")
+        response = self.client.post(reverse("import-listings"), {"file": upload})
+        self.assertContains(response, "Could not read file")
+        self.assertFalse(ListingImport.objects.exists())
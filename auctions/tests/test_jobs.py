@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from auctions import jobs
+import auctions.tasks  # noqa: F401 registers the project's tasks
+from auctions.models import Job, Listing, OutboxEvent
+from auctions.tests.prep_tools import create_registered_user
+
+calls = []
+
+
+@jobs.task
+def record(value):
+    calls.append(value)
+
+
+@jobs.task
+def explode():
+    raise RuntimeError("boom")
+
+
+RECORD = f"{__name__}.record"
+EXPLODE = f"{__name__}.explode"
+
+
+class JobQueueTest(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+        return super().setUp()
+
+    def test_runs_jobs_in_priority_order(self):
+        Job.objects.enqueue(RECORD, "low", priority=5)
+        Job.objects.enqueue(RECORD, "high", priority=0)
+        self.assertEqual(jobs.work(), 2)
+        self.assertEqual(calls, ["high", "low"])
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_scheduled_job_waits_for_run_at(self):
+        Job.objects.enqueue(RECORD, "later", run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(jobs.work(), 0)
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = Job.objects.enqueue(EXPLODE, max_attempts=2)
+        jobs.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("boom", job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_only_takes_requested_queues(self):
+        Job.objects.enqueue(RECORD, "email", queue="email")
+        Job.objects.enqueue(RECORD, "default")
+        jobs.work(queues=["default"])
+        self.assertEqual(calls, ["default"])
+
+    @override_settings(AUCTIONS_JOB_QUEUE_LIMITS={"email": 1})
+    def test_queue_concurrency_limit(self):
+        Job.objects.enqueue(RECORD, "a", queue="email")
+        Job.objects.enqueue(RECORD, "b", queue="email")
+        self.assertIsNotNone(jobs.claim())
+        self.assertIsNone(jobs.claim())
+
+    def test_unique_enqueue_skips_waiting_duplicate(self):
+        self.assertIsNotNone(Job.objects.enqueue(RECORD, "x", unique=True))
+        self.assertIsNone(Job.objects.enqueue(RECORD, "x", unique=True))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_requeue_stale_running_jobs(self):
+        job = Job.objects.enqueue(RECORD, "x")
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(jobs.requeue_stale(timedelta(minutes=10)), 1)
+
+    def test_heartbeat_keeps_long_jobs_from_going_stale(self):
+        Job.objects.enqueue(RECORD, "x")
+        job = jobs.claim(worker="w1")
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(jobs.touch(job), 1)
+        self.assertEqual(jobs.requeue_stale(timedelta(minutes=10)), 0)
+        with mock.patch.object(jobs, "touch") as touch:
+            with jobs.heartbeat(job, interval=0.01):
+                time.sleep(0.1)
+        self.assertGreater(touch.call_count, 1)
+
+    def test_bid_defers_notification_dispatch(self):
+        user = create_registered_user("joe")
+        listing = Listing.objects.create(title="thing", listed_by=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.place_bid(user, "5.00")
+        job = Job.objects.get(queue="email")
+        self.assertEqual(job.task, "auctions.tasks.dispatch_notifications")
+        jobs.work(queues=["email"])
+        self.assertTrue(OutboxEvent.objects.get().processed_at)
@@ -0,0 +1,109 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from djmoney.money import Money
+from auctions import ledger
+from auctions.models import LedgerEvent, Listing, ListingSnapshot
+from auctions.tests.prep_tools import create_registered_user
+
+
+@override_settings(AUCTIONS_LEDGER_SNAPSHOT_EVERY=3)
+class LedgerTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        self.listing = Listing.objects.create(title="Lamp", listed_by=self.seller)
+        return super().setUp()
+
+    def fresh(self):
+        return Listing.objects.get(pk=self.listing.pk)
+
+    def bid(self, user, amount):
+        return self.fresh().place_bid(user, amount)
+
+    def test_bids_and_retractions_are_recorded(self):
+        self.bid(self.alice, 5)
+        top = self.bid(self.bob, 7)
+        top.delete()
+        kinds = list(
+            LedgerEvent.objects.filter(listing=self.listing)
+            .order_by("id")
+            .values_list("kind", flat=True)
+        )
+        self.assertEqual(
+            kinds,
+            [LedgerEvent.BID_PLACED, LedgerEvent.BID_PLACED, LedgerEvent.BID_RETRACTED],
+        )
+        listing = self.fresh()
+        self.assertEqual(listing.highest_bid, Money(5, "USD"))
+        self.assertEqual(listing.highest_bidder, self.alice)
+        self.assertEqual(listing.bid_count, 1)
+
+    def test_state_is_latest_snapshot_plus_tail(self):
+        for amount in range(1, 6):
+            self.bid(self.alice if amount % 2 else self.bob, amount)
+        snapshot = ListingSnapshot.objects.get(listing=self.listing)
+        self.assertEqual(len(snapshot.bids), 3)
+        with self.assertNumQueries(2):
+            state = LedgerEvent.objects.state(self.listing.pk)
+        self.assertEqual(state.tail, 2)
+        self.assertEqual(state.highest_bid, Money(5, "USD"))
+        self.assertEqual(state.highest_bidder_id, self.alice.pk)
+
+    def test_closing_snapshots_final_state(self):
+        self.bid(self.alice, 5)
+        self.fresh().close(self.seller)
+        snapshot = ListingSnapshot.objects.get(listing=self.listing)
+        self.assertTrue(snapshot.closed)
+        self.assertEqual(snapshot.state().highest_bidder_id, self.alice.pk)
+        self.assertEqual(self.fresh().winner, self.alice)
+
+    def test_state_at_a_past_moment(self):
+        self.bid(self.alice, 5)
+        self.bid(self.bob, 7)
+        LedgerEvent.objects.filter(bidder=self.bob).update(
+            created=LedgerEvent.objects.get(bidder=self.alice).created
+            + timedelta(hours=1)
+        )
+        before = LedgerEvent.objects.get(bidder=self.alice).created
+        state = LedgerEvent.objects.state(self.listing.pk, at=before)
+        self.assertEqual(state.highest_bidder_id, self.alice.pk)
+
+    def test_replay_rebuilds_the_same_state(self):
+        other = Listing.objects.create(title="Rug", listed_by=self.seller)
+        for amount in range(1, 8):
+            self.bid(self.alice, amount)
+            other.place_bid(self.bob, amount)
+        self.fresh().bids.order_by("-amount").first().delete()
+        expected = LedgerEvent.objects.state(self.listing.pk).as_dict()
+        ListingSnapshot.objects.all().delete()
+        self.assertEqual(ledger.replay(batch_size=2, snapshot_every=2), (15, 2))
+        self.assertEqual(
+            ListingSnapshot.objects.filter(listing=self.listing).count(), 4
+        )
+        self.assertEqual(LedgerEvent.objects.state(self.listing.pk).as_dict(), expected)
+        self.assertEqual(expected["bids"][-1]["amount"], "6.00")
+
+    def test_replay_replaces_existing_snapshots(self):
+        for amount in range(1, 7):
+            self.bid(self.alice, amount)
+        ListingSnapshot.objects.all().delete()
+        ledger.replay(snapshot_every=2)
+        self.assertEqual(ledger.replay(batch_size=1, snapshot_every=3), (6, 1))
+        events = list(LedgerEvent.objects.order_by("id").values_list("id", flat=True))
+        snapshots = ListingSnapshot.objects.order_by("event_id")
+        self.assertEqual(
+            list(snapshots.values_list("event_id", flat=True)), [events[2], events[5]]
+        )
+
+    def test_command_prints_state(self):
+        self.bid(self.alice, Decimal("5.50"))
+        out = StringIO()
+        call_command("replay_ledger", listing=self.listing.pk, stdout=out)
+        state = json.loads(out.getvalue())
+        self.assertEqual(state["bids"][0]["bidder"], self.alice.pk)
+        self.assertFalse(state["closed"])
@@ -0,0 +1,67 @@
+import importlib.util
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions import memory
+from auctions.tests.prep_tools import buffered, create_registered_user
+
+GUNICORN_CONF = Path(__file__).resolve().parents[2] / "gunicorn.conf.py"
+
+
+class MemoryStatsTest(TestCase):
+    def test_tracing_records_peak_and_retaining_lines(self):
+        stats = memory.MemoryStats()
+        kept = []
+        with stats.tracing() as trace:
+            kept.append(bytearray(2_000_000))
+            with stats.tracing() as nested:
+                self.assertIsNone(nested)
+        stats.record("index", trace["peak"], trace["statistics"])
+        report = stats.report()
+        self.assertGreaterEqual(report["views"]["index"]["max_peak"], 2_000_000)
+        self.assertIn("test_memory.py", report["sites"][0]["site"])
+        self.assertGreater(report["rss"], 0)
+
+
+class MemoryEndpointTest(TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(setattr, memory, "stats", memory.stats)
+        memory.stats = memory.MemoryStats()
+        self.user = create_registered_user("joe")
+        self.client.force_login(self.user)
+        return super().setUp()
+
+    @override_settings(AUCTIONS_MEMORY_SAMPLE_ONE_IN=1)
+    def test_sampled_requests_show_up_for_staff(self):
+        response = self.client.get(reverse("index"))
+        self.assertEqual(memory.stats.report()["views"], {})
+        # Streamed pages are traced until their last chunk
+        buffered(response)
+        self.assertEqual(self.client.get(reverse("memory")).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        report = self.client.get(reverse("memory")).json()
+        self.assertEqual(report["views"]["index"]["samples"], 1)
+
+
+class WorkerRecyclingTest(TestCase):
+    def setUp(self) -> None:
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", GUNICORN_CONF)
+        self.conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.conf)
+        return super().setUp()
+
+    def worker(self):
+        return SimpleNamespace(alive=True, pid=1, log=logging.getLogger("test"))
+
+    def test_worker_over_rss_limit_stops_after_request(self):
+        worker = self.worker()
+        self.conf.max_worker_rss = memory.rss_bytes() * 10
+        self.conf.post_request(worker, None, {}, None)
+        self.assertTrue(worker.alive)
+        self.conf.max_worker_rss = 1
+        with self.assertLogs("test", "INFO"):
+            self.conf.post_request(worker, None, {}, None)
+        self.assertFalse(worker.alive)
@@ -1,7 +1,7 @@
 from decimal import Decimal
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from auctions.models import Listing, Bid
+from auctions.models import Listing, Bid, Category
 from auctions.tests.prep_tools import create_registered_user
 
 
@@ -30,7 +30,7 @@ class ListingTest(TestCase):
 
     def test_listing_can_have_category(self):
         Listing.objects.create(
-            listed_by=self.user, title="thing", category=Listing.FASHION
+            listed_by=self.user, title="thing", category_id=Listing.FASHION
         )
 
     def test_listing_can_have_image_url(self):
@@ -110,6 +110,55 @@ class ListingTest(TestCase):
         self.assertIsNone(listing.winner)
 
 
+class CategoryTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        return super().setUp()
+
+    def counts(self, name):
+        category = Category.objects.get(name=name)
+        return category.active_count, category.closed_count
+
+    def test_creating_listing_increments_active_count(self):
+        Listing.objects.create(
+            title="thing", category_id=Listing.TOYS, listed_by=self.user
+        )
+        self.assertEqual(self.counts(Listing.TOYS), (1, 0))
+
+    def test_closing_listing_moves_count_to_closed(self):
+        listing = Listing.objects.create(
+            title="thing", category_id=Listing.TOYS, listed_by=self.user
+        )
+        listing.close(self.user)
+        self.assertEqual(self.counts(Listing.TOYS), (0, 1))
+
+    def test_changing_category_moves_count(self):
+        listing = Listing.objects.create(
+            title="thing", category_id=Listing.TOYS, listed_by=self.user
+        )
+        listing = Listing.objects.get(pk=listing.pk)
+        listing.category_id = Listing.HOME
+        listing.save()
+        self.assertEqual(self.counts(Listing.TOYS), (0, 0))
+        self.assertEqual(self.counts(Listing.HOME), (1, 0))
+
+    def test_deleting_listing_decrements_count(self):
+        listing = Listing.objects.create(
+            title="thing", category_id=Listing.TOYS, listed_by=self.user
+        )
+        listing.delete()
+        self.assertEqual(self.counts(Listing.TOYS), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        Listing.objects.create(
+            title="thing", category_id=Listing.TOYS, listed_by=self.user
+        )
+        Category.objects.filter(name=Listing.TOYS).update(active_count=7)
+        fixed = Category.objects.reconcile()
+        self.assertEqual([c.name for c in fixed], [Listing.TOYS])
+        self.assertEqual(self.counts(Listing.TOYS), (1, 0))
+
+
 class BidTest(TestCase):
     def setUp(self) -> None:
         self.user = create_registered_user("joe")
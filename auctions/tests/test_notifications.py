@@ -0,0 +1,96 @@
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from auctions import notifications
+from auctions.models import Listing, OutboxEvent
+from auctions.notifications import dispatch_pending
+from auctions.tests.prep_tools import create_registered_user
+
+
+class NotificationTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        self.watcher = create_registered_user("wendy")
+        for user in (self.seller, self.alice, self.bob, self.watcher):
+            user.email = f"{user.username}@example.com"
+            user.save()
+        self.listing = Listing.objects.create(title="Sweet Thing", listed_by=self.seller)
+        self.listing.watchers.add(self.watcher)
+        return super().setUp()
+
+    def inbox(self, user):
+        return [m.body for m in mail.outbox if m.to == [user.email]]
+
+    def test_bid_writes_outbox_event(self):
+        self.listing.place_bid(self.alice, "5.00")
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.kind, OutboxEvent.BID_PLACED)
+        self.assertIsNone(event.previous_bidder)
+        self.listing.place_bid(self.bob, "6.00")
+        self.assertEqual(OutboxEvent.objects.last().previous_bidder, self.alice)
+
+    def test_bid_view_does_not_send_mail(self):
+        self.client.force_login(self.alice)
+        self.client.post(
+            reverse("listing-detail", args=[self.listing.pk]),
+            data={"action": "place-a-bid", "amount": "5.00"},
+        )
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertEqual(mail.outbox, [])
+
+    def test_previous_bidder_is_told_they_were_outbid(self):
+        self.listing.place_bid(self.alice, "5.00")
+        self.listing.place_bid(self.bob, "6.00")
+        self.assertEqual(dispatch_pending(), 2)
+        self.assertIn("You have been outbid on Sweet Thing", self.inbox(self.alice)[0])
+        self.assertEqual(self.inbox(self.bob), [])
+
+    def test_watcher_updates_are_coalesced(self):
+        self.listing.place_bid(self.alice, "5.00")
+        self.listing.place_bid(self.bob, "6.00")
+        self.listing.place_bid(self.alice, "7.00")
+        dispatch_pending()
+        messages = self.inbox(self.watcher)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("3 new bids on Sweet Thing", messages[0])
+
+    def test_closing_notifies_winner_and_watchers(self):
+        self.listing.place_bid(self.alice, "5.00")
+        self.listing.close(self.seller)
+        dispatch_pending()
+        self.assertIn("You won Sweet Thing!", self.inbox(self.alice)[-1])
+        self.assertIn("Sweet Thing has closed.", self.inbox(self.watcher)[0])
+
+    def test_events_are_delivered_once(self):
+        self.listing.place_bid(self.alice, "5.00")
+        dispatch_pending()
+        sent = len(mail.outbox)
+        self.assertEqual(dispatch_pending(), 0)
+        self.assertEqual(len(mail.outbox), sent)
+
+    def test_a_failed_send_releases_the_claim(self):
+        self.listing.place_bid(self.alice, "5.00")
+
+        def send(inbox):
+            # Claimed before sending, so other dispatchers skip the events
+            self.assertFalse(OutboxEvent.objects.filter(claimed_until=None).exists())
+            raise SMTPException
+
+        with mock.patch.object(notifications, "send", side_effect=send):
+            with self.assertRaises(SMTPException):
+                dispatch_pending()
+        self.assertFalse(OutboxEvent.objects.exclude(claimed_until=None).exists())
+        self.assertEqual(dispatch_pending(), 1)
+        self.assertTrue(self.inbox(self.watcher))
+
+    def test_claimed_events_wait_for_the_claim_to_expire(self):
+        self.listing.place_bid(self.alice, "5.00")
+        self.assertEqual(len(notifications.claim(10)), 1)
+        self.assertEqual(dispatch_pending(), 0)
+        OutboxEvent.objects.update(claimed_until=timezone.now())
+        self.assertEqual(dispatch_pending(), 1)
@@ -0,0 +1,170 @@
+import itertools
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions import profiling
+from auctions.forms import CreateListingForm
+from auctions.models import Category
+from auctions.middleware import make_profile_token
+from auctions.profiling import OverheadBudget, StackSampler, profile_templates
+from auctions.tests.prep_tools import (
+    buffered,
+    create_listing,
+    create_registered_user,
+)
+
+
+class TemplateProfileTest(TestCase):
+    def test_attributes_time_to_templates_and_tags(self):
+        template = Template(
+            "{% for i in items %}{% if i %}{{ i }}{% endif %}{% endfor %}"
+        )
+        with profile_templates() as profile:
+            template.render(Context({"items": [0, 1, 2]}))
+        labels = dict(profile.top(limit=None))
+        loop = next(stats for label, stats in labels.items() if "{% for" in label)
+        branch = next(stats for label, stats in labels.items() if "{% if i" in label)
+        self.assertEqual((loop["calls"], branch["calls"]), (1, 3))
+        self.assertLessEqual(branch["total"], loop["total"])
+        whole = labels["template None"]
+        self.assertAlmostEqual(
+            sum(stats["self"] for stats in labels.values()), whole["total"]
+        )
+
+    def test_not_recording_outside_a_profile(self):
+        with profile_templates() as profile:
+            pass
+        Template("{% if 1 %}x{% endif %}").render(Context())
+        self.assertEqual(profile.stats, {})
+
+
+@override_settings(AUCTIONS_TEMPLATE_PROFILING=True)
+class TemplateProfilingMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.client.force_login(self.user)
+        return super().setUp()
+
+    def test_staff_get_server_timing(self):
+        url = reverse("categories") + "?profile-templates"
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        self.user.is_staff = True
+        self.user.save()
+        # A clock that ticks once per reading makes self time count the
+        # tags and templates rendered, so the ranking no longer varies
+        with mock.patch.object(profiling, "perf_counter", itertools.count().__next__):
+            timing = self.client.get(url)["Server-Timing"]
+        self.assertIn('desc="template auctions/categories.html"', timing)
+        self.assertIn('desc="{% for category in categories %}', timing)
+
+
+class CachedCreateFormTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(create_registered_user("joe"))
+        return super().setUp()
+
+    def test_get_serves_cached_form_with_fresh_csrf_token(self):
+        placeholder = CreateListingForm.CSRF_PLACEHOLDER
+        cache.set(
+            CreateListingForm.cache_key(),
+            '<form class="cached">'
+            f'<input name="csrfmiddlewaretoken" value="{placeholder}">',
+        )
+        response = self.client.get(reverse("create-listing"))
+        self.assertContains(response, '<form class="cached">')
+        self.assertNotContains(response, placeholder)
+        self.assertRegex(
+            response.content.decode(),
+            r'name="csrfmiddlewaretoken" value="[A-Za-z0-9]{64}"',
+        )
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_category_changes_change_the_variant(self):
+        key = CreateListingForm.cache_key()
+        Category.objects.create(name="Garden")
+        self.assertNotEqual(CreateListingForm.cache_key(), key)
+
+
+class SamplingProfilerTest(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.user = create_registered_user("joe")
+        self.client.force_login(self.user)
+        return super().setUp()
+
+    def profiles(self):
+        return sorted(Path(self.directory.name).glob("*.json"))
+
+    def test_signed_token_or_staff_param_profiles_one_request(self):
+        with self.settings(AUCTIONS_PROFILE_DIR=self.directory.name):
+            self.client.get(reverse("categories"), {"profile": "1"})
+            self.assertEqual(self.profiles(), [])
+            response = self.client.get(
+                reverse("categories"),
+                headers={"X-Profile-Token": make_profile_token("joe")},
+            )
+        [meta] = self.profiles()
+        self.assertEqual(response["X-Profile"], meta.stem)
+        profile = json.loads(meta.read_text())
+        self.assertEqual(
+            (profile["url_name"], profile["trigger"]), ("categories", "requested")
+        )
+        self.assertGreaterEqual(profile["sql"]["queries"], 1)
+        self.assertTrue(meta.with_suffix(".collapsed").exists())
+
+        self.user.is_staff = True
+        self.user.save()
+        with self.settings(AUCTIONS_PROFILE_DIR=self.directory.name):
+            self.client.get(reverse("categories"), {"profile": "1"})
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_streamed_pages_are_profiled_to_the_last_chunk(self):
+        self.user.is_staff = True
+        self.user.save()
+        create_listing(title="Lamp", listed_by=self.user)
+        with self.settings(AUCTIONS_PROFILE_DIR=self.directory.name):
+            response = self.client.get(reverse("index"), {"profile": "1"})
+            self.assertEqual(self.profiles(), [])
+            buffered(response)
+        [meta] = self.profiles()
+        statements = json.loads(meta.read_text())["sql"]["slowest"]
+        self.assertTrue(any("listingcard" in entry["sql"] for entry in statements))
+
+    def test_random_sampling_per_view(self):
+        with self.settings(
+            AUCTIONS_PROFILE_DIR=self.directory.name,
+            AUCTIONS_PROFILE_ONE_IN=0,
+            AUCTIONS_PROFILE_ONE_IN_BY_VIEW={"categories": 1},
+        ):
+            self.client.get(reverse("index"))
+            self.client.get(reverse("categories"))
+        [meta] = self.profiles()
+        self.assertEqual(json.loads(meta.read_text())["trigger"], "sampled")
+
+    def test_sampler_collapses_stacks(self):
+        sampler = StackSampler(threading.get_ident(), 0.001).start()
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            sum(range(1000))
+        sampler.stop()
+        self.assertIn("test_sampler_collapses_stacks", sampler.collapsed())
+
+
+class OverheadBudgetTest(TestCase):
+    def test_spending_over_budget_pauses_sampling(self):
+        budget = OverheadBudget(0.01, window=100)
+        budget.record(10.0)
+        self.assertTrue(budget.allows())
+        budget.record(1.0, overhead=0.5)
+        self.assertFalse(budget.allows())
+        budget.record(50.0)
+        self.assertTrue(budget.allows())
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from auctions import rankings
+from auctions.models import Listing, ListingRank, RankingEvent
+from auctions.tests.prep_tools import create_registered_user
+
+
+def pks(objects):
+    return [obj.pk for obj in objects]
+
+
+@override_settings(AUCTIONS_TRENDING_HALF_LIFE_HOURS=1)
+class RankingTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_registered_user("joe")
+        self.bidder = create_registered_user("max")
+        return super().setUp()
+
+    def test_bids_and_watches_raise_trending_rank(self):
+        quiet = Listing.objects.create(title="Quiet", listed_by=self.user)
+        busy = Listing.objects.create(title="Busy", listed_by=self.user)
+        quiet.add_remove_from_watchlist(self.bidder)
+        busy.place_bid(self.bidder, "5.00")
+        busy.place_bid(self.user, "6.00")
+        rankings.apply_pending()
+        self.assertEqual(pks(rankings.trending()), pks([busy, quiet]))
+        self.assertFalse(RankingEvent.objects.exists())
+
+    def test_old_activity_decays(self):
+        old = Listing.objects.create(title="Old", listed_by=self.user)
+        new = Listing.objects.create(title="New", listed_by=self.user)
+        for _ in range(3):
+            RankingEvent.objects.create(
+                listing_id=old.pk,
+                weight=RankingEvent.BID_WEIGHT,
+                created=timezone.now() - timedelta(hours=3),
+            )
+        new.place_bid(self.bidder, "5.00")
+        rankings.apply_pending()
+        self.assertEqual(pks(rankings.trending()), pks([new, old]))
+
+    def test_updates_fold_into_existing_rank(self):
+        listing = Listing.objects.create(title="Busy", listed_by=self.user)
+        listing.place_bid(self.bidder, "5.00")
+        rankings.apply_pending()
+        first = ListingRank.objects.get().trending_key
+        listing.place_bid(self.user, "6.00")
+        rankings.apply_pending()
+        self.assertGreater(ListingRank.objects.get().trending_key, first)
+
+    def test_ending_soon_orders_open_listings_by_end(self):
+        now = timezone.now()
+        later = Listing.objects.create(
+            title="Later", listed_by=self.user, ends_at=now + timedelta(days=2)
+        )
+        sooner = Listing.objects.create(
+            title="Sooner", listed_by=self.user, ends_at=now + timedelta(hours=2)
+        )
+        Listing.objects.create(title="No end", listed_by=self.user)
+        rankings.apply_pending()
+        self.assertEqual(pks(rankings.ending_soon()), pks([sooner, later]))
+
+    def test_closed_listings_leave_the_feeds(self):
+        listing = Listing.objects.create(
+            title="Busy",
+            listed_by=self.user,
+            ends_at=timezone.now() + timedelta(hours=1),
+        )
+        listing.place_bid(self.bidder, "5.00")
+        rankings.apply_pending()
+        listing.close(self.user)
+        rankings.apply_pending()
+        self.assertFalse(ListingRank.objects.exists())
+
+    def test_trending_page(self):
+        listing = Listing.objects.create(title="Busy", listed_by=self.user)
+        listing.place_bid(self.bidder, "5.00")
+        rankings.apply_pending()
+        response = self.client.get(reverse("trending"))
+        self.assertContains(response, "Busy")
+        response = self.client.get(reverse("ending-soon"))
+        self.assertContains(response, "No listings are ending soon")
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from auctions.models import Listing, SimilarListing
+from auctions.recommendations import rebuild_similar_listings
+from auctions.tests.prep_tools import create_registered_user
+
+
+class SimilarListingsTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.users = [create_registered_user(f"user{i}") for i in range(4)]
+        self.lego, self.bricks, self.kite, self.lamp = [
+            Listing.objects.create(title=title, listed_by=self.seller)
+            for title in ("Lego", "Bricks", "Kite", "Lamp")
+        ]
+        # Three people watch Lego and Bricks together; one of them also
+        # bids on the Kite; the Lamp is watched alone.
+        for user in self.users[:3]:
+            self.lego.watchers.add(user)
+            self.bricks.watchers.add(user)
+        self.kite.place_bid(self.users[0], "5.00")
+        self.lamp.watchers.add(self.users[3])
+        return super().setUp()
+
+    def neighbours(self, listing):
+        return [row.similar for row in listing.similar.all()]
+
+    def test_most_co_watched_listing_comes_first(self):
+        rebuild_similar_listings(top_k=5)
+        self.assertEqual(self.neighbours(self.lego), [self.bricks, self.kite])
+        self.assertEqual(self.neighbours(self.lamp), [])
+
+    def test_top_k_limits_neighbours(self):
+        rebuild_similar_listings(top_k=1, chunk_size=2)
+        self.assertEqual(self.neighbours(self.lego), [self.bricks])
+
+    def test_closed_listings_are_dropped_on_rebuild(self):
+        rebuild_similar_listings()
+        self.bricks.close(self.seller)
+        rebuild_similar_listings()
+        self.assertFalse(SimilarListing.objects.filter(similar=self.bricks).exists())
+        self.assertFalse(SimilarListing.objects.filter(listing=self.bricks).exists())
+
+    def test_detail_page_shows_also_watched(self):
+        rebuild_similar_listings()
+        response = self.client.get(self.lego.get_absolute_url())
+        self.assertContains(response, "People who watched this also watched")
+        self.assertEqual(response.context["also_watched"][0], self.bricks)
@@ -0,0 +1,134 @@
+from decimal import Decimal
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+from djmoney.money import Money
+import auctions.tasks  # noqa: F401 registers the project's tasks
+from auctions import jobs, searches
+from auctions.models import (
+    Category,
+    Job,
+    Listing,
+    SavedSearch,
+    SavedSearchMatch,
+)
+from auctions.tests.prep_tools import create_registered_user
+
+
+class SavedSearchTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        self.buyer = create_registered_user("max")
+        self.buyer.email = "max@example.com"
+        self.buyer.save()
+        return super().setUp()
+
+    def search(self, **kwargs):
+        return SavedSearch.objects.create(user=self.buyer, **kwargs)
+
+    def listing(self, title, price="10.00", **kwargs):
+        return Listing.objects.create(
+            title=title,
+            listed_by=self.seller,
+            starting_bid=Money(Decimal(price), "USD"),
+            **kwargs,
+        )
+
+    def matched(self, listing):
+        searches.match_listing(listing.pk)
+        return set(
+            SavedSearchMatch.objects.filter(listing=listing).values_list(
+                "search", flat=True
+            )
+        )
+
+    def test_indexes_each_search_under_one_term(self):
+        self.assertEqual(
+            self.search(keywords="Lego castle", category_id="Toys").index_term,
+            "w:castle",
+        )
+        self.assertEqual(self.search(category_id="Toys").index_term, "c:Toys")
+        self.assertEqual(self.search(max_price=Money(50, "USD")).index_term, "p:USD")
+        self.assertEqual(self.search().index_term, SavedSearch.MATCH_ALL)
+
+    def test_matches_keywords_category_and_price(self):
+        lego = self.search(
+            keywords="lego", category_id="Toys", max_price=Money(50, "USD")
+        )
+        cheap = self.search(max_price=Money(20, "USD"))
+        toys = self.search(category_id="Toys")
+        bricks = Category.objects.create(
+            name="Bricks", parent=Category.objects.get(name="Toys")
+        )
+
+        self.assertEqual(
+            self.matched(self.listing("LEGO Castle", category=bricks)),
+            {lego.pk, cheap.pk, toys.pk},
+        )
+        self.assertEqual(
+            self.matched(
+                self.listing("Lego Castle", price="60.00", category_id="Toys")
+            ),
+            {toys.pk},
+        )
+        self.assertEqual(
+            self.matched(self.listing("Lego shirt", category_id="Fashion")),
+            {cheap.pk},
+        )
+
+    def test_only_candidate_searches_are_loaded(self):
+        for i in range(20):
+            self.search(keywords=f"unrelated{i}")
+        wanted = self.search(keywords="castle")
+        listing = self.listing("Castle")
+        # Listing, candidate searches, then both writes inside a savepoint
+        with self.assertNumQueries(6):
+            self.assertEqual(searches.match_listing(listing.pk), 1)
+        self.assertEqual(self.matched(listing), {wanted.pk})
+
+    def test_price_only_searches_are_loaded_within_their_bounds(self):
+        for i in range(10):
+            self.search(max_price=Money(5, "USD"))
+            self.search(min_price=Money(20, "USD"))
+        wanted = self.search(min_price=Money(5, "USD"), max_price=Money(15, "USD"))
+        listing = self.listing("Castle")
+        terms = searches.listing_terms(listing)[0]
+        self.assertEqual(list(searches.candidates(listing, terms)), [wanted])
+        self.assertEqual(self.matched(listing), {wanted.pk})
+
+    def test_long_descriptions_keep_their_first_words(self):
+        wanted = self.search(keywords="zebra")
+        description = " ".join(f"a{i}" for i in range(searches.MAX_LISTING_WORDS))
+        listing = self.listing("Zebra rug", description=description)
+        self.assertEqual(self.matched(listing), {wanted.pk})
+
+    def test_sellers_own_listings_do_not_match(self):
+        SavedSearch.objects.create(user=self.seller, keywords="castle")
+        self.assertEqual(self.matched(self.listing("Castle")), set())
+
+    def test_new_listing_is_matched_in_the_background_and_mailed(self):
+        self.search(keywords="castle")
+        self.client.force_login(self.seller)
+        self.client.post(reverse("create-listing"), data={"title": "Sand castle"})
+        self.assertFalse(SavedSearchMatch.objects.exists())
+        self.assertTrue(Job.objects.filter(queue="searches").exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.work(queues=["searches"])
+        jobs.work(queues=["email"])
+        self.assertEqual(SavedSearchMatch.objects.count(), 1)
+        self.assertEqual(
+            [m.body for m in mail.outbox],
+            ["Sand castle matches one of your saved searches."],
+        )
+
+    def test_saved_search_page(self):
+        self.client.force_login(self.buyer)
+        response = self.client.post(
+            reverse("saved-searches"), data={"keywords": "lego", "category": "Toys"}
+        )
+        self.assertRedirects(response, reverse("saved-searches"))
+        response = self.client.get(reverse("saved-searches"))
+        self.assertContains(response, "lego / Toys")
+        response = self.client.post(reverse("saved-searches"), data={})
+        self.assertContains(response, "Enter at least one thing to search for.")
@@ -0,0 +1,192 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from djmoney.money import Money
+from auctions import analytics, autocomplete, exports, sharding
+from auctions.archive import archive_closed_listings
+from auctions.models import (
+    ArchivedListing,
+    Bid,
+    Category,
+    LedgerEvent,
+    Listing,
+    ListingShard,
+    OutboxEvent,
+    SimilarListing,
+)
+from auctions.recommendations import rebuild_similar_listings
+from auctions.sharding import ShardRouter
+from auctions.tests.prep_tools import create_listing, create_registered_user
+
+# "shard1" is declared in commerce.test_settings and only used here
+NEEDS_SHARD = skipUnless(
+    "shard1" in settings.DATABASES, "run with --settings=commerce.test_settings"
+)
+SHARDED = override_settings(
+    AUCTIONS_SHARDS=["default", "shard1"],
+    DATABASE_ROUTERS=["auctions.sharding.ShardRouter"],
+    AUCTIONS_SHARD_PAGE_SIZE=2,
+)
+
+
+@NEEDS_SHARD
+@SHARDED
+class ShardingTest(TestCase):
+    databases = "__all__"
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.seller = create_registered_user("joe")
+        self.alice = create_registered_user("alice")
+        self.bob = create_registered_user("bob")
+        first = create_listing(title="Lamp", listed_by=self.seller)
+        second = create_listing(title="Rug", listed_by=self.seller)
+        self.listings = {first._state.db: first, second._state.db: second}
+        return super().setUp()
+
+    def test_listings_are_spread_with_their_rows(self):
+        self.assertEqual(set(self.listings), {"default", "shard1"})
+        for alias, listing in self.listings.items():
+            self.assertEqual(sharding.shard_for(listing.pk), alias)
+            listing.place_bid(self.alice, 5)
+            self.assertEqual(Bid.objects.using(alias).get().listing_id, listing.pk)
+            self.assertEqual(
+                LedgerEvent.objects.using(alias).get().bidder_id, self.alice.pk
+            )
+        self.assertEqual(ListingShard.objects.count(), 2)
+
+    def test_reconcile_counts_listings_on_every_shard(self):
+        for listing in self.listings.values():
+            listing.category_id = Listing.TOYS
+            listing.save()
+        self.assertEqual(Category.objects.reconcile(), [])
+        self.assertEqual(Category.objects.get(name=Listing.TOYS).active_count, 2)
+
+    def test_detail_and_bidding_on_a_shard(self):
+        listing = self.listings["shard1"]
+        self.client.force_login(self.bob)
+        self.client.post(
+            listing.get_absolute_url(), {"action": "place-a-bid", "amount": 7}
+        )
+        self.client.post(
+            listing.get_absolute_url(), {"action": "add-remove-from-watchlist"}
+        )
+        response = self.client.get(listing.get_absolute_url())
+        self.assertEqual(response.context["object"].highest_bid, Money(7, "USD"))
+        self.assertContains(response, "badge-info")
+        self.assertContains(
+            response, '<span class="is-current-bid">is</span>', html=True
+        )
+
+    def test_price_history_reads_the_listings_shard(self):
+        listing = self.listings["shard1"]
+        listing.place_bid(self.alice, 5)
+        listing.place_bid(self.bob, 7)
+        for method in ("minmax", "lttb"):
+            response = self.client.get(
+                reverse("price-history", args=[listing.pk]), {"method": method}
+            )
+            points = [amount for _, amount in response.json()["points"]]
+            self.assertEqual(points, [5.0, 7.0])
+
+    def test_index_pages_newest_first_across_shards(self):
+        newest = create_listing(title="Vase", listed_by=self.seller)
+        response = self.client.get(reverse("index"))
+        ids = sorted(
+            [newest.pk, *(listing.pk for listing in self.listings.values())],
+            reverse=True,
+        )
+        shown = [card.pk for card in response.context["object_list"]]
+        self.assertEqual(shown, ids[:2])
+        self.assertContains(response, "More listings")
+        response = self.client.get(
+            reverse("index"), {"before": response.context["next_before"]}
+        )
+        shown = [card.pk for card in response.context["object_list"]]
+        self.assertEqual(shown, ids[2:])
+        self.assertNotIn("next_before", response.context)
+
+    def test_send_notifications_drains_every_shard(self):
+        for listing in self.listings.values():
+            listing.place_bid(self.alice, 5)
+        call_command("send_notifications", once=True, stdout=StringIO())
+        for alias in self.listings:
+            pending = OutboxEvent.objects.using(alias).filter(processed_at=None)
+            self.assertFalse(pending.exists())
+
+    def test_batch_features_see_listings_on_every_shard(self):
+        lamp, rug = self.listings["default"], self.listings["shard1"]
+        for listing in (lamp, rug):
+            listing.watchers.add(self.alice, self.bob)
+            listing.place_bid(self.alice, 5)
+        autocomplete.index.reset()
+        self.addCleanup(autocomplete.index.reset)
+        titles = [found["title"] for found in autocomplete.suggest("r")]
+        self.assertEqual(titles, ["Rug"])
+        exported = list(exports.export_rows("bids"))
+        self.assertEqual(
+            [(row[1], row[2]) for row in exported],
+            [(lamp.pk, "alice"), (rug.pk, "alice")],
+        )
+        self.assertEqual(sorted(analytics.load_bids()[0]), [lamp.pk, rug.pk])
+        rebuild_similar_listings()
+        self.assertEqual(
+            SimilarListing.objects.using("shard1").get().similar_id, lamp.pk
+        )
+        response = self.client.get(lamp.get_absolute_url())
+        self.assertEqual(response.context["also_watched"], [rug])
+        Listing.objects.using("shard1").filter(pk=rug.pk).update(
+            closed=True, closed_at=timezone.now() - timedelta(days=100)
+        )
+        self.assertEqual(archive_closed_listings(timedelta(days=90)), 1)
+        self.assertEqual(ArchivedListing.objects.get().pk, rug.pk)
+        self.assertFalse(Listing.objects.using("shard1").exists())
+
+    def test_move_listing_keeps_its_auction(self):
+        listing = self.listings["default"]
+        listing.place_bid(self.alice, 5)
+        top = Listing.objects.get(pk=listing.pk).place_bid(self.bob, 8)
+        Listing.objects.get(pk=listing.pk).place_bid(self.alice, 9)
+        Bid.objects.using("default").get(pk=top.pk).delete()
+        listing.watchers.add(self.bob)
+        listing.comments.create(commenter=self.bob, text="Nice")
+        expected = LedgerEvent.objects.state(listing.pk).as_dict()
+        out = StringIO()
+        with self.captureOnCommitCallbacks(using="default", execute=True):
+            call_command("move_listings", listing.pk, to="shard1", stdout=out)
+        self.assertIn("Moved 1 listings", out.getvalue())
+        self.assertEqual(sharding.shard_for(listing.pk), "shard1")
+        self.assertFalse(Bid.objects.using("default").exists())
+        self.assertFalse(LedgerEvent.objects.using("default").exists())
+        moved = Listing.objects.using("shard1").get(pk=listing.pk)
+        self.assertEqual(moved.bids.count(), 2)
+        self.assertTrue(moved.is_watched_by(self.bob))
+        self.assertEqual(moved.comments.get().text, "Nice")
+        # Bids are renumbered on the new shard, and the ledger with them
+        bids = moved.ledger_state().as_dict()["bids"]
+        self.assertEqual(
+            [bid["bid"] for bid in bids],
+            list(moved.bids.order_by("amount").values_list("pk", flat=True)),
+        )
+        for bid in bids + expected["bids"]:
+            del bid["bid"]
+        self.assertEqual(bids, expected["bids"])
+        self.assertEqual(moved.highest_bid, Money(9, "USD"))
+        self.assertEqual(moved.card.bid_count, 2)
+        self.assertFalse(sharding.move_listing(listing.pk, "shard1"))
+
+
+@SHARDED
+class ShardRouterTest(TestCase):
+    def test_only_sharded_tables_are_created_on_shards(self):
+        router = ShardRouter()
+        self.assertTrue(router.allow_migrate("shard1", "auctions", "bid"))
+        self.assertFalse(router.allow_migrate("shard1", "auctions", "category"))
+        self.assertFalse(router.allow_migrate("shard1", "auth", "group"))
+        self.assertTrue(router.allow_migrate("default", "auctions", "category"))
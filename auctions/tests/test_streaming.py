@@ -0,0 +1,33 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from auctions.tests.prep_tools import create_listing, create_registered_user
+
+
+@override_settings(AUCTIONS_STREAM_CHUNK_SIZE=2)
+class StreamingListTest(TestCase):
+    def setUp(self) -> None:
+        self.seller = create_registered_user("joe")
+        return super().setUp()
+
+    def chunks(self, url):
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_head_goes_out_before_the_listings(self):
+        for number in range(5):
+            create_listing(title=f"Listing {number}", listed_by=self.seller)
+        head, *cards, tail = self.chunks(reverse("index"))
+        self.assertIn("<h2>Active Listings</h2>", head)
+        self.assertIn("Not signed in.", head)
+        self.assertNotIn("Listing 0", head)
+        self.assertEqual(
+            [chunk.count('class="card mb-3"') for chunk in cards], [2, 2, 1]
+        )
+        self.assertIn("</html>", tail)
+
+    def test_empty_message_is_streamed_once(self):
+        self.client.force_login(self.seller)
+        chunks = self.chunks(reverse("watchlist"))
+        self.assertEqual(len(chunks), 3)
+        self.assertIn("You are not watching any listings yet", chunks[1])
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from auctions import timeseries
+from auctions.models import Bid, Listing
+from auctions.tests.prep_tools import create_registered_user
+
+
+class PriceHistoryTest(TestCase):
+    def setUp(self) -> None:
+        self.user = create_registered_user("joe")
+        self.listing = Listing.objects.create(title="Sweet Thing", listed_by=self.user)
+        start = timezone.now() - timedelta(days=1)
+        Bid.objects.bulk_create(
+            Bid(
+                listing=self.listing,
+                bidder=self.user,
+                amount=i + 1,
+                created=start + timedelta(seconds=i * 10),
+            )
+            for i in range(1000)
+        )
+        return super().setUp()
+
+    def test_bids_get_a_timestamp(self):
+        bid = Bid.objects.create(listing=self.listing, amount=2000, bidder=self.user)
+        self.assertIsNotNone(bid.created)
+
+    def test_minmax_keeps_first_and_last_bid(self):
+        series = timeseries.minmax_series(self.listing.pk, points=20)
+        self.assertLessEqual(len(series), 20)
+        self.assertEqual(series[0][1], 1.0)
+        self.assertEqual(series[-1][1], 1000.0)
+        self.assertEqual(series, sorted(series))
+
+    def test_lttb_returns_requested_number_of_points(self):
+        series = timeseries.lttb_series(self.listing.pk, points=20)
+        self.assertEqual(len(series), 20)
+        self.assertEqual(series[0][1], 1.0)
+        self.assertEqual(series[-1][1], 1000.0)
+
+    def test_short_series_is_returned_whole(self):
+        other = Listing.objects.create(title="Other", listed_by=self.user)
+        Bid.objects.create(listing=other, amount=5, bidder=self.user)
+        self.assertEqual(len(timeseries.lttb_series(other.pk, points=20)), 1)
+        self.assertEqual(len(timeseries.minmax_series(other.pk, points=20)), 1)
+
+    def test_price_history_endpoint(self):
+        response = self.client.get(
+            reverse("price-history", args=[self.listing.pk]),
+            {"points": 50, "method": "lttb"},
+        )
+        data = response.json()
+        self.assertEqual(data["method"], "lttb")
+        self.assertEqual(len(data["points"]), 50)
+
+    def test_price_history_rejects_unknown_method(self):
+        response = self.client.get(
+            reverse("price-history", args=[self.listing.pk]), {"method": "fft"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,50 @@
+import importlib.util
+import logging
+from types import SimpleNamespace
+from unittest import mock
+from django.template import engines
+from django.test import SimpleTestCase, TestCase
+from auctions import autocomplete, formatting, warmup
+from auctions.models import Listing
+from auctions.tests.prep_tools import create_registered_user
+from auctions.tests.test_memory import GUNICORN_CONF
+
+
+class WarmUpTest(TestCase):
+    def test_primes_templates_money_formats_and_titles(self):
+        Listing.objects.create(title="Lamp", listed_by=create_registered_user("joe"))
+        autocomplete.index.reset()
+        self.addCleanup(autocomplete.index.reset)
+        formatting.compile_format.cache_clear()
+        # Closing inside the test's transaction would spoil it
+        with mock.patch.object(warmup.connections, "close_all") as close:
+            timings = warmup.warm_up()
+        self.assertEqual(list(timings), ["urls", "templates", "locales", "titles"])
+        self.assertEqual(formatting.compile_format.cache_info().currsize, 1)
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertIn("auctions/index.html", loader.get_template_cache)
+        self.assertEqual(
+            [found["title"] for found in autocomplete.index.suggest("la")], ["Lamp"]
+        )
+        close.assert_called_once_with()
+
+
+class GunicornHooksTest(SimpleTestCase):
+    def setUp(self) -> None:
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", GUNICORN_CONF)
+        self.conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.conf)
+        return super().setUp()
+
+    def worker(self, preload):
+        return SimpleNamespace(
+            cfg=SimpleNamespace(preload_app=preload), log=logging.getLogger("test")
+        )
+
+    def test_workers_warm_up_unless_the_master_did(self):
+        for preload, warmed in [(True, False), (False, True)]:
+            with mock.patch.object(warmup, "warm_connections") as connect:
+                with mock.patch.object(warmup, "warm_up", return_value={}) as warm:
+                    self.conf.post_worker_init(self.worker(preload))
+            connect.assert_called_once_with()
+            self.assertEqual(warm.called, warmed)
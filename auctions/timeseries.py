@@ -0,0 +1,101 @@
+from datetime import timezone as dt_timezone
+from django.db import connections, router
+from django.utils.dateparse import parse_datetime
+from auctions.models import Bid
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 5000
+
+
+def as_datetime(value):
+    # SQLite hands aggregated datetimes back as text
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def to_millis(value):
+    return int(as_datetime(value).timestamp() * 1000)
+
+
+def minmax_series(listing_id, points=DEFAULT_POINTS):
+    """Downsample in SQL: NTILE buckets over bid order, min and max per bucket.
+
+    Accepted bids only ever increase, so a bucket's minimum is its first bid
+    and its maximum its last; both points are exact, not interpolated.
+    """
+    buckets = max(points // 2, 1)
+    table = Bid._meta.db_table
+    # Raw SQL skips the router, so pick the listing's shard explicitly
+    with connections[router.db_for_read(Bid)].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT MIN(created), MIN(amount), MAX(created), MAX(amount)
+            FROM (
+                SELECT created, amount,
+                       NTILE(%s) OVER (ORDER BY created, id) AS bucket
+                FROM {table}
+                WHERE listing_id = %s
+            ) AS bucketed
+            GROUP BY bucket
+            ORDER BY bucket
+            """,
+            [buckets, listing_id],
+        )
+        rows = cursor.fetchall()
+    series = []
+    for first_at, low, last_at, high in rows:
+        series.append([to_millis(first_at), float(low)])
+        if last_at != first_at:
+            series.append([to_millis(last_at), float(high)])
+    return series
+
+
+def lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets; returns the indices of kept points."""
+    import numpy as np
+
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+    every = (size - 2) / (points - 2)
+    edges = (np.arange(points - 1) * every).astype(np.int64) + 1
+    edges[-1] = size - 1
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    a = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(areas.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def lttb_series(listing_id, points=DEFAULT_POINTS):
+    import numpy as np
+
+    rows = (
+        Bid.objects.filter(listing_id=listing_id)
+        .order_by("created", "pk")
+        .values_list("created", "amount")
+    )
+    created, amounts = zip(*rows) if rows else ((), ())
+    x = np.fromiter((c.timestamp() for c in created), dtype=float, count=len(created))
+    y = np.fromiter(amounts, dtype=float, count=len(amounts))
+    kept = lttb(x, y, points)
+    return [[int(x[i] * 1000), float(y[i])] for i in kept]
+
+
+METHODS = {
+    "minmax": minmax_series,
+    "lttb": lttb_series,
+}
@@ -9,12 +9,30 @@ urlpatterns = [
     path("register", views.register, name="register"),
     path("create-listing", views.ListingCreateView.as_view(), name="create-listing"),
     path("listings/<int:pk>", views.ListingUpdateView.as_view(), name="listing-detail"),
+    path(
+        "listings/<int:pk>/price-history",
+        views.price_history,
+        name="price-history",
+    ),
     path("closed-listings", views.ClosedListingView.as_view(), name="closed-listings"),
+    path("autocomplete", views.autocomplete_titles, name="autocomplete"),
+    path("trending", views.TrendingView.as_view(), name="trending"),
+    path("ending-soon", views.EndingSoonView.as_view(), name="ending-soon"),
     path("watchlist", views.WatchlistView.as_view(), name="watchlist"),
+    path("saved-searches", views.SavedSearchView.as_view(), name="saved-searches"),
     path("categories", views.CategoriesView.as_view(), name="categories"),
     path(
         "listings-in-category/<str:category>",
         views.ListingsInCategory.as_view(),
         name="listings-in-category",
     ),
+    path("import-listings", views.ListingImportView.as_view(), name="import-listings"),
+    path(
+        "import-listings/<int:pk>",
+        views.ListingImportStatusView.as_view(),
+        name="listing-import",
+    ),
+    path("cache-stats", views.CacheStatsView.as_view(), name="cache-stats"),
+    path("memory", views.MemoryView.as_view(), name="memory"),
+    path("export/<str:dataset>.<str:fmt>", views.ExportView.as_view(), name="export"),
 ]
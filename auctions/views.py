@@ -1,27 +1,75 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
-from django.db import IntegrityError
-from django.http import HttpResponseRedirect
+from django.db import IntegrityError, models
+import heapq
+from itertools import islice
+from django.http import (
+    Http404,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from typing import Any, Dict
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import render
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse, reverse_lazy
-from django.views.generic.edit import CreateView, FormMixin
+from django.views.generic.edit import CreateView, FormMixin, FormView
 from django.views.generic.list import ListView
 from django.views.generic.detail import DetailView
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 from djmoney.money import Money
-from .models import User, Listing, Bid
-from .forms import CreateListingForm, ListingForm
+from .models import (
+    User,
+    Listing,
+    ListingCard,
+    Category,
+    ArchivedListing,
+    ListingImport,
+    match_saved_searches_soon,
+)
+from .forms import (
+    CreateListingForm,
+    ListingForm,
+    ListingImportUploadForm,
+    SavedSearchForm,
+)
+from . import autocomplete, bidding, memory, rankings, sharding, timeseries
+from .holes import SharedListingPageMixin, SharedPageMixin
+from .streaming import StreamingListMixin
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 
 
-class IndexView(ListView):
+class IndexView(SharedPageMixin, StreamingListMixin, ListView):
     template_name = "auctions/index.html"
     extra_context = {
         "body_title": "Active Listings",
         "empty_message": "No listings so far",
     }
-    queryset = Listing.objects.filter(closed=False)
+    # List pages read the card read model, newest first
+    queryset = ListingCard.objects.filter(closed=False).order_by("-listing")
+
+    # Whether pages are cut newest first at ?before=<listing id> even on a
+    # single database; with sharding, querysets always are
+    keyset_paged = False
+
+    def get_context_data(self, **kwargs):
+        if self.keyset_paged or (
+            sharding.enabled() and isinstance(self.object_list, models.QuerySet)
+        ):
+            try:
+                before = int(self.request.GET["before"])
+            except (KeyError, ValueError):
+                before = None
+            limit = settings.AUCTIONS_SHARD_PAGE_SIZE
+            self.object_list = self.gather(limit, before)
+            if len(self.object_list) == limit:
+                kwargs["next_before"] = self.object_list[-1].pk
+        return super().get_context_data(**kwargs)
+
+    def gather(self, limit, before):
+        return sharding.gather(self.object_list, limit, before)
 
 
 class ListingCreateView(LoginRequiredMixin, CreateView):
@@ -39,25 +87,50 @@ class ListingCreateView(LoginRequiredMixin, CreateView):
         if starting_bid and currency:
             form.instance.starting_bid = Money(starting_bid, currency)
         form.instance.listed_by = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        match_saved_searches_soon(self.object.pk)
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not context["form"].is_bound:
+            context["form_html"] = CreateListingForm.render_unbound(self.request)
+        return context
 
 
-class ListingUpdateView(DetailView, FormMixin):
+class ListingUpdateView(SharedListingPageMixin, DetailView, FormMixin):
     model = Listing
     form_class = ListingForm
 
+    def dispatch(self, request, *args, **kwargs):
+        with sharding.for_listing(kwargs["pk"]):
+            return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(ArchivedListing, pk=kwargs["pk"])
+            return render(
+                request,
+                "auctions/archived_listing_detail.html",
+                {"object": archived},
+            )
+
     def post(self, request, *args, **kwargs):
         listing = self.get_object()
         if self.request.user.is_anonymous:
             return HttpResponseRedirect(reverse("login"))
         if request.POST["action"] == "add-remove-from-watchlist":
             listing.add_remove_from_watchlist(self.request.user)
-        elif request.POST["action"] == "place-a-bid":
+        elif request.POST["action"] in ("place-a-bid", "set-max-bid"):
             amount = request.POST["amount"]
+            if request.POST["action"] == "place-a-bid":
+                place = bidding.place_bid
+            else:
+                place = bidding.place_proxy_bid
             try:
-                bid = Bid(listing=listing, amount=amount, bidder=self.request.user)
-                bid.full_clean()
-                bid.save()
+                place(listing, self.request.user, amount)
             except ValidationError as e:
                 self.object = listing
                 form = self.get_form()
@@ -75,26 +148,44 @@ class ListingUpdateView(DetailView, FormMixin):
         return HttpResponseRedirect(listing.get_absolute_url())
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        # Per-user parts are template holes (auctions.holes)
         context = super().get_context_data(**kwargs)
-        context["is_watched_by_user"] = self.request.user in self.object.watchers.all()
-        context["user_is_highest_bidder"] = (
-            self.object.highest_bidder == self.request.user
-        )
+        # Neighbours may live on other shards
+        ids = list(self.object.similar.values_list("similar_id", flat=True))
+        found = sharding.in_bulk(Listing.objects.all(), ids)
+        context["also_watched"] = [found[pk] for pk in ids if pk in found]
         return context
 
 
 class WatchlistView(LoginRequiredMixin, IndexView):
     login_url = reverse_lazy("login")
+    share_page = False
     extra_context = {
         "body_title": "Your Watchlist",
         "empty_message": "You are not watching any listings yet",
     }
 
     def get_queryset(self):
-        try:
-            return self.request.user.watching.all()
-        except AttributeError:
-            return Listing.objects.none()
+        watching = Listing.watchers.through.objects.filter(
+            user_id=self.request.user.pk
+        ).values("listing_id")
+        return ListingCard.objects.filter(listing__in=watching).order_by("-listing")
+
+
+class SavedSearchView(LoginRequiredMixin, CreateView):
+    form_class = SavedSearchForm
+    template_name = "auctions/saved_searches.html"
+    success_url = reverse_lazy("saved-searches")
+    login_url = reverse_lazy("login")
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        return super().form_valid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["searches"] = self.request.user.searches.select_related("category")
+        return context
 
 
 class ListingsInCategory(IndexView):
@@ -105,18 +196,66 @@ class ListingsInCategory(IndexView):
     }
 
     def get_queryset(self):
-        return Listing.objects.filter(category=self.kwargs["category"])
+        # Categories live on default, away from sharded listings
+        names = Category.objects.filter(
+            models.Q(name=self.kwargs["category"])
+            | models.Q(parent__name=self.kwargs["category"])
+        ).values_list("name", flat=True)
+        return ListingCard.objects.filter(category__in=list(names)).order_by(
+            "-listing"
+        )
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context["category"] = Category.objects.filter(
+            name=self.kwargs["category"]
+        ).first()
+        return context
 
 
 class ClosedListingView(IndexView):
-    queryset = Listing.objects.filter(closed=True)
     extra_context = {
         "body_title": "Closed Listings",
         "empty_message": "There are no closed listings yet",
     }
 
+    keyset_paged = True
+    queryset = ListingCard.objects.filter(closed=True)
+
+    def gather(self, limit, before):
+        # Archived listings keep their ids, so they merge in with the cards
+        # and closed auctions never vanish
+        archived = ArchivedListing.objects.select_related("listed_by", "category")
+        if before is not None:
+            archived = archived.filter(pk__lt=before)
+        runs = [
+            super().gather(limit, before),
+            archived.order_by("-pk")[:limit],
+        ]
+        return list(islice(heapq.merge(*runs, key=lambda obj: -obj.pk), limit))
+
+
+class TrendingView(IndexView):
+    extra_context = {
+        "body_title": "Trending Listings",
+        "empty_message": "Nothing is trending right now",
+    }
+
+    def get_queryset(self):
+        return rankings.trending()
+
+
+class EndingSoonView(IndexView):
+    extra_context = {
+        "body_title": "Ending Soon",
+        "empty_message": "No listings are ending soon",
+    }
+
+    def get_queryset(self):
+        return rankings.ending_soon()
+
 
-class CategoriesView(TemplateView):
+class CategoriesView(SharedPageMixin, TemplateView):
     template_name = "auctions/categories.html"
     extra_context = {
         "body_title": "Categorized Listings",
@@ -124,10 +263,116 @@ class CategoriesView(TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context["categories"] = Listing.CATEGORY_CHOICES
+        context["categories"] = Category.objects.cached()
         return context
 
 
+def price_history(request, pk):
+    method = request.GET.get("method", "minmax")
+    if method not in timeseries.METHODS:
+        return HttpResponseBadRequest("method must be minmax or lttb")
+    try:
+        points = int(request.GET.get("points", timeseries.DEFAULT_POINTS))
+    except ValueError:
+        return HttpResponseBadRequest("points must be a number")
+    points = min(max(points, 2), timeseries.MAX_POINTS)
+    with sharding.for_listing(pk):
+        get_object_or_404(Listing, pk=pk)
+        series = timeseries.METHODS[method](pk, points)
+    return JsonResponse({"listing": pk, "method": method, "points": series})
+
+
+def autocomplete_titles(request):
+    return JsonResponse({"results": autocomplete.suggest(request.GET.get("q", ""))})
+
+
+class CacheStatsView(UserPassesTestMixin, View):
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        # Counters are per process: each worker reports its own local tier
+        return JsonResponse(cache.stats())
+
+
+class MemoryView(UserPassesTestMixin, View):
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        # Reports the worker that happens to serve this request
+        return JsonResponse(memory.stats.report())
+
+
+class ExportView(UserPassesTestMixin, View):
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, dataset, fmt):
+        # Staff-only, so kept out of worker startup
+        from . import exports
+
+        if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+            raise Http404("Unknown export")
+        try:
+            filters = exports.parse_filters(request.GET)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+        response = StreamingHttpResponse(
+            exports.stream_export(dataset, fmt, **filters),
+            content_type=exports.FORMATS[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
+
+
+class ListingImportView(UserPassesTestMixin, FormView):
+    form_class = ListingImportUploadForm
+    template_name = "auctions/listing_import.html"
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def form_valid(self, form):
+        from . import imports
+
+        # Large files take longer than a request may, so a job imports them
+        try:
+            listing_import = imports.queue_upload(
+                form.cleaned_data["file"], self.request.user
+            )
+        except ValueError as e:
+            form.add_error("file", f"Could not read file: {e}")
+            return self.form_invalid(form)
+        return HttpResponseRedirect(
+            reverse("listing-import", args=[listing_import.pk])
+        )
+
+
+class ListingImportStatusView(UserPassesTestMixin, DetailView):
+    queryset = ListingImport.objects.select_related("job").defer("data")
+    template_name = "auctions/listing_import_status.html"
+    context_object_name = "listing_import"
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.object.finished_at is None and not self.object.failed:
+            # Reload until the job is done
+            response["Refresh"] = "2"
+        return response
+
+
 def login_view(request):
     if request.method == "POST":
 
@@ -0,0 +1,71 @@
+"""Do the work a fresh process would otherwise do on its first requests.
+
+``warm_up`` only builds in-memory state (URL tables, compiled templates,
+translation catalogs, Babel locale data, the title autocomplete index), so
+it is safe to run in the gunicorn master before forking and every worker
+inherits the result. Loading the title index reads the database, so that
+step closes its connections again before anything forks.
+``warm_connections`` opens database connections and has to run in each
+worker after the fork.
+"""
+import time
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import translation
+from auctions import autocomplete, formatting
+
+
+def urls():
+    def compile_patterns(patterns):
+        for pattern in patterns:
+            pattern.pattern.regex
+            if hasattr(pattern, "url_patterns"):
+                compile_patterns(pattern.url_patterns)
+
+    resolver = get_resolver()
+    # Builds the reverse lookup tables of every included resolver too
+    resolver.reverse_dict
+    compile_patterns(resolver.url_patterns)
+
+
+def templates():
+    # Admin templates are left to load on first use
+    directory = Path(apps.get_app_config("auctions").path) / "templates"
+    for path in sorted((directory / "auctions").rglob("*.html")):
+        get_template(path.relative_to(directory).as_posix())
+
+
+def locales():
+    # Without LocaleMiddleware every request renders in LANGUAGE_CODE
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("")
+        locale = formatting.current_locale()
+    for currency in settings.CURRENCIES:
+        formatting.compile_format(currency, locale)
+
+
+def titles():
+    autocomplete.index.build()
+    # Workers must not inherit the master's connections
+    connections.close_all()
+
+
+def warm_up():
+    """Run each step and return the seconds it took."""
+    timings = {}
+    for step in (urls, templates, locales, titles):
+        started = time.perf_counter()
+        step()
+        timings[step.__name__] = time.perf_counter() - started
+    return timings
+
+
+def warm_connections():
+    # Never reuse a connection inherited from the parent process
+    connections.close_all()
+    for alias in connections:
+        connections[alias].ensure_connection()
@@ -0,0 +1,51 @@
+"""Time title autocomplete lookups against a synthetic in-memory index.
+
+    python benchmarks/autocomplete.py --listings 200000
+"""
+import argparse
+import random
+import string
+import time
+from setup_django import setup
+
+setup(migrate=False)
+
+from auctions.autocomplete import TitleIndex  # noqa: E402
+
+
+def word(rng):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    vocabulary = [word(rng) for _ in range(5000)]
+    rows = [
+        (pk, " ".join(rng.choices(vocabulary, k=rng.randint(2, 6))), rng.randint(0, 50))
+        for pk in range(1, args.listings + 1)
+    ]
+    index = TitleIndex()
+    started = time.perf_counter()
+    index.load(rows)
+    print(f"built {len(index.keys)} terms in {time.perf_counter() - started:.2f}s")
+
+    prefixes = [
+        rng.choice(vocabulary)[: rng.randint(1, 5)] for _ in range(args.lookups)
+    ]
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    for label, q in (("p50", 0.5), ("p99", 0.99), ("max", 1.0)):
+        value = timings[min(int(q * len(timings)), len(timings) - 1)]
+        print(f"{label}: {value * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
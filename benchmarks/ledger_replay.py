@@ -0,0 +1,109 @@
+"""Time a full ledger replay and compare state reads with and without
+snapshots.
+
+Writes ``--events`` synthetic bid events spread over ``--listings``
+listings straight into the ledger, rebuilds every snapshot with
+auctions.ledger.replay and reports events per second, then times reading
+one listing's state from its snapshot and tail against folding its whole
+history.
+
+    python benchmarks/ledger_replay.py --events 1000000 --listings 20000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from setup_django import setup
+
+setup()
+
+from django.utils import timezone  # noqa: E402
+from auctions import ledger  # noqa: E402
+from auctions.models import (  # noqa: E402
+    LedgerEvent,
+    Listing,
+    ListingSnapshot,
+    User,
+)
+
+BATCH_SIZE = 10_000
+
+
+def populate(events, listings, bidders):
+    rng = random.Random(0)
+    seller = User.objects.create(username="seller")
+    users = User.objects.bulk_create(
+        User(username=f"bidder-{i}") for i in range(bidders)
+    )
+    ids = [
+        listing.pk
+        for listing in Listing.objects.bulk_create(
+            Listing(title=f"Listing {i}", listed_by=seller) for i in range(listings)
+        )
+    ]
+    prices = dict.fromkeys(ids, 0)
+    counts = dict.fromkeys(ids, 0)
+    now = timezone.now()
+    batch = []
+    for number in range(events):
+        listing_id = rng.choice(ids)
+        prices[listing_id] += rng.randint(1, 20)
+        counts[listing_id] += 1
+        batch.append(
+            LedgerEvent(
+                listing_id=listing_id,
+                kind=LedgerEvent.BID_PLACED,
+                bid_id=number + 1,
+                bidder_id=rng.choice(users).pk,
+                amount=Decimal(prices[listing_id]),
+                created=now,
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            LedgerEvent.objects.bulk_create(batch)
+            batch = []
+    LedgerEvent.objects.bulk_create(batch)
+    return max(counts, key=counts.get)
+
+
+def timed(function, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--listings", type=int, default=5_000)
+    parser.add_argument("--bidders", type=int, default=1_000)
+    args = parser.parse_args()
+    busiest, seconds = timed(
+        lambda: populate(args.events, args.listings, args.bidders)
+    )
+    print(f"populated {args.events} events in {seconds:.1f}s")
+
+    (events, listings), seconds = timed(ledger.replay)
+    print(
+        f"replay: {events} events, {listings} listings in {seconds:.1f}s "
+        f"({events / seconds:,.0f} events/s, "
+        f"{ListingSnapshot.objects.count()} snapshots)"
+    )
+
+    history = LedgerEvent.objects.filter(listing_id=busiest).count()
+    state, with_snapshot = timed(lambda: LedgerEvent.objects.state(busiest), 20)
+    ListingSnapshot.objects.filter(listing_id=busiest).delete()
+    full, without = timed(lambda: LedgerEvent.objects.state(busiest), 20)
+    assert state.as_dict() == full.as_dict()
+    print(
+        f"state of a listing with {history} events: "
+        f"snapshot + {state.tail} events {with_snapshot * 1000:.2f} ms, "
+        f"full fold {without * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
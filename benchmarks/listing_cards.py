@@ -0,0 +1,80 @@
+"""Render a page of listing cards from the card read model and from listings.
+
+Creates ``--listings`` active listings with a few bids each, then renders
+the cards of the newest ``--page`` of them twice: from ListingCard rows,
+and from Listing rows as before, where every price and bid count folds
+that listing's ledger and every seller name is a user lookup. Reports the
+time and number of queries of each.
+
+    python benchmarks/listing_cards.py --listings 2000 --page 200
+"""
+import argparse
+import random
+import time
+from setup_django import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from auctions.models import Listing, ListingCard, User  # noqa: E402
+
+
+class ListingRow:
+    """What the card template reads, from a listing as the pages used to."""
+
+    def __init__(self, listing):
+        self.listing = listing
+        self.title = listing.title
+        self.description = listing.description
+        self.image_url = listing.image_url
+        self.created = listing.created
+        self.price = listing.price
+        self.bid_count = listing.bid_count
+        self.seller = listing.listed_by.username
+        self.category = listing.category_id
+
+    def get_absolute_url(self):
+        return self.listing.get_absolute_url()
+
+
+def render(build):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        render_to_string("auctions/listing_cards.html", {"listings": build()})
+        seconds = time.perf_counter() - started
+    return seconds, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=2_000)
+    parser.add_argument("--page", type=int, default=200)
+    parser.add_argument("--bids", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    seller = User.objects.create(username="seller")
+    bidders = User.objects.bulk_create(
+        User(username=f"bidder-{i}") for i in range(50)
+    )
+    for i in range(args.listings):
+        listing = Listing.objects.create(title=f"Listing {i}", listed_by=seller)
+        for amount in range(1, args.bids + 1):
+            listing.place_bid(rng.choice(bidders), amount)
+
+    cards = ListingCard.objects.filter(closed=False).order_by("-listing")
+    listings = Listing.objects.filter(closed=False).order_by("-pk")
+    for source, build in (
+        ("ListingCard", lambda: cards[: args.page]),
+        ("Listing", lambda: [ListingRow(row) for row in listings[: args.page]]),
+    ):
+        seconds, queries = render(build)
+        print(
+            f"{args.page} cards from {source}: {seconds * 1000:.1f} ms, "
+            f"{queries} queries"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare djmoney's default Money rendering with auctions.formatting.
+
+Renders the same amounts both ways, checks the output is identical and
+reports the time per amount.
+
+    python benchmarks/money_format.py --amounts 10000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from setup_django import setup
+
+setup(migrate=False)
+
+from django.utils import translation  # noqa: E402
+from djmoney.money import Money  # noqa: E402
+from auctions.formatting import format_money  # noqa: E402
+
+
+def timed(render, amounts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rendered = [render(amount) for amount in amounts]
+        best = min(best, time.perf_counter() - started)
+    return rendered, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--amounts", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--language", default="en-us")
+    args = parser.parse_args()
+    rng = random.Random(0)
+    amounts = [
+        Money(Decimal(rng.randint(0, 10**8)) / 100, rng.choice(["USD", "EUR", "JPY"]))
+        for _ in range(args.amounts)
+    ]
+    with translation.override(args.language):
+        default, default_time = timed(str, amounts, args.repeat)
+        fast, fast_time = timed(format_money, amounts, args.repeat)
+    assert default == fast, "outputs differ"
+    per = 1e6 / len(amounts)
+    print(f"djmoney str():  {default_time * per:.2f}us per amount")
+    print(f"format_money(): {fast_time * per:.2f}us per amount")
+    print(f"speedup: {default_time / fast_time:.1f}x, output identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare bid rows written by proxy bidding with the manual-bid baseline.
+
+Every bidder has a private maximum. In the manual baseline each bidder who
+is not winning re-bids one increment at a time until their maximum, which
+is what power users do today. With proxies each bidder records the maximum
+once.
+
+    python benchmarks/proxy_bidding.py --bidders 1000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from setup_django import setup
+
+setup()
+
+from django.db import transaction  # noqa: E402
+from auctions import bidding  # noqa: E402
+from auctions.models import Bid, Listing, User  # noqa: E402
+
+
+def make_auction(bidders, prefix, seed=0):
+    # Same seed for both strategies, so they face the same maxima
+    rng = random.Random(seed)
+    seller = User.objects.create(username=f"seller-{prefix}")
+    listing = Listing.objects.create(
+        title="Benchmark", listed_by=seller, starting_bid=Decimal("1.00")
+    )
+    users = User.objects.bulk_create(
+        User(username=f"bidder-{prefix}-{i}") for i in range(bidders)
+    )
+    maxima = {user: Decimal(rng.randint(2, 500)) for user in users}
+    return listing, maxima
+
+
+def manual(listing, maxima, step):
+    rng = random.Random(0)
+    users = list(maxima)
+    while True:
+        top = listing.bids.order_by("-amount").first()
+        price = top.amount.amount + step if top else listing.starting_bid.amount
+        challengers = [
+            u for u in users if maxima[u] >= price and (not top or top.bidder != u)
+        ]
+        if not challengers:
+            return
+        listing.place_bid(rng.choice(challengers), price)
+
+
+def proxy(listing, maxima, step):
+    for user, maximum in maxima.items():
+        try:
+            bidding.place_proxy_bid(listing, user, maximum)
+        except Exception:
+            # Maxima below the current price are rejected, as they would be
+            # for a manual bid
+            pass
+
+
+def run(name, strategy, bidders, step):
+    with transaction.atomic():
+        listing, maxima = make_auction(bidders, prefix=name)
+        start = time.perf_counter()
+        strategy(listing, maxima, step)
+        elapsed = time.perf_counter() - start
+        rows = Bid.objects.filter(listing=listing).count()
+        print(
+            f"{name:>7}: {rows:6d} bid rows  {elapsed:8.3f}s  "
+            f"final {listing.highest_bid} to {listing.highest_bidder}"
+        )
+        transaction.set_rollback(True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bidders", type=int, default=200)
+    args = parser.parse_args()
+    step = Decimal(bidding.settings.AUCTIONS_BID_INCREMENT)
+    manual_rows = run("manual", manual, args.bidders, step)
+    proxy_rows = run("proxy", proxy, args.bidders, step)
+    print(f"proxy bidding writes {manual_rows / max(proxy_rows, 1):.1f}x fewer rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measure gunicorn cold start to first byte, with and without preloading
+and warm-up.
+
+Starts gunicorn with the shipped config against a migrated throwaway SQLite
+database and an empty shared cache, polls until the index page answers,
+then times the first request to each of a few other pages. It then kills
+the worker, as a recycle would, and times until a replacement answers.
+Runs every mode ``--runs`` times and reports the medians. Linux only: the
+worker is found through /proc.
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["/categories", "/closed-listings", "/login", "/register"]
+# (GUNICORN_PRELOAD, GUNICORN_WARM_UP)
+MODES = {"cold": ("0", "0"), "per-worker": ("0", "1"), "preloaded": ("1", "1")}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=10) as response:
+        response.read(1)
+    return time.perf_counter() - started
+
+
+def first_byte(server, url, started):
+    while True:
+        try:
+            fetch(url)
+            return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError):
+            if server.poll() is not None or time.perf_counter() - started > 60:
+                raise RuntimeError("gunicorn did not answer")
+            time.sleep(0.01)
+
+
+def worker_pid(server):
+    children = Path(f"/proc/{server.pid}/task/{server.pid}/children").read_text()
+    return int(children.split()[0])
+
+
+def run(env, preload, warm_up):
+    port = free_port()
+    env = dict(
+        env,
+        GUNICORN_PRELOAD=preload,
+        GUNICORN_WARM_UP=warm_up,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        SHARED_CACHE_LOCATION=tempfile.mkdtemp(dir=env["BENCHMARK_DIR"]),
+    )
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+         "commerce.wsgi:application"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        cold = first_byte(server, base + "/", started)
+        pages = max(fetch(base + page) for page in PAGES)
+        os.kill(worker_pid(server), signal.SIGKILL)
+        respawn = first_byte(server, base + "/", time.perf_counter())
+        return cold, pages, respawn
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="commerce.settings",
+            SECRET_KEY=os.environ.get("SECRET_KEY", "benchmark"),
+            DJANGO_ALLOWED_HOSTS="127.0.0.1",
+            SQL_DATABASE=str(Path(directory) / "db.sqlite3"),
+            BENCHMARK_DIR=directory,
+            GUNICORN_WORKERS="1",
+        )
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "-v", "0"],
+            cwd=ROOT,
+            env=env,
+            check=True,
+        )
+        for mode, flags in MODES.items():
+            results = [run(env, *flags) for _ in range(args.runs)]
+            cold, pages, respawn = (
+                statistics.median(column) * 1000 for column in zip(*results)
+            )
+            print(
+                f"{mode:>10}: first byte {cold:6.1f} ms, slowest first page "
+                f"after {pages:5.1f} ms, respawned worker {respawn:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
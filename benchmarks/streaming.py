@@ -0,0 +1,58 @@
+"""Time to first and last byte of a streamed list page.
+
+Creates ``--listings`` active listings, requests the index page through the
+test client and reports when the first chunk (head and nav) and the last
+chunk arrive, and the peak memory traced while the page streams. Before
+streaming, the first byte went out only once the whole page was rendered.
+
+    python benchmarks/streaming.py --listings 2000
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from setup_django import setup
+
+os.environ.setdefault("DJANGO_ALLOWED_HOSTS", "testserver")
+setup()
+
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from auctions.models import Listing, User  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=2_000)
+    args = parser.parse_args()
+    seller = User.objects.create(username="seller")
+    for listing in (
+        Listing(title=f"Listing {i}", description="x" * 200, listed_by=seller)
+        for i in range(args.listings)
+    ):
+        listing.save()
+    client = Client()
+    client.get(reverse("index"))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(reverse("index"))
+    first = None
+    size = chunks = 0
+    for chunk in response.streaming_content:
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+        chunks += 1
+    last = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{args.listings} listings, {size / 1e6:.1f} MB in {chunks} chunks: "
+        f"first byte {first * 1000:.1f} ms, last byte {last * 1000:.0f} ms, "
+        f"peak traced memory {peak / 1e6:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
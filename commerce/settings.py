@@ -50,6 +50,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "auctions.middleware.TemplateProfilingMiddleware",
+    "auctions.middleware.SamplingProfilerMiddleware",
+    "auctions.middleware.MemoryProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "commerce.urls"
@@ -84,9 +87,49 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        # Seconds to keep a connection between requests; gunicorn workers
+        # open theirs before taking traffic, so set this in production
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Listings and the rows keyed on them can be spread over several databases
+# (see auctions.sharding). SQL_SHARDS=N adds aliases shard1..shard<N-1>,
+# configured like default with the shard name appended to the database name.
+AUCTIONS_SHARDS = ["default"] + [
+    f"shard{number}" for number in range(1, int(os.environ.get("SQL_SHARDS", 1)))
+]
+for alias in AUCTIONS_SHARDS[1:]:
+    DATABASES[alias] = dict(
+        DATABASES["default"], NAME=f"{DATABASES['default']['NAME']}_{alias}"
+    )
+DATABASE_ROUTERS = (
+    ["auctions.sharding.ShardRouter"] if len(AUCTIONS_SHARDS) > 1 else []
+)
+# Keyset-paged list pages (closed listings, and every list page when sharded)
+# show this many listings per page
+AUCTIONS_SHARD_PAGE_SIZE = 50
+
+# "default" keeps hot keys in each process and falls back to "shared", which
+# every worker sees. TieredCache needs a shared backend with an atomic incr
+# that does not evict its generation counter: point SHARED_CACHE_BACKEND at
+# Redis or memcached in production. The in-memory stand-in increments under
+# a lock but is private to its process, so it only suits a single-process
+# development server.
+CACHES = {
+    "default": {
+        "BACKEND": "auctions.cache.TieredCache",
+        "OPTIONS": {"SHARED": "shared", "MAX_ENTRIES": 1000, "LOCAL_TIMEOUT": 30},
+    },
+    "shared": {
+        "BACKEND": os.environ.get(
+            "SHARED_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("SHARED_CACHE_LOCATION", "commerce-shared"),
+    },
+}
+
 AUTH_USER_MODEL = "auctions.User"
 
 # Password validation
@@ -131,3 +174,78 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 CRISPY_FAIL_SILENTLY = not DEBUG
 CURRENCIES = ("USD",)
+
+# Closed listings older than this are moved to the archive tables
+AUCTIONS_ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+
+# Notification emails; use filebased or locmem backends locally
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH", BASE_DIR / "sent_emails")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "auctions@localhost")
+# Outbox events are sent outside the transaction that claims them; a claim
+# older than this is taken to belong to a dead dispatcher and sent again
+AUCTIONS_OUTBOX_CLAIM_SECONDS = 300
+
+# Maximum jobs running at once per queue across all workers; unlisted
+# queues are unlimited
+AUCTIONS_JOB_QUEUE_LIMITS = {
+    "email": 2,
+    # Ranking folds read-modify-write each listing's key
+    "rankings": 1,
+}
+# Running jobs refresh their lock this often; runworker --stale-after
+# requeues jobs whose lock is older than that
+AUCTIONS_JOB_HEARTBEAT_SECONDS = 30
+
+# Smallest step by which proxy bidding outbids a competing bid
+AUCTIONS_BID_INCREMENT = os.environ.get("BID_INCREMENT", "1.00")
+
+# A listing's auction state is its latest snapshot plus the ledger events
+# after it; a new snapshot is written once this many have piled up
+AUCTIONS_LEDGER_SNAPSHOT_EVERY = 50
+
+# Trending scores halve after this many hours without new bids or watchers
+AUCTIONS_TRENDING_HALF_LIFE_HOURS = float(
+    os.environ.get("TRENDING_HALF_LIFE_HOURS", 6)
+)
+
+# Title autocomplete keeps this many of the most watched active listings in
+# memory, picks up new and closed listings every SYNC seconds and rebuilds
+# (refreshing watcher counts) every REBUILD seconds
+AUCTIONS_AUTOCOMPLETE_MAX_LISTINGS = int(
+    os.environ.get("AUTOCOMPLETE_MAX_LISTINGS", 200_000)
+)
+AUCTIONS_AUTOCOMPLETE_SYNC_SECONDS = 5
+AUCTIONS_AUTOCOMPLETE_REBUILD_SECONDS = 600
+
+# Category counts and the trending/ending-soon feeds may be this stale
+AUCTIONS_CATEGORY_CACHE_SECONDS = 30
+AUCTIONS_FEED_CACHE_SECONDS = 30
+
+# Listing pages are rendered once for everyone and cached this long, with
+# the per-user parts filled in per request (auctions.holes); 0 turns it off
+AUCTIONS_PAGE_CACHE_SECONDS = int(os.environ.get("PAGE_CACHE_SECONDS", 0))
+
+# List pages otherwise stream their listing cards in chunks of this many
+AUCTIONS_STREAM_CHUNK_SIZE = 50
+
+# Lets staff add ?profile-templates to a URL to get per-template and per-tag
+# render times back in a Server-Timing header
+AUCTIONS_TEMPLATE_PROFILING = os.environ.get("TEMPLATE_PROFILING", "0") == "1"
+AUCTIONS_TEMPLATE_PROFILE_TOP = 15
+
+# Sampling profiler: staff ?profile, a signed X-Profile-Token, or one in N
+# requests per URL name (0 turns random sampling off) while profiling costs
+# at most the given share of request time
+AUCTIONS_PROFILE_DIR = os.environ.get("PROFILE_DIR", BASE_DIR / "profiles")
+AUCTIONS_PROFILE_INTERVAL = 0.005
+AUCTIONS_PROFILE_ONE_IN = int(os.environ.get("PROFILE_ONE_IN", 0))
+AUCTIONS_PROFILE_ONE_IN_BY_VIEW = {}
+AUCTIONS_PROFILE_OVERHEAD_BUDGET = 0.01
+AUCTIONS_PROFILE_TOKEN_MAX_AGE = 3600
+
+# Trace allocations in one in N requests (0 turns it off); staff can read
+# each worker's results at /memory
+AUCTIONS_MEMORY_SAMPLE_ONE_IN = int(os.environ.get("MEMORY_SAMPLE_ONE_IN", 0))
@@ -0,0 +1,22 @@
+"""commerce.settings plus a second listing shard for the sharding tests.
+
+auctions.tests.test_sharding switches the shard on with override_settings
+and is skipped under the plain settings. Opt in with
+
+    python manage.py test --settings=commerce.test_settings
+
+or DJANGO_SETTINGS_MODULE=commerce.test_settings.
+"""
+from commerce.settings import *  # noqa: F401,F403
+from commerce.settings import DATABASES
+
+# Shard tables come straight from the models, as data migrations are written
+# for default only
+DATABASES.setdefault(
+    "shard1",
+    dict(
+        DATABASES["default"],
+        NAME=f"{DATABASES['default']['NAME']}_shard1",
+        TEST={"MIGRATE": False},
+    ),
+)
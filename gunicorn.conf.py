@@ -0,0 +1,63 @@
+"""Gunicorn settings for production: gunicorn -c gunicorn.conf.py commerce.wsgi
+
+Workers are recycled gracefully once their RSS passes MAX_WORKER_RSS_MB:
+the worker finishes the request in hand, exits, and the arbiter starts a
+fresh one. max_requests is kept as a backstop for slow growth.
+
+The app is preloaded and warmed up in the master (auctions.warmup), so a
+new worker, whether started at boot, on scale-up or after a recycle, is a
+fork that already has URL tables, templates, locale data and the title
+autocomplete index in memory; it only opens its database connections
+before taking traffic. Set
+GUNICORN_PRELOAD=0 to load and warm the app in each worker instead, e.g.
+to pick up code changes with a HUP, and GUNICORN_WARM_UP=0 to skip the
+warm-up (benchmarks/startup.py compares the three).
+"""
+import os
+from auctions.memory import rss_bytes
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 3))
+worker_tmp_dir = "/dev/shm"
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+graceful_timeout = 30
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+warm_up_workers = os.environ.get("GUNICORN_WARM_UP", "1") == "1"
+
+max_worker_rss = int(os.environ.get("MAX_WORKER_RSS_MB", 512)) * 1024 * 1024
+
+
+def post_request(worker, req, environ, resp):
+    rss = rss_bytes()
+    if worker.alive and rss > max_worker_rss:
+        worker.log.info(
+            "Worker %s RSS %d MB is over %d MB; recycling after this request",
+            worker.pid,
+            rss // (1024 * 1024),
+            max_worker_rss // (1024 * 1024),
+        )
+        worker.alive = False
+
+
+def when_ready(server):
+    if server.cfg.preload_app and warm_up_workers:
+        log_warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if not warm_up_workers:
+        return
+    if not worker.cfg.preload_app:
+        log_warm_up(worker.log)
+    from auctions.warmup import warm_connections
+
+    warm_connections()
+
+
+def log_warm_up(log):
+    from auctions.warmup import warm_up
+
+    timings = warm_up()
+    steps = ", ".join(f"{step} {secs * 1000:.0f} ms" for step, secs in timings.items())
+    log.info("Warmed up in %.0f ms (%s)", sum(timings.values()) * 1000, steps)